@@ -6,6 +6,7 @@ Enhanced with multiple file selection, multiple views, and improved credentials
 """
 
 import os
+import io
 import json
 import base64
 import hashlib
@@ -16,15 +17,30 @@ import time
 import platform
 import sys
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, session
+from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, session, Response, stream_with_context
 from werkzeug.utils import secure_filename
 from cryptography.fernet import Fernet
-import tempfile
 import zipfile
 import stat
 import socket
 import subprocess
 import logging
+import array
+import bisect
+import uuid
+import sqlite3
+import heapq
+import random
+import select
+import shutil
+import fnmatch
+import csv
+import re
+import math
+import shlex
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 def is_safe_path(path):
     """Check if path is safe for file operations (not root or system directories)"""
@@ -217,13 +233,2543 @@ logger = logging.getLogger(__name__)
 UPLOAD_FOLDER = '/tmp/scp_uploads'
 CREDENTIALS_FILE = 'saved_credentials.enc'
 ENCRYPTION_KEY_FILE = 'encryption.key'
+TRANSFER_FILES_MAX_PAGE = 5000  # Max rows per /api/transfer-files page
+# Persistent data lives next to the app (the executable, when frozen), not in whatever folder it was started from
+APP_DATA_DIR = os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__))
+TRANSFER_HISTORY_DB = os.environ.get('SCP_TRANSFER_HISTORY_DB') or os.path.join(APP_DATA_DIR, 'transfer_history.db')
+DIR_SIZE_INDEX_DB = 'dir_size_index.db'  # Persistent per-directory size/count aggregates
+DIR_SIZE_INDEX_MTIME_SLACK = 2  # Seconds a folder's mtime must predate its scan, on the folder's own clock, before the scan is reused
+TRANSPORT_POOL_IDLE_TIMEOUT = 300  # Seconds an unused pooled SSH transport stays open
+TRANSPORT_POOL_SWEEP_INTERVAL = 30
+CONNECTION_HANDOFF_TTL = 30  # Seconds a tested connection waits to be promoted by login
+SFTP_POOL_MAX_CHANNELS = 3  # Bulk SFTP channels per connection (plus the interactive lane)
+REMOTE_CAPABILITIES_FILE = 'remote_capabilities.json'
+REMOTE_CAPABILITIES_TTL = 7 * 24 * 3600  # Re-probe a host after a week
+KEEPALIVE_IDLE_INTERVAL = 45  # Seconds between health checks for idle sessions
+KEEPALIVE_TRANSFER_INTERVAL = 30  # Seconds between health checks during transfers
+KEEPALIVE_MAX_FAILURES = 3  # Consecutive failed checks before a session needs re-auth
+SCHEDULER_MAX_WORKERS = 8  # Health checks allowed to run at the same time
+SCHEDULER_LATE_THRESHOLD = 5  # Seconds past due before a check counts as late
+SESSION_IDLE_TIMEOUT = 3600  # Seconds without API activity before a session is evicted
+SESSION_MAX_CONNECTIONS = 100  # Least recently used sessions are evicted above this
+SESSION_MEMORY_LIMIT_MB = 1024  # Process RSS above which idle sessions are shed
+SESSION_REAPER_INTERVAL = 60
+SESSION_TOMBSTONE_TTL = 24 * 3600  # How long an evicted session reports why it was closed
+SESSION_TOMBSTONE_MAX = 1000
+PRIVATE_KEY_CACHE_SIZE = 64  # Parsed private keys kept in memory
+REMOTE_COMMAND_TIMEOUT = 120  # Seconds a command on the persistent shell may run
+REMOTE_COMMAND_BATCH = 200  # Commands written to the shell per pipelined batch
+SFTP_PIPELINE_WINDOW = 64  # SFTP requests in flight per channel for bulk rename/mkdir/delete
+SFTP_READDIR_AHEAD = 8  # READDIR requests kept in flight while streaming a remote listing
+BATCH_MAX_OPERATIONS = 1000  # Operations accepted by one /api/batch request
+DELETE_LOCAL_WORKERS = 8  # Threads removing local entries in a background deletion job
+DELETE_PROGRESS_INTERVAL = 0.25  # Seconds between per-row progress updates of a deletion job
+LISTING_CACHE_TTL = 30  # Seconds a cached remote directory listing is served
+LISTING_CACHE_MAX_ENTRIES = 256  # Remote listings cached per connection (least recently used evicted)
+LISTING_PREFETCH_ENABLED = os.environ.get('SCP_LISTING_PREFETCH', '').lower() in ('1', 'true', 'yes')  # Opt in to listing likely next remote folders in the background
+LISTING_PREFETCH_PER_LISTING = 3  # Folders prefetched after one listing
+LISTING_PREFETCH_BUDGET = 30  # Prefetch listings per connection per minute
+LISTING_PREFETCH_MAX_DIR_BYTES = 65536  # Skip subfolders whose directory file is larger (many entries)
+LISTING_PREFETCH_WORKERS = 2  # Background threads running prefetches across all connections
+LISTING_PAGE_SIZE = 1000  # Default entries per page of a paginated listing
+LISTING_PAGE_MAX = 10000  # Largest page a client may ask for
+LISTING_VIEW_TTL = 300  # Seconds a sorted listing view (and its cursors) stays usable
+LISTING_MAX_VIEWS = 64  # Sorted listing views kept across all sessions
+LISTING_FORMATS = ('rows', 'columns')  # Listing response formats; rows (one object per entry) is the default
+SEARCH_RESULT_LIMIT = 1000  # Matches a remote search returns unless the client asks for a different limit
+SEARCH_RESULT_MAX = 10000  # Largest limit a client may ask for
+SEARCH_FLUSH_INTERVAL = 0.25  # Seconds at most that found matches wait before being sent
+SEARCH_FLUSH_BATCH = 200  # Matches sent together when they arrive quickly
+SEARCH_POLL_INTERVAL = 0.2  # Seconds between cancel checks while a search waits for output
+WATCH_MAX_PATHS = 4  # Remote folders one change feed watches at once
+WATCH_SETTLE_INTERVAL = 0.3  # Seconds inotify events are gathered before they are applied and sent
+WATCH_POLL_INTERVAL = 2  # Seconds between folder mtime checks when inotifywait can't be used
+WATCH_MTIME_SLACK = 2  # Folders modified this close to being listed, on the server's clock, are listed again (mtimes have 1s resolution)
+WATCH_START_TIMEOUT = 10  # Seconds inotifywait gets to set up its watches before polling is used instead
+WATCH_HEARTBEAT_INTERVAL = 15  # Seconds of quiet after which a heartbeat line is sent
+RECONNECT_BASE_DELAY = 1  # Seconds before the second reconnect attempt, doubling after that
+RECONNECT_MAX_DELAY = 60
+RECONNECT_MAX_ATTEMPTS = 8
+RECONNECT_TRANSFER_WAIT = 300  # Seconds a paused transfer waits for the connection to come back
+RECONNECT_LATENCY_BUCKETS = [0.5, 1, 2, 5, 10, 30, 60, 120, 300]  # Histogram upper bounds in seconds
+SSH_ALGORITHMS_FILE = 'ssh_algorithms.json'  # Per-host algorithm profile and benchmark results
+SSH_BENCHMARK_SIZE_MB = 16  # Data streamed per cipher by the throughput benchmark
+
+# Algorithm preference profiles, most preferred first. Names the installed
+# paramiko doesn't implement are skipped; an empty list keeps paramiko's defaults.
+SSH_ALGORITHM_PROFILES = {
+    'default': {},
+    'throughput': {
+        'ciphers': ['aes128-gcm@openssh.com', 'chacha20-poly1305@openssh.com', 'aes256-gcm@openssh.com',
+                    'aes128-ctr', 'aes192-ctr', 'aes256-ctr'],
+        'macs': ['hmac-sha2-256-etm@openssh.com', 'hmac-sha2-256', 'hmac-sha2-512-etm@openssh.com',
+                 'hmac-sha2-512', 'hmac-sha1'],
+        'kex': ['curve25519-sha256@libssh.org', 'ecdh-sha2-nistp256', 'diffie-hellman-group14-sha256']
+    },
+    'compatibility': {
+        'ciphers': ['aes128-ctr', 'aes256-ctr', 'aes128-cbc', 'aes256-cbc', '3des-cbc'],
+        'macs': ['hmac-sha2-256', 'hmac-sha1', 'hmac-sha2-512', 'hmac-md5', 'hmac-sha1-96'],
+        'kex': ['diffie-hellman-group14-sha256', 'diffie-hellman-group-exchange-sha256', 'ecdh-sha2-nistp256',
+                'curve25519-sha256@libssh.org', 'diffie-hellman-group14-sha1',
+                'diffie-hellman-group-exchange-sha1', 'diffie-hellman-group1-sha1']
+    }
+}
+
+# Combined probe run in one exec on login: each "@@name" line starts a section,
+# cap_* sections only print something when the capability is present
+REMOTE_PROBE_SCRIPT = '''
+echo @@linux_pretty; grep '^PRETTY_NAME=' /etc/os-release 2>/dev/null | cut -d= -f2 | tr -d '"'
+echo @@linux_name; grep '^NAME=' /etc/os-release 2>/dev/null | cut -d= -f2 | tr -d '"'
+echo @@linux_lsb; lsb_release -d 2>/dev/null | cut -f2
+echo @@redhat; cat /etc/redhat-release 2>/dev/null
+echo @@debian; cat /etc/debian_version 2>/dev/null
+echo @@uname; uname -s 2>/dev/null
+echo @@kernel; uname -r 2>/dev/null
+echo @@hostname; hostname 2>/dev/null
+echo @@macos; sw_vers -productName 2>/dev/null
+echo @@cap_tar; command -v tar 2>/dev/null
+echo @@cap_sha256sum; command -v sha256sum 2>/dev/null || command -v shasum 2>/dev/null
+echo @@cap_rsync; command -v rsync 2>/dev/null
+echo @@cap_zstd; command -v zstd 2>/dev/null
+echo @@cap_inotifywait; command -v inotifywait 2>/dev/null
+echo @@cap_find_printf; find / -maxdepth 0 -printf 'yes\\n' 2>/dev/null
+echo @@end
+'''
+REMOTE_CAPABILITY_NAMES = ['tar', 'sha256sum', 'rsync', 'zstd', 'inotifywait', 'find_printf']
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Per-file transfer states (stored as small integers in TransferFileTable)
+FILE_STATE_QUEUED = 0
+FILE_STATE_ACTIVE = 1
+FILE_STATE_DONE = 2
+FILE_STATE_FAILED = 3
+FILE_STATE_NAMES = ['queued', 'active', 'done', 'failed']
+
+class TransferFileTable:
+    """Per-file state of a transfer job kept in parallel arrays.
+
+    Every file is a row; numeric columns live in ``array.array`` buffers so a
+    job with millions of files costs a few dozen bytes per row instead of a
+    dict per file. Each change bumps a job-wide version, which lets clients
+    poll only the rows that changed since the version they last saw.
+    """
+
+    def __init__(self, session_id):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.session_id = session_id
+        self.created_at = time.time()
+        self.version = 0
+        self.lock = threading.Lock()
+
+        # Row columns
+        self.paths = []
+        self.states = array.array('b')
+        self.sizes = array.array('q')
+        self.transferred = array.array('q')
+        self.started = array.array('d')
+        self.finished = array.array('d')
+        self.row_versions = array.array('Q')
+        self.counts = [0] * len(FILE_STATE_NAMES)
+
+        # Append-only (version, row) change log used for "since" queries,
+        # compacted when it grows well beyond the number of rows
+        self._log_versions = array.array('Q')
+        self._log_rows = array.array('q')
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _touch(self, row):
+        """Record a change to a row (caller holds the lock)"""
+        self.version += 1
+        self.row_versions[row] = self.version
+        self._log_versions.append(self.version)
+        self._log_rows.append(row)
+        if len(self._log_rows) > 2 * len(self.paths) + 1024:
+            self._compact_log()
+
+    def _set_state(self, row, state):
+        """Move a row to a new state keeping the per-state counts (caller holds the lock)"""
+        self.counts[self.states[row]] -= 1
+        self.counts[state] += 1
+        self.states[row] = state
+
+    def _compact_log(self):
+        """Keep only the latest change per row, ordered by version"""
+        latest = sorted((v, r) for r, v in enumerate(self.row_versions) if v)
+        self._log_versions = array.array('Q', (v for v, _ in latest))
+        self._log_rows = array.array('q', (r for _, r in latest))
+
+    def add(self, path, size=0, state=FILE_STATE_QUEUED):
+        """Append a file row and return its row number"""
+        with self.lock:
+            row = len(self.paths)
+            self.paths.append(path)
+            self.states.append(state)
+            self.sizes.append(max(0, int(size or 0)))
+            self.transferred.append(0)
+            self.started.append(time.time() if state == FILE_STATE_ACTIVE else 0.0)
+            self.finished.append(0.0)
+            self.row_versions.append(0)
+            self.counts[state] += 1
+            self._touch(row)
+            return row
+
+    def start(self, row, size=None):
+        """Mark a row as actively transferring"""
+        with self.lock:
+            self._set_state(row, FILE_STATE_ACTIVE)
+            if size is not None:
+                self.sizes[row] = max(0, int(size))
+            self.started[row] = time.time()
+            self._touch(row)
+
+    def update(self, row, transferred):
+        """Record bytes transferred so far for a row"""
+        with self.lock:
+            self.transferred[row] = int(transferred)
+            self._touch(row)
+
+    def finish(self, row, success=True):
+        """Mark a row as done or failed"""
+        with self.lock:
+            self._set_state(row, FILE_STATE_DONE if success else FILE_STATE_FAILED)
+            self.finished[row] = time.time()
+            if success and self.transferred[row] < self.sizes[row]:
+                self.transferred[row] = self.sizes[row]
+            self._touch(row)
+
+    def rate(self, row, now=None):
+        """Average bytes per second for a row"""
+        started = self.started[row]
+        if not started:
+            return 0.0
+        end = self.finished[row] or (now or time.time())
+        elapsed = end - started
+        return self.transferred[row] / elapsed if elapsed > 0 else 0.0
+
+    def state_counts(self):
+        """Number of rows in each state"""
+        return dict(zip(FILE_STATE_NAMES, self.counts))
+
+    def _changed_rows(self, since):
+        """Rows changed after the given version, in row order"""
+        start = bisect.bisect_right(self._log_versions, since)
+        return sorted(set(self._log_rows[start:]))
+
+    def snapshot(self, offset=0, limit=500, since=None):
+        """Return a page of rows in a compact columnar layout"""
+        with self.lock:
+            now = time.time()
+            if since is not None:
+                rows = self._changed_rows(since)
+                total = len(rows)
+                rows = rows[offset:offset + limit]
+            else:
+                total = len(self.paths)
+                rows = range(offset, min(offset + limit, total))
+
+            columns = {
+                'row': list(rows),
+                'path': [self.paths[r] for r in rows],
+                'state': [self.states[r] for r in rows],
+                'bytes': [self.transferred[r] for r in rows],
+                'size': [self.sizes[r] for r in rows],
+                'rate': [round(self.rate(r, now), 1) for r in rows]
+            }
+            next_offset = offset + len(columns['row'])
+
+            return {
+                'job_id': self.job_id,
+                'version': self.version,
+                'since': since,
+                'total': total,
+                'offset': offset,
+                'next_offset': next_offset if next_offset < total else None,
+                'states': FILE_STATE_NAMES,
+                'counts': self.state_counts(),
+                'columns': columns
+            }
+
+def _listing_version(path, items):
+    """Content version of a formatted listing: a short digest of the path and every entry's fields"""
+    digest = hashlib.blake2b(path.encode(errors='surrogatepass'), digest_size=12)
+    digest.update(repr([tuple(item.values()) for item in items]).encode(errors='surrogatepass'))
+    return digest.hexdigest()
+
+def _sorted_listing(path, items, mtimes, modes):
+    """Listing dict with items in display order: folders first, then by name.
+
+    The raw mtimes (epoch seconds) and st_mode values of the entries are
+    kept in the same order under ``_mtimes`` and ``_modes`` for the
+    columnar format. Underscore keys are never sent to clients.
+    """
+    order = sorted(range(len(items)), key=lambda index: (not items[index]['is_directory'], items[index]['name'].lower()))
+    return {
+        'items': [items[index] for index in order],
+        'current_path': path,
+        '_mtimes': array.array('q', [mtimes[index] for index in order]),
+        '_modes': array.array('L', [modes[index] for index in order])
+    }
+
+def listing_columns(result):
+    """Columnar form of a listing or page: one array per field instead of one object per entry.
+
+    ``columns`` holds parallel ``name``, ``size``, ``mtime`` (epoch
+    seconds), ``mode`` (st_mode bits, so folders carry S_IFDIR), ``owner``
+    and ``group`` arrays. Paths and display strings are left to the client.
+    Errors are passed through unchanged.
+    """
+    if 'error' in result:
+        return result
+    items = result['items']
+    columnar = {key: value for key, value in result.items() if key != 'items' and not key.startswith('_')}
+    columnar.update(format='columns', count=len(items), columns={
+        'name': [item['name'] for item in items],
+        'size': [item['size'] for item in items],
+        'mtime': list(result['_mtimes']),
+        'mode': list(result['_modes']),
+        'owner': [item['owner'] for item in items],
+        'group': [item['group'] for item in items]
+    })
+    return columnar
+
+def _mtime_settled(mtime, seen_at, read_at, clock_offset, slack):
+    """Whether a folder read at ``read_at`` started late enough after its ``mtime`` that a later change moves it.
+
+    Mtimes come from the folder's own clock and have 1s resolution, so the
+    read must start ``slack`` seconds after the mtime on that clock.
+    ``seen_at`` and ``read_at`` are our clock; the folder's clock read at
+    least ``mtime`` at ``seen_at``, and ``clock_offset`` (None if unknown)
+    more than ours at any time, so either bounds its clock at the read.
+    """
+    offset = mtime - seen_at
+    if clock_offset is not None:
+        offset = max(offset, clock_offset)
+    return mtime < read_at + offset - slack
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(percent / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+class TransferHistoryStore:
+    """Embedded SQLite store of completed transfer jobs and throughput analytics.
+
+    The database file is created on first use, not when the store is built.
+    """
+
+    BUCKET_FORMATS = {
+        'hour': '%Y-%m-%d %H:00',
+        'day': '%Y-%m-%d',
+        'week': '%Y-W%W',
+        'month': '%Y-%m'
+    }
+
+    def __init__(self, db_path=TRANSFER_HISTORY_DB):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.ready = False
+
+    def _connect(self):
+        """Open the database, creating its table the first time; callers hold the lock"""
+        db = sqlite3.connect(self.db_path, timeout=10)
+        if not self.ready:
+            self.ready = self._init_db(db)
+        return db
+
+    def _init_db(self, db):
+        """Create the history table if it does not exist"""
+        try:
+            with db:
+                db.execute('''
+                    CREATE TABLE IF NOT EXISTS transfer_history (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        job_id TEXT,
+                        host TEXT NOT NULL,
+                        port INTEGER,
+                        username TEXT,
+                        direction TEXT,
+                        status TEXT,
+                        started_at REAL,
+                        finished_at REAL,
+                        duration REAL,
+                        bytes INTEGER,
+                        files INTEGER,
+                        files_failed INTEGER,
+                        dirs INTEGER,
+                        throughput REAL,
+                        rate_p50 REAL,
+                        rate_p90 REAL,
+                        rate_p99 REAL,
+                        errors TEXT
+                    )
+                ''')
+                db.execute('CREATE INDEX IF NOT EXISTS idx_history_host_time ON transfer_history (host, started_at)')
+            return True
+        except Exception as e:
+            logger.error(f"Error initializing transfer history store: {e}")
+            return False
+
+    def record(self, job):
+        """Insert a completed job; rates is a list of per-file bytes/second"""
+        rates = sorted(r for r in job.get('rates', []) if r > 0)
+        duration = max(0.0, job['finished_at'] - job['started_at'])
+        throughput = job['bytes'] / duration if duration > 0 else 0.0
+        try:
+            with self.lock, self._connect() as db:
+                db.execute('''
+                    INSERT INTO transfer_history (
+                        job_id, host, port, username, direction, status, started_at, finished_at,
+                        duration, bytes, files, files_failed, dirs, throughput,
+                        rate_p50, rate_p90, rate_p99, errors
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    job.get('job_id'), job['host'], job.get('port'), job.get('username'),
+                    job.get('direction'), job.get('status', 'completed'),
+                    job['started_at'], job['finished_at'], duration,
+                    job['bytes'], job.get('files', 0), job.get('files_failed', 0), job.get('dirs', 0),
+                    throughput, _percentile(rates, 50), _percentile(rates, 90), _percentile(rates, 99),
+                    json.dumps(job.get('errors', [])[:50])
+                ))
+            return True
+        except Exception as e:
+            logger.error(f"Error recording transfer history: {e}")
+            return False
+
+    def recent(self, host=None, limit=50):
+        """Most recent jobs, optionally for one host"""
+        query = 'SELECT * FROM transfer_history'
+        params = []
+        if host:
+            query += ' WHERE host = ?'
+            params.append(host)
+        query += ' ORDER BY started_at DESC LIMIT ?'
+        params.append(int(limit))
+        with self.lock, self._connect() as db:
+            db.row_factory = sqlite3.Row
+            rows = db.execute(query, params).fetchall()
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job['errors'] = json.loads(job['errors'] or '[]')
+            jobs.append(job)
+        return jobs
+
+    def trends(self, host=None, days=30, bucket='day'):
+        """Throughput per host per time bucket with a change indicator per host"""
+        bucket_format = self.BUCKET_FORMATS.get(bucket, self.BUCKET_FORMATS['day'])
+        query = '''
+            SELECT host,
+                   strftime(?, started_at, 'unixepoch', 'localtime') AS bucket,
+                   COUNT(*) AS jobs,
+                   SUM(bytes) AS bytes,
+                   SUM(files) AS files,
+                   SUM(files_failed) AS files_failed,
+                   SUM(duration) AS duration,
+                   MIN(throughput) AS min_throughput,
+                   MAX(throughput) AS max_throughput,
+                   AVG(rate_p50) AS avg_rate_p50,
+                   AVG(rate_p90) AS avg_rate_p90
+            FROM transfer_history
+            WHERE started_at >= ?
+        '''
+        params = [bucket_format, time.time() - days * 86400]
+        if host:
+            query += ' AND host = ?'
+            params.append(host)
+        query += ' GROUP BY host, bucket ORDER BY host, bucket'
+
+        with self.lock, self._connect() as db:
+            db.row_factory = sqlite3.Row
+            rows = [dict(r) for r in db.execute(query, params).fetchall()]
+
+        hosts = {}
+        for row in rows:
+            row['throughput'] = row['bytes'] / row['duration'] if row['duration'] else 0.0
+            hosts.setdefault(row['host'], []).append(row)
+
+        result = {}
+        for host_name, buckets in hosts.items():
+            # Compare the latest bucket against the average of the earlier ones
+            change_percent = None
+            if len(buckets) > 1:
+                baseline = sum(b['throughput'] for b in buckets[:-1]) / (len(buckets) - 1)
+                if baseline > 0:
+                    change_percent = round((buckets[-1]['throughput'] - baseline) / baseline * 100, 1)
+            result[host_name] = {
+                'buckets': buckets,
+                'change_percent': change_percent,
+                'degrading': change_percent is not None and change_percent <= -25
+            }
+        return result
+
+class SSHTransportPool:
+    """Reference-counted pool of authenticated SSH clients shared across sessions.
+
+    Sessions for the same host, port, user and credentials lease the same
+    transport and open their own SFTP channels on it, so a second tab or user
+    skips the TCP, key exchange and authentication round-trips entirely.
+    Transports nobody is leasing are closed after an idle timeout.
+    """
+
+    def __init__(self, idle_timeout=TRANSPORT_POOL_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._sweeper = None
+
+    @staticmethod
+    def make_key(host, port, username, password=None, key_data=None):
+        """Pool key; credentials are only kept as a fingerprint"""
+        fingerprint = hashlib.sha256(f"{password or ''}\0{key_data or ''}".encode()).hexdigest()
+        return (host, int(port), username, fingerprint)
+
+    @staticmethod
+    def _is_active(ssh):
+        transport = ssh.get_transport()
+        return bool(transport and transport.is_active() and transport.is_authenticated())
+
+    def acquire(self, key):
+        """Lease a live pooled client for key, or return None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and self._is_active(entry['ssh']):
+                entry['refs'] += 1
+                entry['last_used'] = time.time()
+                self.hits += 1
+                return entry
+            if entry:
+                # Dead transport: drop it so a fresh one can take its place
+                del self.entries[key]
+                self._close_quietly(entry['ssh'])
+            self.misses += 1
+            return None
+
+    def add(self, key, ssh, info=None):
+        """Register a freshly connected client and lease it to the caller"""
+        with self.lock:
+            existing = self.entries.get(key)
+            if existing and self._is_active(existing['ssh']):
+                # Another login raced us to the same transport: share theirs
+                existing['refs'] += 1
+                existing['last_used'] = time.time()
+                self._close_quietly(ssh)
+                return existing
+            entry = {
+                'key': key,
+                'ssh': ssh,
+                'refs': 1,
+                'info': dict(info or {}),
+                'created_at': time.time(),
+                'last_used': time.time()
+            }
+            self.entries[key] = entry
+        self._ensure_sweeper()
+        return entry
+
+    def release(self, ssh):
+        """Return a lease; unpooled or dead clients are closed right away"""
+        with self.lock:
+            for key, entry in list(self.entries.items()):
+                if entry['ssh'] is ssh:
+                    entry['refs'] = max(0, entry['refs'] - 1)
+                    entry['last_used'] = time.time()
+                    if entry['refs'] == 0 and not self._is_active(ssh):
+                        del self.entries[key]
+                        self._close_quietly(ssh)
+                    return
+        self._close_quietly(ssh)
+
+    def discard(self, ssh):
+        """Remove a client from the pool and close it regardless of leases"""
+        with self.lock:
+            for key, entry in list(self.entries.items()):
+                if entry['ssh'] is ssh:
+                    del self.entries[key]
+        self._close_quietly(ssh)
+
+    def sweep(self):
+        """Close idle or dead transports; returns how many were closed"""
+        now = time.time()
+        closed = 0
+        with self.lock:
+            for key, entry in list(self.entries.items()):
+                idle = entry['refs'] == 0 and now - entry['last_used'] > self.idle_timeout
+                if idle or not self._is_active(entry['ssh']):
+                    del self.entries[key]
+                    self._close_quietly(entry['ssh'])
+                    closed += 1
+        if closed:
+            logger.info(f"Transport pool closed {closed} idle transport(s)")
+        return closed
+
+    def _ensure_sweeper(self):
+        if self._sweeper and self._sweeper.is_alive():
+            return
+
+        def sweeper_worker():
+            while True:
+                time.sleep(TRANSPORT_POOL_SWEEP_INTERVAL)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"Transport pool sweep error: {e}")
+
+        self._sweeper = threading.Thread(target=sweeper_worker, daemon=True)
+        self._sweeper.start()
+
+    @staticmethod
+    def _close_quietly(ssh):
+        try:
+            ssh.close()
+        except Exception:
+            pass
+
+    def describe(self, key):
+        """Lease information for the transport pooled under key, or None"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            return {
+                'host': entry['key'][0],
+                'port': entry['key'][1],
+                'username': entry['key'][2],
+                'leases': entry['refs'],
+                'age_seconds': round(now - entry['created_at'], 1),
+                'idle_seconds': round(now - entry['last_used'], 1) if entry['refs'] == 0 else 0
+            }
+
+    def stats(self):
+        """Pool-wide counters; no per-host detail, since every session shares the pool"""
+        with self.lock:
+            transports = len(self.entries)
+            leases = sum(entry['refs'] for entry in self.entries.values())
+        return {
+            'transports': transports,
+            'leases': leases,
+            'hits': self.hits,
+            'misses': self.misses,
+            'idle_timeout': self.idle_timeout
+        }
+
+class ConnectionHandoffCache:
+    """Authenticated clients from a connection test, kept briefly for the login that follows.
+
+    The login screen tests the server and then logs in with the same details;
+    parking the tested client lets ``create_connection`` promote it instead of
+    repeating the TCP, key exchange and authentication handshake. Clients that
+    are not claimed within the TTL are closed.
+    """
+
+    def __init__(self, ttl=CONNECTION_HANDOFF_TTL):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.promoted = 0
+        self.expired = 0
+
+    def put(self, key, ssh):
+        """Park an authenticated client under its transport pool key"""
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            self.entries[key] = (ssh, time.time() + self.ttl)
+        if previous:
+            SSHTransportPool._close_quietly(previous[0])
+        timer = threading.Timer(self.ttl, self._expire, args=(key, ssh))
+        timer.daemon = True
+        timer.start()
+
+    def take(self, key):
+        """Claim a parked client if it is still fresh and alive, or return None"""
+        with self.lock:
+            item = self.entries.pop(key, None)
+        if not item:
+            return None
+        ssh, expires_at = item
+        if time.time() > expires_at or not SSHTransportPool._is_active(ssh):
+            SSHTransportPool._close_quietly(ssh)
+            return None
+        self.promoted += 1
+        return ssh
+
+    def _expire(self, key, ssh):
+        with self.lock:
+            item = self.entries.get(key)
+            if not item or item[0] is not ssh:
+                return
+            del self.entries[key]
+            self.expired += 1
+        SSHTransportPool._close_quietly(ssh)
+        logger.info(f"Tested connection for {key[2]}@{key[0]}:{key[1]} expired before login")
+
+    def stats(self):
+        """Handoff counters"""
+        with self.lock:
+            parked = len(self.entries)
+        return {'parked': parked, 'promoted': self.promoted, 'expired': self.expired, 'ttl': self.ttl}
+
+class SFTPChannelPool:
+    """SFTP channels over one SSH transport with checkout/return semantics.
+
+    The channel opened at login is reserved as the interactive lane for
+    browsing; bulk transfers check out their own channels so a listing never
+    queues behind an in-flight ``get``/``put``.
+    """
+
+    def __init__(self, ssh, interactive=None, max_channels=SFTP_POOL_MAX_CHANNELS):
+        self.ssh = ssh
+        self.max_channels = max_channels
+        self.interactive = interactive or self._open()
+        self.interactive_lock = threading.Lock()
+        self.idle = []
+        self.created = 0
+        self.in_use = 0
+        self.waits = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def _open(self):
+        sftp = self.ssh.open_sftp()
+        sftp.get_channel().settimeout(300)  # 5 minute timeout for operations
+        return sftp
+
+    @staticmethod
+    def _is_open(sftp):
+        channel = sftp.get_channel()
+        return channel is not None and not channel.closed
+
+    def checkout(self):
+        """Take a bulk channel, opening one if under the limit or waiting for a return"""
+        with self.cond:
+            while True:
+                if self.closed:
+                    raise Exception("SFTP channel pool is closed")
+                while self.idle:
+                    sftp = self.idle.pop()
+                    if self._is_open(sftp):
+                        self.in_use += 1
+                        return sftp
+                    self.created -= 1
+                if self.created < self.max_channels:
+                    self.created += 1
+                    break
+                if not self.created:
+                    # No bulk channel exists or can be opened, so none will ever be returned
+                    return self.interactive
+                self.waits += 1
+                self.cond.wait()
+
+        try:
+            sftp = self._open()
+        except Exception as e:
+            with self.cond:
+                self.created -= 1
+                # The server may cap sessions per connection (MaxSessions):
+                # stop growing the pool and share the interactive lane instead
+                self.max_channels = max(self.created, 0)
+                self.cond.notify()
+            logger.warning(f"Could not open extra SFTP channel, using interactive lane: {e}")
+            return self.interactive
+
+        with self.cond:
+            self.in_use += 1
+        return sftp
+
+    def checkout_if_quiet(self):
+        """Take a bulk channel only while no bulk work is running, or None.
+
+        For low-priority work such as listing prefetch: it never waits,
+        never falls back to the interactive lane and never delays a transfer.
+        """
+        with self.cond:
+            if self.closed or self.in_use:
+                return None
+            while self.idle:
+                sftp = self.idle.pop()
+                if self._is_open(sftp):
+                    self.in_use += 1
+                    return sftp
+                self.created -= 1
+            if self.created >= self.max_channels:
+                return None
+            self.created += 1
+        
+        try:
+            sftp = self._open()
+        except Exception as e:
+            with self.cond:
+                self.created -= 1
+                self.cond.notify()
+            logger.debug(f"No spare SFTP channel for background work: {e}")
+            return None
+        with self.cond:
+            self.in_use += 1
+        return sftp
+
+    def checkin(self, sftp):
+        """Return a bulk channel to the pool"""
+        if sftp is self.interactive:
+            return
+        with self.cond:
+            self.in_use -= 1
+            if self.closed or not self._is_open(sftp):
+                self.created -= 1
+                self._close_quietly(sftp)
+            else:
+                self.idle.append(sftp)
+            self.cond.notify()
+
+    @contextmanager
+    def channel(self):
+        """Context manager around checkout/checkin"""
+        sftp = self.checkout()
+        try:
+            yield sftp
+        finally:
+            self.checkin(sftp)
+
+    @contextmanager
+    def interactive_channel(self):
+        """Reserved lane for short interactive operations such as listings"""
+        with self.interactive_lock:
+            if not self._is_open(self.interactive):
+                self.interactive = self._open()
+            yield self.interactive
+
+    def close(self):
+        """Close every channel in the pool"""
+        with self.cond:
+            self.closed = True
+            channels = self.idle + [self.interactive]
+            self.idle = []
+            self.cond.notify_all()
+        for sftp in channels:
+            self._close_quietly(sftp)
+
+    @staticmethod
+    def _close_quietly(sftp):
+        try:
+            sftp.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        """Channel counts for status reporting"""
+        with self.cond:
+            return {
+                'bulk_open': self.created,
+                'bulk_in_use': self.in_use,
+                'bulk_idle': len(self.idle),
+                'max_bulk': self.max_channels,
+                'waits': self.waits
+            }
+
+class RemoteCapabilityCache:
+    """On-disk cache of remote OS and capabilities keyed by host-key fingerprint"""
+
+    def __init__(self, path=REMOTE_CAPABILITIES_FILE, ttl=REMOTE_CAPABILITIES_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    @staticmethod
+    def host_key_fingerprint(transport):
+        """SHA256 fingerprint of the server's host key, as printed by ssh-keygen"""
+        key = transport.get_remote_server_key()
+        digest = base64.b64encode(hashlib.sha256(key.asbytes()).digest()).decode().rstrip('=')
+        return f"{key.get_name()} SHA256:{digest}"
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading remote capability cache: {e}")
+        return {}
+
+    def get(self, fingerprint):
+        """Cached profile for a host key, or None when missing or expired"""
+        with self.lock:
+            entry = self.entries.get(fingerprint)
+        if not entry or time.time() - entry.get('detected_at', 0) > self.ttl:
+            return None
+        return {'remote_os': entry['remote_os'], 'capabilities': entry.get('capabilities', {})}
+
+    def put(self, fingerprint, profile):
+        """Store a profile and write the cache file"""
+        with self.lock:
+            self.entries[fingerprint] = dict(profile, detected_at=time.time())
+            try:
+                with open(self.path, 'w') as f:
+                    json.dump(self.entries, f, indent=2)
+            except Exception as e:
+                logger.error(f"Error saving remote capability cache: {e}")
+
+class PrivateKeyCache:
+    """Parsed private keys, keyed by a fingerprint of the key text and LRU-bounded.
+
+    Keys are parsed straight from memory. The key type that parsed last is
+    tried first next time, and each parsed ``PKey`` is kept so reconnects
+    with the same key skip parsing altogether.
+    """
+
+    KEY_TYPES = [
+        (paramiko.RSAKey, "RSA"),
+        (paramiko.Ed25519Key, "Ed25519"),
+        (paramiko.ECDSAKey, "ECDSA"),
+        (paramiko.DSSKey, "DSS")
+    ]
+
+    def __init__(self, max_keys=PRIVATE_KEY_CACHE_SIZE):
+        self.max_keys = max_keys
+        self.keys = OrderedDict()
+        self.lock = threading.Lock()
+        self.last_type = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(key_data):
+        return hashlib.sha256(key_data.encode()).hexdigest()
+
+    def _parse_order(self, key_data):
+        # PEM headers name the key type; OpenSSH-format keys don't, so try the last winner first
+        header_hints = {'BEGIN RSA': 'RSA', 'BEGIN EC ': 'ECDSA', 'BEGIN DSA': 'DSS'}
+        preferred = next((key_type for marker, key_type in header_hints.items() if marker in key_data), self.last_type)
+        return sorted(self.KEY_TYPES, key=lambda entry: entry[1] != preferred)
+
+    def load(self, key_data):
+        """Return a parsed PKey for key_data, parsing it only on a cache miss"""
+        fingerprint = self.fingerprint(key_data)
+        with self.lock:
+            private_key = self.keys.get(fingerprint)
+            if private_key is not None:
+                self.keys.move_to_end(fingerprint)
+                self.hits += 1
+                return private_key
+            self.misses += 1
+        
+        key_errors = []
+        for key_class, key_type in self._parse_order(key_data):
+            try:
+                private_key = key_class.from_private_key(io.StringIO(key_data))
+            except paramiko.PasswordRequiredException:
+                key_errors.append(f"{key_type} key requires passphrase (not supported)")
+                continue
+            except paramiko.SSHException as e:
+                key_errors.append(f"{key_type} key format error: {str(e)}")
+                continue
+            except Exception as e:
+                key_errors.append(f"{key_type} key error: {str(e)}")
+                continue
+            
+            logger.info(f"Successfully loaded {key_type} key")
+            with self.lock:
+                self.last_type = key_type
+                self.keys[fingerprint] = private_key
+                while len(self.keys) > self.max_keys:
+                    self.keys.popitem(last=False)
+            return private_key
+        
+        raise Exception(f"Failed to load SSH key. Tried formats: {', '.join(kt[1] for kt in self.KEY_TYPES)}. Errors: {'; '.join(key_errors)}")
+
+    def stats(self):
+        """Cache counters"""
+        with self.lock:
+            return {'cached': len(self.keys), 'max_keys': self.max_keys, 'hits': self.hits,
+                    'misses': self.misses, 'last_type': self.last_type}
+
+class SSHAlgorithmProfiles:
+    """Per-host cipher, MAC and key exchange preferences.
+
+    Each host uses one of ``SSH_ALGORITHM_PROFILES`` and may pin the cipher
+    its last throughput benchmark found fastest. Settings persist to disk.
+    """
+
+    KINDS = ('ciphers', 'macs', 'kex')
+
+    def __init__(self, path=SSH_ALGORITHMS_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.hosts = self._load()
+
+    @staticmethod
+    def supported():
+        """Algorithms the installed paramiko implements, in its default order"""
+        return {
+            'ciphers': list(paramiko.Transport._preferred_ciphers),
+            'macs': list(paramiko.Transport._preferred_macs),
+            'kex': list(paramiko.Transport._preferred_kex)
+        }
+
+    @staticmethod
+    def host_key(host, port):
+        return f"{host}:{int(port)}"
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading SSH algorithm settings: {e}")
+        return {}
+
+    def _save(self):
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(self.hosts, f, indent=2)
+        except Exception as e:
+            logger.error(f"Error saving SSH algorithm settings: {e}")
+
+    def settings(self, host, port):
+        """Stored profile, pinned cipher and last benchmark for a host"""
+        with self.lock:
+            settings = dict(self.hosts.get(self.host_key(host, port), {}))
+        settings.setdefault('profile', 'default')
+        return settings
+
+    def resolve(self, host, port):
+        """Effective algorithm preference order for a host"""
+        settings = self.settings(host, port)
+        profile = SSH_ALGORITHM_PROFILES.get(settings['profile'], {})
+        supported = self.supported()
+        resolved = {}
+        for kind in self.KINDS:
+            preferred = [name for name in profile.get(kind, []) if name in supported[kind]]
+            resolved[kind] = preferred or supported[kind]
+        pinned = settings.get('cipher')
+        if pinned in supported['ciphers']:
+            resolved['ciphers'] = [pinned] + [name for name in resolved['ciphers'] if name != pinned]
+        return resolved
+
+    def set_profile(self, host, port, profile):
+        """Select a profile for a host; a pinned benchmark cipher is kept"""
+        with self.lock:
+            self.hosts.setdefault(self.host_key(host, port), {})['profile'] = profile
+            self._save()
+
+    def record_benchmark(self, host, port, results):
+        """Store benchmark results and pin the fastest cipher; returns it or None"""
+        measured = [result for result in results if 'mbps' in result]
+        if not measured:
+            return None
+        fastest = max(measured, key=lambda result: result['mbps'])['cipher']
+        with self.lock:
+            settings = self.hosts.setdefault(self.host_key(host, port), {})
+            settings['cipher'] = fastest
+            settings['benchmark'] = {'results': results, 'measured_at': datetime.now().isoformat()}
+            self._save()
+        return fastest
+
+    @classmethod
+    def apply(cls, transport, algorithms):
+        """Set a transport's algorithm preference order before key exchange"""
+        options = transport.get_security_options()
+        options.ciphers = tuple(algorithms['ciphers'])
+        options.digests = tuple(algorithms['macs'])
+        options.kex = tuple(algorithms['kex'])
+
+class PeriodicScheduler:
+    """One heap-ordered timer thread for recurring background jobs.
+
+    Each job is a callable that returns the delay until its next run, or None
+    to stop. Due jobs are handed to a small bounded worker pool, so hundreds of
+    sessions cost a single sleeping thread plus at most ``max_workers`` probes
+    in flight, and a slow probe only delays the jobs queued behind it.
+    """
+
+    def __init__(self, max_workers=SCHEDULER_MAX_WORKERS, late_threshold=SCHEDULER_LATE_THRESHOLD):
+        self.max_workers = max_workers
+        self.late_threshold = late_threshold
+        self.jobs = {}
+        self.heap = []
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.runs = 0
+        self.late_runs = 0
+        self.max_lateness = 0.0
+        self.executor = None
+        self._thread = None
+
+    def schedule(self, name, fn, delay):
+        """Run fn after delay seconds, replacing any job with the same name"""
+        with self.cond:
+            self.seq += 1
+            job = {'fn': fn, 'due': time.time() + delay, 'delay': delay, 'seq': self.seq, 'running': False}
+            self.jobs[name] = job
+            heapq.heappush(self.heap, (job['due'], job['seq'], name))
+            self.cond.notify()
+        self._ensure_thread()
+
+    def cancel(self, name):
+        """Drop a job; a run already in progress finishes but is not rescheduled"""
+        with self.cond:
+            return self.jobs.pop(name, None) is not None
+
+    def _ensure_thread(self):
+        with self.cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scheduler')
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def _is_current(self, entry):
+        job = self.jobs.get(entry[2])
+        return job is not None and job['seq'] == entry[1]
+
+    def _loop(self):
+        while True:
+            with self.cond:
+                while True:
+                    while self.heap and not self._is_current(self.heap[0]):
+                        heapq.heappop(self.heap)
+                    now = time.time()
+                    if self.heap and self.heap[0][0] <= now:
+                        break
+                    self.cond.wait(self.heap[0][0] - now if self.heap else None)
+                due, seq, name = heapq.heappop(self.heap)
+            self.executor.submit(self._run, name, seq, due)
+
+    def _run(self, name, seq, due):
+        with self.cond:
+            job = self.jobs.get(name)
+            if not job or job['seq'] != seq:
+                return
+            job['running'] = True
+            lateness = time.time() - due
+            self.runs += 1
+            self.max_lateness = max(self.max_lateness, lateness)
+            if lateness > self.late_threshold:
+                self.late_runs += 1
+        delay = job['delay']
+        try:
+            delay = job['fn']()
+        except Exception as e:
+            logger.error(f"Scheduled job {name} failed: {e}")
+        with self.cond:
+            job['running'] = False
+            if self.jobs.get(name) is not job:
+                return
+            if delay is None:
+                del self.jobs[name]
+                return
+            job['due'] = time.time() + delay
+            job['delay'] = delay
+            heapq.heappush(self.heap, (job['due'], job['seq'], name))
+            self.cond.notify()
+
+    def stats(self):
+        """How many jobs are scheduled, due, running and late"""
+        now = time.time()
+        with self.cond:
+            running = sum(1 for job in self.jobs.values() if job['running'])
+            waiting = [now - job['due'] for job in self.jobs.values() if not job['running'] and job['due'] <= now]
+            next_due = min((job['due'] for job in self.jobs.values() if not job['running']), default=None)
+            return {
+                'scheduled': len(self.jobs),
+                'due': len(waiting),
+                'running': running,
+                'late': sum(1 for lateness in waiting if lateness > self.late_threshold),
+                'max_workers': self.max_workers,
+                'next_due_in': round(max(0.0, next_due - now), 1) if next_due else None,
+                'runs': self.runs,
+                'late_runs': self.late_runs,
+                'max_lateness': round(self.max_lateness, 3)
+            }
+
+class RemoteCommandRunner:
+    """Long-lived ``sh`` on one exec channel that runs framed commands.
+
+    Each command runs in a subshell with stdin from /dev/null and is followed
+    by an end marker carrying a per-command token and the exit code (the
+    token is echoed on stderr too). Many commands share one channel, and a
+    batch is written in one go and its results read back in order.
+    """
+
+    MARKER = '@@SCP-END'
+
+    def __init__(self, ssh, timeout=REMOTE_COMMAND_TIMEOUT):
+        self.ssh = ssh
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.channel = None
+        self.out = bytearray()
+        self.err = bytearray()
+        self.commands = 0
+        self.batches = 0
+        self.channels_opened = 0
+
+    def _ensure_channel(self):
+        if self.channel is not None and not self.channel.closed and not self.channel.exit_status_ready():
+            return
+        self.close()
+        channel = self.ssh.get_transport().open_session()
+        channel.settimeout(self.timeout)
+        channel.exec_command('exec sh')
+        self.channel = channel
+        self.out = bytearray()
+        self.err = bytearray()
+        self.channels_opened += 1
+
+    def _frame(self, command, token):
+        # The newline before ")" keeps a trailing comment from swallowing the subshell end
+        return (f"( {command}\n) </dev/null; printf '\\n{self.MARKER} {token} %d\\n' $?; "
+                f"printf '\\n{self.MARKER} {token}\\n' >&2\n")
+
+    def _read_available(self, wait):
+        select.select([self.channel], [], [], wait)
+        while self.channel.recv_ready():
+            self.out += self.channel.recv(65536)
+        while self.channel.recv_stderr_ready():
+            self.err += self.channel.recv_stderr(65536)
+
+    def _collect(self, token, deadline):
+        out_marker = f"\n{self.MARKER} {token} ".encode()
+        err_marker = f"\n{self.MARKER} {token}\n".encode()
+        while True:
+            out_at = self.out.find(out_marker)
+            line_end = self.out.find(b'\n', out_at + len(out_marker)) if out_at >= 0 else -1
+            err_at = self.err.find(err_marker)
+            if line_end >= 0 and err_at >= 0:
+                result = {
+                    'exit_code': int(self.out[out_at + len(out_marker):line_end]),
+                    'stdout': bytes(self.out[:out_at]).decode(errors='replace'),
+                    'stderr': bytes(self.err[:err_at]).decode(errors='replace')
+                }
+                del self.out[:line_end + 1]
+                del self.err[:err_at + len(err_marker)]
+                return result
+            if self.channel.exit_status_ready() and not self.channel.recv_ready() and not self.channel.recv_stderr_ready():
+                raise Exception("Remote shell exited unexpectedly")
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise Exception(f"Remote command timed out after {self.timeout}s")
+            self._read_available(min(remaining, 1.0))
+
+    def run_many(self, commands):
+        """Run commands in order over the shared channel; one result dict per command"""
+        results = []
+        with self.lock:
+            try:
+                self._ensure_channel()
+                for start in range(0, len(commands), REMOTE_COMMAND_BATCH):
+                    batch = commands[start:start + REMOTE_COMMAND_BATCH]
+                    tokens = [uuid.uuid4().hex for _ in batch]
+                    self.channel.sendall(''.join(self._frame(command, token) for command, token in zip(batch, tokens)).encode())
+                    deadline = time.time() + self.timeout
+                    for token in tokens:
+                        results.append(self._collect(token, deadline))
+                    self.batches += 1
+                self.commands += len(commands)
+                return results
+            except Exception:
+                # The shell's position in the stream is unknown now; start fresh next time
+                self.close()
+                raise
+
+    def run(self, command):
+        """Run one command; returns exit_code, stdout and stderr"""
+        return self.run_many([command])[0]
+
+    def close(self):
+        """Close the shell channel"""
+        if self.channel is not None:
+            try:
+                self.channel.close()
+            except Exception:
+                pass
+            self.channel = None
+
+    def stats(self):
+        """Command counters"""
+        return {
+            'open': self.channel is not None and not self.channel.closed,
+            'commands': self.commands,
+            'batches': self.batches,
+            'channels_opened': self.channels_opened
+        }
+
+class SFTPPipeline:
+    """Sends many SFTP requests on one channel before reading the replies.
+
+    Replies are matched back to their requests by number, so a batch of
+    removes or a level of directory listings costs about one round trip
+    instead of one per item.
+    """
+
+    def __init__(self, sftp, window=SFTP_PIPELINE_WINDOW):
+        self.sftp = sftp
+        self.window = window
+        self.responses = {}
+
+    def _async_response(self, t, msg, num):
+        # Called by paramiko for replies to requests tagged with this object
+        self.responses[num] = (t, msg)
+
+    def run(self, requests):
+        """Send ``(command, *args)`` requests; returns ``(type, msg)`` replies in request order"""
+        numbers = []
+        for command, *args in requests:
+            while len(numbers) - len(self.responses) >= self.window:
+                self.sftp._read_response()
+            numbers.append(self.sftp._async_request(self, command, *args))
+        while len(self.responses) < len(numbers):
+            self.sftp._read_response()
+        return [self.responses.pop(num) for num in numbers]
+
+    def error(self, reply):
+        """The IOError/EOFError a status reply carries, or None for success"""
+        t, msg = reply
+        if t != paramiko.sftp.CMD_STATUS:
+            return None
+        try:
+            self.sftp._convert_status(msg)
+            return None
+        except (IOError, EOFError) as e:
+            return e
+
+    def _attrs_many(self, command, paths):
+        results = []
+        for reply in self.run([(command, path) for path in paths]):
+            t, msg = reply
+            if t == paramiko.sftp.CMD_ATTRS:
+                results.append(paramiko.SFTPAttributes._from_msg(msg))
+            else:
+                results.append(self.error(reply) or IOError("Unexpected reply to stat"))
+        return results
+
+    def lstat_many(self, paths):
+        """lstat every path; returns SFTPAttributes or an exception per path"""
+        return self._attrs_many(paramiko.sftp.CMD_LSTAT, paths)
+
+    def stat_many(self, paths):
+        """stat every path, following symlinks; returns SFTPAttributes or an exception per path"""
+        return self._attrs_many(paramiko.sftp.CMD_STAT, paths)
+
+    def list_many(self, directories):
+        """List several directories at once; returns ``(entries, errors)`` keyed by directory"""
+        entries = {directory: [] for directory in directories}
+        errors = {}
+        handles = {}
+        for directory, reply in zip(directories, self.run([(paramiko.sftp.CMD_OPENDIR, d) for d in directories])):
+            if reply[0] == paramiko.sftp.CMD_HANDLE:
+                handles[directory] = reply[1].get_binary()
+            else:
+                errors[directory] = self.error(reply) or IOError("Unexpected reply to opendir")
+        
+        reading = dict(handles)
+        while reading:
+            replies = self.run([(paramiko.sftp.CMD_READDIR, handle) for handle in reading.values()])
+            for directory, (t, msg) in zip(list(reading), replies):
+                if t != paramiko.sftp.CMD_NAME:
+                    # EOF ends the listing; anything else is a read error
+                    error = self.error((t, msg))
+                    if not isinstance(error, EOFError):
+                        errors[directory] = error or IOError("Unexpected reply to readdir")
+                    del reading[directory]
+                    continue
+                for _ in range(msg.get_int()):
+                    filename = msg.get_text()
+                    longname = msg.get_text()
+                    attr = paramiko.SFTPAttributes._from_msg(msg, filename, longname)
+                    if filename not in ('.', '..'):
+                        entries[directory].append(attr)
+        
+        self.run([(paramiko.sftp.CMD_CLOSE, handle) for handle in handles.values()])
+        return entries, errors
+
+    def iter_dir(self, path, read_ahead=SFTP_READDIR_AHEAD):
+        """Yield a directory's entries one READDIR reply at a time.
+
+        ``read_ahead`` READDIR requests stay in flight on the handle, so the
+        next batches are on their way while the caller handles this one.
+        Stopping early still reads the outstanding replies and closes the handle.
+        """
+        reply = self.run([(paramiko.sftp.CMD_OPENDIR, path)])[0]
+        if reply[0] != paramiko.sftp.CMD_HANDLE:
+            raise self.error(reply) or IOError("Unexpected reply to opendir")
+        handle = reply[1].get_binary()
+        
+        pending = []
+        try:
+            while True:
+                while len(pending) < read_ahead:
+                    pending.append(self.sftp._async_request(self, paramiko.sftp.CMD_READDIR, handle))
+                num = pending.pop(0)
+                while num not in self.responses:
+                    self.sftp._read_response()
+                t, msg = self.responses.pop(num)
+                if t != paramiko.sftp.CMD_NAME:
+                    error = self.error((t, msg))
+                    if isinstance(error, EOFError):
+                        return
+                    raise error or IOError("Unexpected reply to readdir")
+                batch = []
+                for _ in range(msg.get_int()):
+                    filename = msg.get_text()
+                    longname = msg.get_text()
+                    attr = paramiko.SFTPAttributes._from_msg(msg, filename, longname)
+                    if filename not in ('.', '..'):
+                        batch.append(attr)
+                if batch:
+                    yield batch
+        finally:
+            for num in pending:
+                while num not in self.responses:
+                    self.sftp._read_response()
+                self.responses.pop(num)
+            self.run([(paramiko.sftp.CMD_CLOSE, handle)])
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations in seconds"""
+
+    def __init__(self, bounds=RECONNECT_LATENCY_BUCKETS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def stats(self):
+        """Bucket counts keyed by upper bound ("+Inf" for the overflow bucket)"""
+        with self.lock:
+            count = sum(self.counts)
+            labels = [str(bound) for bound in self.bounds] + ['+Inf']
+            return {
+                'buckets': dict(zip(labels, self.counts)),
+                'count': count,
+                'mean': round(self.total / count, 3) if count else 0.0,
+                'max': round(self.max, 3)
+            }
+
+class ResumableSFTP:
+    """Bulk SFTP channel for a session that survives a reconnect.
+
+    Calls that fail because the session's transport dropped wait for the
+    background reconnector, move to a channel on the new transport and retry,
+    so a running transfer pauses instead of failing.
+    """
+
+    def __init__(self, manager, session_id):
+        self.manager = manager
+        self.session_id = session_id
+        self.pool = None
+        self.sftp = None
+        self.resumed = 0
+        self._checkout()
+
+    def _checkout(self):
+        conn = self.manager.connections.get(self.session_id)
+        if not conn:
+            raise Exception("No connection found")
+        self.pool = conn['sftp_pool']
+        self.sftp = self.pool.checkout()
+
+    def close(self):
+        """Return the current channel to its pool"""
+        self.pool.checkin(self.sftp)
+
+    def __getattr__(self, name):
+        if not callable(getattr(self.sftp, name)):
+            return getattr(self.sftp, name)
+
+        def call(*args, **kwargs):
+            while True:
+                try:
+                    return getattr(self.sftp, name)(*args, **kwargs)
+                except Exception:
+                    if not self.manager.transport_lost(self.session_id):
+                        raise
+                    logger.warning(f"Transfer paused for session {self.session_id}: waiting for reconnect")
+                    if not self.manager.wait_for_reconnect(self.session_id, RECONNECT_TRANSFER_WAIT):
+                        raise
+                    self.pool.checkin(self.sftp)
+                    self._checkout()
+                    self.resumed += 1
+                    logger.info(f"Transfer resumed on new connection for session {self.session_id}")
+        return call
+
+def _process_rss_mb():
+    """Resident memory of this process in MB, or None where it can't be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except Exception:
+        return None
+
+class FileOperationBatch:
+    """Ordered file operations for both panels, run in dependency waves.
+
+    An operation depends on every earlier operation on the same panel that
+    touches the same path or a parent or child of it. Independent operations
+    share a wave, and a wave's remote operations of one kind go to the server
+    as one pipelined batch. Operations whose dependency failed are skipped.
+    """
+
+    FIELDS = {
+        'mkdir': ('path',),
+        'rename': ('old_path', 'new_path'),
+        'delete': ('path',),
+        'chmod': ('path',),
+        'copy': ('source', 'destination')
+    }
+
+    def __init__(self, manager, conn, operations, stop_on_error=False):
+        self.manager = manager
+        self.conn = conn
+        self.stop_on_error = stop_on_error
+        self.operations = [self._parse(index, operation) for index, operation in enumerate(operations)]
+        self.results = [None] * len(self.operations)
+        self.waves = self._plan()
+
+    def _parse(self, index, operation):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        parsed = {'index': index, 'op': op, 'side': None, 'paths': [], 'mode': None, 'error': None}
+        if op not in self.FIELDS:
+            parsed['error'] = f"Unknown operation: {op}"
+            return parsed
+        
+        side = operation.get('side')
+        parsed['side'] = side
+        if side not in ('local', 'remote'):
+            parsed['error'] = "side must be 'local' or 'remote'"
+            return parsed
+        
+        paths = [operation.get(field) for field in self.FIELDS[op]]
+        if not all(isinstance(path, str) and path for path in paths):
+            parsed['error'] = f"{op} requires {', '.join(self.FIELDS[op])}"
+            return parsed
+        parsed['paths'] = paths
+        
+        if op == 'chmod':
+            try:
+                parsed['mode'] = int(str(operation.get('mode')).replace('0o', ''), 8)
+                if not 0 <= parsed['mode'] <= 0o7777:
+                    raise ValueError
+            except ValueError:
+                parsed['error'] = "chmod requires an octal mode such as \"755\""
+                return parsed
+        
+        if side == 'remote':
+            for path in paths:
+                validation = validate_remote_operation(path, op.capitalize())
+                if not validation['allowed']:
+                    parsed['error'] = validation['error']
+                    break
+        return parsed
+
+    @staticmethod
+    def _overlaps(a, b):
+        a = a.replace('\\', '/').rstrip('/') or '/'
+        b = b.replace('\\', '/').rstrip('/') or '/'
+        return a == b or a.startswith(b.rstrip('/') + '/') or b.startswith(a.rstrip('/') + '/')
+
+    def _plan(self):
+        """Assign each operation to the wave after the latest operation it depends on"""
+        wave_of = []
+        for operation in self.operations:
+            operation['depends_on'] = [
+                earlier['index'] for earlier in self.operations[:operation['index']]
+                if earlier['side'] == operation['side'] and any(
+                    self._overlaps(a, b) for a in earlier['paths'] for b in operation['paths'])
+            ]
+            wave_of.append(1 + max((wave_of[index] for index in operation['depends_on']), default=-1))
+        waves = [[] for _ in range(max(wave_of, default=-1) + 1)]
+        for index, wave in enumerate(wave_of):
+            waves[wave].append(index)
+        return waves
+
+    def _finish(self, operation, error=None, skipped=False):
+        result = {'index': operation['index'], 'op': operation['op'], 'side': operation['side'], 'success': error is None}
+        if error is not None:
+            result['error'] = error
+        if skipped:
+            result['skipped'] = True
+        self.results[operation['index']] = result
+
+    def _run_local(self, operation):
+        """Run one local operation with the same checks as the single-item endpoints"""
+        op, paths = operation['op'], operation['paths']
+        try:
+            if op == 'mkdir':
+                if os.path.exists(paths[0]):
+                    return 'Folder already exists'
+                os.makedirs(paths[0])
+            elif op == 'rename':
+                old_path, new_path = paths
+                if not os.path.exists(old_path):
+                    return 'Source file/folder does not exist'
+                if os.path.exists(new_path):
+                    return 'Destination already exists'
+                os.rename(old_path, new_path)
+            elif op == 'delete':
+                if not os.path.lexists(paths[0]):
+                    return 'File does not exist'
+                if os.path.isdir(paths[0]) and not os.path.islink(paths[0]):
+                    shutil.rmtree(paths[0])
+                else:
+                    os.remove(paths[0])
+            elif op == 'chmod':
+                os.chmod(paths[0], operation['mode'])
+            elif op == 'copy':
+                source, destination = paths
+                if os.path.exists(destination):
+                    return 'Destination already exists'
+                if os.path.isdir(source):
+                    shutil.copytree(source, destination, symlinks=True)
+                else:
+                    shutil.copy2(source, destination)
+            return None
+        except PermissionError as e:
+            return f'Permission denied: {str(e)}'
+        except Exception as e:
+            return str(e)
+
+    def _run_remote(self, op, operations):
+        """Run one wave's remote operations of one kind as a single batch; returns an error or None each"""
+        conn = self.conn
+        paths = [operation['paths'] for operation in operations]
+        if op == 'mkdir':
+            return self.manager.make_remote_dirs(conn, [path for path, in paths])
+        if op == 'rename':
+            return self.manager.rename_remote_many(conn, [tuple(pair) for pair in paths])
+        if op == 'delete':
+            failed = self.manager.delete_remote_paths(conn, [path for path, in paths])
+            return [failed.get(path) for path, in paths]
+        if op == 'chmod':
+            return self.manager.chmod_remote_many(conn, [(operation['paths'][0], operation['mode']) for operation in operations])
+        return self.manager.copy_remote_many(conn, [tuple(pair) for pair in paths])
+
+    def run(self):
+        """Execute every wave in order; returns one result per operation, in request order"""
+        for wave in self.waves:
+            ready = []
+            for index in wave:
+                operation = self.operations[index]
+                failed_dependency = next((d for d in operation['depends_on'] if not self.results[d]['success']), None)
+                if operation['error']:
+                    self._finish(operation, operation['error'])
+                elif self.stop_on_error and any(result and not result['success'] for result in self.results):
+                    self._finish(operation, 'Skipped after an earlier operation failed', skipped=True)
+                elif failed_dependency is not None:
+                    self._finish(operation, f'Skipped because operation {failed_dependency} failed', skipped=True)
+                elif operation['side'] == 'remote' and self.conn is None:
+                    self._finish(operation, 'Not connected')
+                else:
+                    ready.append(operation)
+            
+            for operation in ready:
+                if operation['side'] == 'local':
+                    self._finish(operation, self._run_local(operation))
+            
+            groups = OrderedDict()
+            for operation in ready:
+                if operation['side'] == 'remote':
+                    groups.setdefault(operation['op'], []).append(operation)
+            for op, operations in groups.items():
+                try:
+                    errors = self._run_remote(op, operations)
+                except Exception as e:
+                    logger.error(f"Batch {op} failed: {e}")
+                    errors = [str(e)] * len(operations)
+                for operation, error in zip(operations, errors):
+                    self._finish(operation, error)
+        return self.results
+
+class DeletionJob:
+    """A background delete of local or remote trees.
+
+    Progress goes into the same progress dict and per-file table that
+    transfers use (one row per requested path), so the transfer progress,
+    per-file and cancel endpoints work for deletions as well.
+    """
+
+    def __init__(self, session_id, side, paths, table):
+        self.session_id = session_id
+        self.side = side
+        self.paths = list(paths)
+        self.table = table
+        self.job_id = table.job_id
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+        self.rows = [table.add(path) for path in self.paths]
+        self.row = None
+        self.row_bytes = 0
+        self.row_reported = 0.0
+        self.errors = []
+        self.state = 'running'
+        self.finished_at = None
+        self.progress = {
+            'job_id': self.job_id,
+            'operation': 'delete',
+            'side': side,
+            'total_size': 0,
+            'transferred_size': 0,
+            'current_file': 'Starting deletion...',
+            'start_time': datetime.now(),
+            'files_completed': 0,
+            'dirs_completed': 0,
+            'files_failed': 0,
+            'dirs_failed': 0,
+            'total_files': 0,
+            'total_dirs': 0,
+            'total_items': len(self.paths),
+            'items_completed': 0,
+            'entries_removed': 0,
+            'bytes_freed': 0
+        }
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def begin(self, index):
+        """Start deleting the index-th requested path"""
+        with self.lock:
+            self.row = self.rows[index]
+            self.row_bytes = 0
+            self.progress['current_file'] = f"Deleting {os.path.basename(self.paths[index].rstrip('/')) or self.paths[index]} ({index + 1}/{len(self.paths)})"
+        self.table.start(self.row)
+
+    def removed(self, nbytes=0, is_dir=False):
+        """Count one removed entry (called from worker threads)"""
+        with self.lock:
+            self.progress['dirs_completed' if is_dir else 'files_completed'] += 1
+            self.progress['entries_removed'] += 1
+            self.progress['bytes_freed'] += nbytes
+            self.progress['transferred_size'] = self.progress['bytes_freed']
+            self.row_bytes += nbytes
+            now = time.time()
+            if now - self.row_reported < DELETE_PROGRESS_INTERVAL:
+                return
+            self.row_reported = now
+            row, row_bytes = self.row, self.row_bytes
+        self.table.update(row, row_bytes)
+
+    def end(self, errors):
+        """Finish the current path's row"""
+        with self.lock:
+            self.errors.extend(errors)
+            self.progress['items_completed'] += 1
+            if errors:
+                self.progress['files_failed'] += len(errors)
+            row, row_bytes = self.row, self.row_bytes
+        self.table.update(row, row_bytes)
+        self.table.finish(row, success=not errors)
+
+    def status(self):
+        """Job summary for the status endpoint"""
+        with self.lock:
+            end = self.finished_at or time.time()
+            return {
+                'job_id': self.job_id,
+                'side': self.side,
+                'state': self.state,
+                'items_completed': self.progress['items_completed'],
+                'total_items': len(self.paths),
+                'entries_removed': self.progress['entries_removed'],
+                'files_removed': self.progress['files_completed'],
+                'dirs_removed': self.progress['dirs_completed'],
+                'bytes_freed': self.progress['bytes_freed'],
+                'elapsed_seconds': round(end - self.progress['start_time'].timestamp(), 2),
+                'error_count': len(self.errors),
+                'errors': self.errors[:20]
+            }
+
+class ListingCache:
+    """Per-connection LRU cache of formatted remote directory listings.
+
+    Entries expire after ``ttl`` seconds; changes made through this app
+    invalidate the listings they affect straight away.
+    """
+
+    def __init__(self, ttl=LISTING_CACHE_TTL, max_entries=LISTING_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.subfolders = {}
+        self.prefetched = set()
+        self.lock = threading.Lock()
+        # Bumped on every invalidation so a read that raced a change is not cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.prefetch_hits = 0
+
+    @staticmethod
+    def _key(path):
+        return path.replace('\\', '/').rstrip('/') or '/'
+
+    def get(self, path):
+        """(stored_at, listing) for a path, or None when missing or expired"""
+        key = self._key(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            if key in self.prefetched:
+                self.prefetched.discard(key)
+                self.prefetch_hits += 1
+            return entry
+
+    def fresh(self, path):
+        """Whether a path has an unexpired listing, without counting a lookup"""
+        with self.lock:
+            entry = self.entries.get(self._key(path))
+            return entry is not None and time.time() - entry[0] <= self.ttl
+
+    def subfolders_of(self, path):
+        """(path, directory size) of the subfolders in a cached listing"""
+        with self.lock:
+            return list(self.subfolders.get(self._key(path), ()))
+
+    def _drop(self, key):
+        del self.entries[key]
+        self.subfolders.pop(key, None)
+        self.prefetched.discard(key)
+
+    def put(self, path, listing, subfolders=(), generation=None, prefetched=False):
+        """Cache a listing; skipped if an invalidation happened since ``generation`` was read"""
+        key = self._key(path)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self.entries[key] = (time.time(), listing)
+            self.entries.move_to_end(key)
+            self.subfolders[key] = list(subfolders)
+            if prefetched:
+                self.prefetched.add(key)
+            else:
+                self.prefetched.discard(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+            return True
+
+    def invalidate(self, path, ancestors=False):
+        """Drop the listing containing path, path's own listing and everything below it.
+
+        With ``ancestors`` every listing above path goes too, for ``mkdir -p``
+        which may have created several levels.
+        """
+        key = self._key(path)
+        parent = key.rsplit('/', 1)[0] or '/'
+        prefix = key.rstrip('/') + '/'
+        with self.lock:
+            doomed = [cached for cached in self.entries
+                      if cached in (key, parent) or cached.startswith(prefix)
+                      or (ancestors and key.startswith(cached.rstrip('/') + '/'))]
+            for cached in doomed:
+                self._drop(cached)
+            self.invalidations += len(doomed)
+            self.generation += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'prefetched_entries': len(self.prefetched),
+                'prefetch_hits': self.prefetch_hits
+            }
+
+class ListingPager:
+    """Sorted, filtered views of directory listings, served a page at a time.
+
+    A view keeps the listing plus a compact array of item indexes in sorted
+    order, so once it exists every page is a slice. Cursors name a view and
+    an offset; views expire ``ttl`` seconds after their first page was last
+    served and only the most recent ``max_views`` are kept.
+    """
+
+    SORT_KEYS = {
+        'name': lambda item: item['name'].lower(),
+        'size': lambda item: item['size'],
+        'modified': lambda item: item['modified']
+    }
+    SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    COMPARISONS = {
+        '>': lambda a, b: a > b, '>=': lambda a, b: a >= b,
+        '<': lambda a, b: a < b, '<=': lambda a, b: a <= b, '=': lambda a, b: a == b
+    }
+
+    def __init__(self, ttl=LISTING_VIEW_TTL, max_views=LISTING_MAX_VIEWS):
+        self.ttl = ttl
+        self.max_views = max_views
+        self.views = OrderedDict()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def parse_filter(cls, expression):
+        """Split a filter expression into ``(kind, operator, value)`` terms; raises ValueError.
+
+        Terms are space separated and must all match: ``type:dir`` or
+        ``type:file``, ``size>10M`` (also ``>=``, ``<``, ``<=``, ``=``; K/M/G/T
+        suffixes), ``modified>=2025-01-31``, and anything else is a
+        case-insensitive glob on the name, or a substring when it has no
+        wildcards. Kinds are type, size (bytes), modified (date prefix),
+        glob and text.
+        """
+        terms = []
+        for term in (expression or '').split():
+            lowered = term.lower()
+            match = re.fullmatch(r'(size|modified)(>=|<=|>|<|=)(.+)', lowered)
+            if lowered in ('type:dir', 'type:file'):
+                terms.append(('type', '=', lowered == 'type:dir'))
+            elif match and match.group(1) == 'size':
+                size = re.fullmatch(r'(\d+(?:\.\d+)?)([kmgt]?)b?', match.group(3))
+                if not size:
+                    raise ValueError(f"Invalid size in filter term '{term}'")
+                terms.append(('size', match.group(2), float(size.group(1)) * cls.SIZE_UNITS[size.group(2).upper()]))
+            elif match:
+                if not re.fullmatch(r'\d{4}(-\d{2}(-\d{2})?)?', match.group(3)):
+                    raise ValueError(f"Invalid date in filter term '{term}', expected YYYY-MM-DD")
+                terms.append(('modified', match.group(2), match.group(3)))
+            elif any(char in term for char in '*?['):
+                terms.append(('glob', None, lowered))
+            else:
+                terms.append(('text', None, lowered))
+        return terms
+
+    @classmethod
+    def compile_filter(cls, expression):
+        """Turn a filter expression (see ``parse_filter``) into a predicate on listing items; raises ValueError"""
+        checks = []
+        for kind, operator, value in cls.parse_filter(expression):
+            compare = cls.COMPARISONS.get(operator)
+            if kind == 'type':
+                checks.append(lambda item, wanted=value: item['is_directory'] == wanted)
+            elif kind == 'size':
+                checks.append(lambda item, compare=compare, limit=value: not item['is_directory'] and compare(item['size'], limit))
+            elif kind == 'modified':
+                # Timestamps are 'YYYY-MM-DD HH:MM:SS', so comparing the prefix compares dates
+                checks.append(lambda item, compare=compare, when=value: compare(item['modified'][:len(when)], when))
+            elif kind == 'glob':
+                checks.append(lambda item, pattern=value: fnmatch.fnmatchcase(item['name'].lower(), pattern))
+            else:
+                checks.append(lambda item, text=value: text in item['name'].lower())
+        return lambda item: all(check(item) for check in checks)
+
+    def create(self, owner, path, items, sort='name', order='asc', expression='', raw=None, version=None):
+        """Build a view over a listing's items; returns its id. Raises ValueError on bad arguments.
+
+        A live view of the same items list (a cached listing), or of a
+        listing with the same content ``version``, with the same sort and
+        filter is reused rather than sorted again, so an unchanged folder
+        keeps its cursors; one over an older listing of the folder is
+        replaced. ``raw`` is the listing's ``(_mtimes, _modes)``, sliced into
+        each page for the columnar format.
+        """
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort '{sort}', use one of: {', '.join(self.SORT_KEYS)}")
+        if order not in ('asc', 'desc'):
+            raise ValueError("Order must be 'asc' or 'desc'")
+        expression = ' '.join((expression or '').split())
+        signature = (owner, path, sort, order, expression)
+        with self.lock:
+            for view_id, view in list(self.views.items()):
+                if (view['owner'], view['path'], view['sort'], view['order'], view['filter']) != signature:
+                    continue
+                same = view['items'] is items or (version is not None and view['version'] == version)
+                if same and time.time() - view['created'] <= self.ttl:
+                    view['created'] = time.time()
+                    self.views.move_to_end(view_id)
+                    return view_id
+                del self.views[view_id]
+        matches = self.compile_filter(expression)
+        key = self.SORT_KEYS[sort]
+        selected = [index for index, item in enumerate(items) if matches(item)]
+        # Stable sorts: ties fall back to name order, and folders stay ahead of files
+        selected.sort(key=lambda index: items[index]['name'].lower())
+        if sort != 'name' or order == 'desc':
+            selected.sort(key=lambda index: key(items[index]), reverse=order == 'desc')
+        selected.sort(key=lambda index: not items[index]['is_directory'])
+        
+        view_id = uuid.uuid4().hex[:16]
+        with self.lock:
+            self.views[view_id] = {
+                'owner': owner,
+                'path': path,
+                'created': time.time(),
+                'items': items,
+                'raw': raw,
+                'version': version,
+                'index': array.array('L', selected),
+                'sort': sort,
+                'order': order,
+                'filter': expression
+            }
+            while len(self.views) > self.max_views:
+                self.views.popitem(last=False)
+        return view_id
+
+    def page(self, owner, cursor, limit):
+        """One page of a view starting at the cursor, or None if the cursor is unknown or expired"""
+        view_id, _, offset = (cursor or '').partition(':')
+        with self.lock:
+            view = self.views.get(view_id)
+            if view is None or view['owner'] != owner or not offset.isdigit():
+                return None
+            if time.time() - view['created'] > self.ttl:
+                del self.views[view_id]
+                return None
+            self.views.move_to_end(view_id)
+        
+        offset = int(offset)
+        end = offset + limit
+        items = view['items']
+        indexes = view['index'][offset:end]
+        total = len(view['index'])
+        page = {
+            'items': [items[index] for index in indexes],
+            'current_path': view['path'],
+            'total': total,
+            'offset': offset,
+            'next_cursor': f"{view_id}:{end}" if end < total else None,
+            'sort': view['sort'],
+            'order': view['order'],
+            'filter': view['filter']
+        }
+        if view['raw'] is not None:
+            mtimes, modes = view['raw']
+            page['_mtimes'] = [mtimes[index] for index in indexes]
+            page['_modes'] = [modes[index] for index in indexes]
+        return page
+
+class RemoteSearch:
+    """One running search of a remote folder tree.
+
+    Matches come from ``find`` on its own exec channel, or from a
+    level-by-level pipelined SFTP walk where ``find`` can't be used. Either
+    way each candidate is checked against the same filter the listings use.
+    ``cancel()`` may be called from another request; the search stops at
+    its next poll.
+    """
+
+    # type, size, mtime, mode, uid, gid and path, NUL terminated so any file name is safe
+    FIND_FORMAT = '%y\\t%s\\t%T@\\t%m\\t%U\\t%G\\t%p\\0'
+
+    def __init__(self, session_id, root, expression, limit=SEARCH_RESULT_LIMIT, max_depth=None):
+        self.session_id = session_id
+        self.search_id = uuid.uuid4().hex[:16]
+        self.root = root.replace('\\', '/').rstrip('/') or '/'
+        self.expression = ' '.join((expression or '').split())
+        self.terms = ListingPager.parse_filter(expression)
+        self.matches = ListingPager.compile_filter(expression)
+        self.limit = limit
+        self.max_depth = max_depth
+        self.cancel_event = threading.Event()
+        self.method = None
+        self.found = 0
+        self.scanned = 0
+        self.limit_reached = False
+        self.warning = None
+        self.started = time.time()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @staticmethod
+    def _period(prefix):
+        """Epoch seconds at the start of a YYYY[-MM[-DD]] period and of the one after it"""
+        parts = [int(part) for part in prefix.split('-')]
+        start = datetime(*(parts + [1] * (3 - len(parts))))
+        if len(parts) == 1:
+            end = start.replace(year=start.year + 1)
+        elif len(parts) == 2:
+            end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+        else:
+            end = datetime.fromordinal(start.toordinal() + 1)
+        return int(start.timestamp()), int(end.timestamp())
+
+    @staticmethod
+    def _find_size(operator, size):
+        """``-size`` predicate in bytes for a size term"""
+        if operator == '>':
+            return ['-size', f'+{math.floor(size)}c']
+        if operator == '>=':
+            return ['-size', f'+{math.ceil(size) - 1}c'] if size > 0 else []
+        if operator == '<':
+            return ['-size', f'-{math.ceil(size)}c']
+        if operator == '<=':
+            return ['-size', f'-{math.floor(size) + 1}c']
+        return ['-size', f'{int(size)}c'] if size == int(size) else ['-false']
+
+    def _find_modified(self, operator, prefix):
+        """``-newermt`` predicates covering a date term (whole seconds, so slightly wider)"""
+        try:
+            start, end = self._period(prefix)
+        except ValueError:
+            return []
+        newer = lambda when: ['-newermt', f'@{when}']
+        return {
+            '>': newer(end - 1),
+            '>=': newer(start - 1),
+            '<': ['!'] + newer(start),
+            '<=': ['!'] + newer(end),
+            '=': newer(start - 1) + ['!'] + newer(end)
+        }[operator]
+
+    def find_command(self):
+        """The ``find`` command line for this search.
+
+        Name, type, size and date terms become find predicates, so the
+        server drops most non-matches itself. Dates are compared in this
+        machine's time zone like the listings, so those bounds are sent as
+        epoch seconds; every line find prints is still checked against the
+        exact filter.
+        """
+        root = './' + self.root if self.root.startswith('-') else self.root
+        args = ['find', root, '-mindepth', '1']
+        if self.max_depth:
+            args += ['-maxdepth', str(self.max_depth)]
+        for kind, operator, value in self.terms:
+            if kind == 'type':
+                args += ['-type', 'd'] if value else ['!', '-type', 'd']
+            elif kind == 'size':
+                args += ['!', '-type', 'd'] + self._find_size(operator, value)
+            elif kind == 'modified':
+                args += self._find_modified(operator, value)
+            else:
+                args += ['-iname', value if kind == 'glob' else f'*{value}*']
+        args += ['-printf', self.FIND_FORMAT]
+        return ' '.join(shlex.quote(arg) for arg in args) + ' 2>/dev/null'
+
+    @staticmethod
+    def find_item(record):
+        """Listing entry for one ``FIND_FORMAT`` record"""
+        kind, size, mtime, mode, uid, gid, path = record.decode(errors='replace').split('\t', 6)
+        is_dir = kind == 'd'
+        return {
+            'name': path.rsplit('/', 1)[-1],
+            'path': path,
+            'is_directory': is_dir,
+            'size': int(size) if not is_dir else 0,
+            'modified': datetime.fromtimestamp(float(mtime)).strftime('%Y-%m-%d %H:%M:%S'),
+            'permissions': mode.zfill(3)[-3:],
+            'owner': int(uid),
+            'group': int(gid)
+        }
+
+    def summary(self):
+        """Fields of the closing ``end`` line"""
+        return {
+            'event': 'end',
+            'search_id': self.search_id,
+            'method': self.method,
+            'matches': self.found,
+            'scanned': self.scanned,
+            'limit_reached': self.limit_reached,
+            'cancelled': self.cancelled,
+            'warning': self.warning,
+            'elapsed': round(time.time() - self.started, 2)
+        }
+
+class RemoteWatch:
+    """A change feed for the remote folders open in the browser.
+
+    Changes come from ``inotifywait -m`` on its own exec channel, or, where
+    that can't be used, from polling the folders' mtimes and listing a
+    folder again only when its mtime moved. The watch keeps the last
+    listing of each folder, so every change goes out as the entries added,
+    modified and removed. ``cancel()`` may be called from another request;
+    the watch stops at its next poll.
+    """
+
+    INOTIFY_EVENTS = ('create', 'delete', 'modify', 'attrib', 'close_write', 'moved_from', 'moved_to', 'delete_self', 'move_self')
+
+    def __init__(self, session_id, paths):
+        self.session_id = session_id
+        self.watch_id = uuid.uuid4().hex[:16]
+        self.paths = list(OrderedDict.fromkeys(ListingCache._key(path) for path in paths))
+        self.listings = {}
+        self.mtimes = {}
+        self.seen_at = {}
+        self.listed_at = {}
+        self.cancel_event = threading.Event()
+        self.method = None
+        self.changes = 0
+        self.started = time.time()
+        self.last_sent = time.time()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def heartbeat_due(self):
+        return time.time() - self.last_sent >= WATCH_HEARTBEAT_INTERVAL
+
+    def inotify_command(self):
+        """The remote command running ``inotifywait`` for this watch; events are printed as CSV records.
+
+        inotifywait would only notice a closed channel the next time it
+        prints, so a helper waits for stdin to close and stops it then.
+        """
+        args = ['inotifywait', '-m', '--csv']
+        for event in self.INOTIFY_EVENTS:
+            args += ['-e', event]
+        args += ['./' + path if path.startswith('-') else path for path in self.paths]
+        watcher = ' '.join(shlex.quote(arg) for arg in args)
+        return f'exec 3<&0; {watcher} </dev/null & pid=$!; {{ read line <&3; kill $pid; }} >/dev/null 2>&1 & wait $pid'
+
+    def note_event(self, touched, record):
+        """Add one inotifywait record to ``touched``: folder -> names to read again, or None to list the folder again"""
+        if len(record) >= 2 and 'Q_OVERFLOW' in record[-2].split(','):
+            # The kernel dropped events (the record has no folder); list every folder again
+            for path in self.paths:
+                touched[path] = None
+            return
+        if len(record) < 3:
+            return
+        folder = record[0].rstrip('/') or '/'
+        folder = folder[2:] if folder.startswith('./-') else folder
+        events = set(record[1].split(','))
+        if folder not in self.listings or 'IGNORED' in events:
+            return
+        elif events & {'DELETE_SELF', 'MOVE_SELF'}:
+            touched[folder] = None
+        elif record[2]:
+            names = touched.setdefault(folder, set())
+            if names is not None:
+                names.add(record[2])
+
+    def summary(self):
+        """Fields of the closing ``end`` line"""
+        return {
+            'event': 'end',
+            'watch_id': self.watch_id,
+            'method': self.method,
+            'paths': self.paths,
+            'changes': self.changes,
+            'cancelled': self.cancelled,
+            'elapsed': round(time.time() - self.started, 2)
+        }
+
+class LocalTreeReader:
+    """Folder reads for DirectorySizeIndex on the local filesystem"""
+
+    join = staticmethod(os.path.join)
+    clock_offset = 0.0  # Local mtimes come from our own clock
+
+    def stat_dirs(self, paths):
+        """mtime of each folder, or the error"""
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError as e:
+                mtimes[path] = e
+        return mtimes
+
+    def scan_dirs(self, paths):
+        """(bytes, files, folders, subfolders to descend) of each folder's own entries, or the error.
+
+        Counts follow ``_scan_local_tree``: symlinked folders are counted but
+        not descended into, and entries that can't be stat'ed are skipped.
+        Subfolders come as ``(name, mtime)`` with the mtime unknown (None).
+        """
+        results = {}
+        for path in paths:
+            size = files = dirs = 0
+            subdirs = []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir():
+                                dirs += 1
+                                if not entry.is_symlink():
+                                    subdirs.append((entry.name, None))
+                            else:
+                                size += entry.stat().st_size
+                                files += 1
+                        except OSError:
+                            pass
+            except OSError as e:
+                results[path] = e
+                continue
+            results[path] = (size, files, dirs, subdirs)
+        return results
+
+class RemoteTreeReader:
+    """Folder reads for DirectorySizeIndex over SFTP, one pipelined window of folders per round trip.
+
+    ``clock_offset`` is a lower bound of the server's clock minus ours, in
+    seconds, or None when the server's clock could not be read.
+    """
+
+    def __init__(self, sftp, clock_offset=None):
+        self.pipeline = SFTPPipeline(sftp)
+        self.clock_offset = clock_offset
+
+    @staticmethod
+    def join(path, name):
+        return path.rstrip('/') + '/' + name
+
+    def stat_dirs(self, paths):
+        """mtime of each folder, or the error"""
+        mtimes = {}
+        for start in range(0, len(paths), self.pipeline.window):
+            window = paths[start:start + self.pipeline.window]
+            for path, attr in zip(window, self.pipeline.lstat_many(window)):
+                mtimes[path] = attr if isinstance(attr, Exception) else attr.st_mtime
+        return mtimes
+
+    def scan_dirs(self, paths):
+        """(bytes, files, folders, subfolders) of each folder's own entries, or the error.
+
+        Entries are classified by lstat, as ``_get_remote_folder_details``
+        did, so symlinks count as files. Subfolder mtimes come from the
+        listing, so they need no separate stat.
+        """
+        results = {}
+        for start in range(0, len(paths), self.pipeline.window):
+            entries, errors = self.pipeline.list_many(paths[start:start + self.pipeline.window])
+            results.update(errors)
+            for path, attrs in entries.items():
+                if path in errors:
+                    continue
+                size = files = dirs = 0
+                subdirs = []
+                for attr in attrs:
+                    if stat.S_ISDIR(attr.st_mode or 0):
+                        dirs += 1
+                        subdirs.append((attr.filename, attr.st_mtime))
+                    else:
+                        size += attr.st_size or 0
+                        files += 1
+                results[path] = (size, files, dirs, subdirs)
+        return results
+
+class DirectorySizeIndex:
+    """Persistent SQLite index of per-folder size and count aggregates.
+
+    Each folder's row holds the totals of its own entries, the subfolders
+    to descend into, and the folder mtime seen when it was listed. Sizing a
+    tree stats every folder but lists only those whose mtime changed, so a
+    mostly static tree is re-measured with one stat per folder instead of
+    one per file. A folder modified within DIR_SIZE_INDEX_MTIME_SLACK
+    seconds of its scan is listed again next time, as a change in the same
+    second would not move its mtime.
+
+    Remote mtimes come from the server's clock, so the scan time is moved
+    onto that clock with the reader's ``clock_offset``. Without one, the
+    time the folder's mtime was first seen stands in: the server's clock
+    read at least that mtime then, so a scan that many seconds later is safe.
+
+    Rows are keyed by scope (``local`` or the remote user@host:port) and path.
+    """
+
+    def __init__(self, db_path=DIR_SIZE_INDEX_DB):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        """Create the index table if it does not exist"""
+        try:
+            with self.lock, self._connect() as db:
+                # The index is only a cache: an older layout is dropped and rebuilt as folders are sized
+                columns = [row[1] for row in db.execute('PRAGMA table_info(dir_sizes)')]
+                if columns and 'seen_at' not in columns:
+                    db.execute('DROP TABLE dir_sizes')
+                db.execute('''
+                    CREATE TABLE IF NOT EXISTS dir_sizes (
+                        scope TEXT NOT NULL,
+                        path TEXT NOT NULL,
+                        mtime REAL,
+                        seen_at REAL,
+                        scanned_at REAL,
+                        bytes INTEGER,
+                        files INTEGER,
+                        dirs INTEGER,
+                        subdirs TEXT,
+                        PRIMARY KEY (scope, path)
+                    )
+                ''')
+        except Exception as e:
+            logger.error(f"Error initializing directory size index: {e}")
+
+    @staticmethod
+    def _subtree_range(root, sep):
+        """Bounds of the paths below root, for a range scan on the primary key"""
+        prefix = root if root.endswith(sep) else root + sep
+        return prefix, prefix[:-1] + chr(ord(sep) + 1)
+
+    def _load(self, scope, root, sep):
+        """Rows for root and everything below it"""
+        low, high = self._subtree_range(root, sep)
+        try:
+            with self.lock, self._connect() as db:
+                rows = db.execute(
+                    'SELECT path, mtime, seen_at, scanned_at, bytes, files, dirs, subdirs FROM dir_sizes '
+                    'WHERE scope = ? AND (path = ? OR (path >= ? AND path < ?))',
+                    (scope, root, low, high)).fetchall()
+        except Exception as e:
+            logger.error(f"Error reading directory size index: {e}")
+            return {}
+        return {row[0]: row[1:] for row in rows}
+
+    def _save(self, scope, updates, stale):
+        try:
+            with self.lock, self._connect() as db:
+                db.executemany('DELETE FROM dir_sizes WHERE scope = ? AND path = ?', [(scope, path) for path in stale])
+                db.executemany('INSERT OR REPLACE INTO dir_sizes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', updates)
+        except Exception as e:
+            logger.error(f"Error writing directory size index: {e}")
+
+    def measure(self, scope, root, reader, sep='/', refresh=False):
+        """Total bytes, files and folders below root, listing only folders whose mtime changed.
+
+        Returns a dict with ``bytes``, ``files`` and ``dirs`` (the folder
+        itself not included) plus how many folders were ``rescanned`` and
+        ``reused``. Folders that can't be read are left out, as before.
+        ``refresh`` lists every folder again.
+        """
+        known = {} if refresh else self._load(scope, root, sep)
+        result = {'bytes': 0, 'files': 0, 'dirs': 0, 'rescanned': 0, 'reused': 0}
+        updates = []
+        visited = set()
+        # (path, mtime, local time by which that mtime was seen); subfolder mtimes come with their parent's listing
+        level = [(root, None, None)]
+        while level:
+            unknown = [path for path, mtime, _ in level if mtime is None]
+            stats = reader.stat_dirs(unknown)
+            stated_at = time.time()
+            changed = []
+            seen = {}
+            deeper = []
+            for path, mtime, seen_at in level:
+                if mtime is None:
+                    mtime, seen_at = stats[path], stated_at
+                if isinstance(mtime, Exception):
+                    continue
+                visited.add(path)
+                row = known.get(path)
+                if row and row[0] == mtime:
+                    # The same mtime was already seen when the row was written
+                    seen_at = min(seen_at, row[1])
+                    if _mtime_settled(mtime, seen_at, row[2], reader.clock_offset, DIR_SIZE_INDEX_MTIME_SLACK):
+                        result['bytes'] += row[3]
+                        result['files'] += row[4]
+                        result['dirs'] += row[5]
+                        result['reused'] += 1
+                        deeper.extend((reader.join(path, name), None, None) for name in json.loads(row[6]))
+                        continue
+                changed.append(path)
+                seen[path] = (mtime, seen_at)
+            
+            scanned_at = time.time()
+            scans = reader.scan_dirs(changed)
+            listed_at = time.time()
+            for path, scan in scans.items():
+                if isinstance(scan, Exception):
+                    visited.discard(path)
+                    continue
+                size, files, dirs, subdirs = scan
+                result['bytes'] += size
+                result['files'] += files
+                result['dirs'] += dirs
+                result['rescanned'] += 1
+                updates.append((scope, path, seen[path][0], seen[path][1], scanned_at, size, files, dirs,
+                                json.dumps([name for name, _ in subdirs])))
+                deeper.extend((reader.join(path, name), mtime, listed_at) for name, mtime in subdirs)
+            level = deeper
+        
+        # Folders no longer reachable (deleted, or now unreadable) leave the index
+        self._save(scope, updates, set(known) - visited)
+        return result
+
+    def invalidate(self, scope, paths, sep='/'):
+        """Forget the rows for paths, their subtrees and their parents.
+
+        Overwriting a file in place doesn't change any folder's mtime, so the
+        app calls this for the paths it writes to.
+        """
+        try:
+            with self.lock, self._connect() as db:
+                for path in paths:
+                    path = path.rstrip(sep) or sep
+                    low, high = self._subtree_range(path, sep)
+                    parent = path.rsplit(sep, 1)[0] or sep
+                    db.execute('DELETE FROM dir_sizes WHERE scope = ? AND (path IN (?, ?) OR (path >= ? AND path < ?))',
+                               (scope, path, parent, low, high))
+        except Exception as e:
+            logger.error(f"Error invalidating directory size index: {e}")
+
 class SCPManager:
     def __init__(self):
         self.connections = {}
+        self.transfer_tables = {}
+        self.deletion_jobs = {}
+        self.listing_pager = ListingPager()
+        self.remote_searches = {}
+        self.remote_watches = {}
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=LISTING_PREFETCH_WORKERS, thread_name_prefix='listing-prefetch')
+        self.prefetch_lock = threading.Lock()
+        self.history = TransferHistoryStore()
+        self.size_index = DirectorySizeIndex()
+        self.transport_pool = SSHTransportPool()
+        self.handoff = ConnectionHandoffCache()
+        self.scheduler = PeriodicScheduler()
+        self.tombstones = OrderedDict()
+        self.eviction_counts = {}
+        self.capability_cache = RemoteCapabilityCache()
+        self.algorithm_profiles = SSHAlgorithmProfiles()
+        self.private_keys = PrivateKeyCache()
+        self.reconnect_latency = LatencyHistogram()
+        self.reconnect_lock = threading.Lock()
+        self.reconnect_outcomes = {'succeeded': 0, 'failed': 0}
         self.encryption_key = self._get_or_create_encryption_key()
         
     def _get_or_create_encryption_key(self):
@@ -335,45 +2881,25 @@ class SCPManager:
             return False
     
     def test_connection(self, host, username, password=None, key_data=None, port=22):
-        """Test SSH connection to remote server"""
+        """Test SSH connection to remote server and park it for the login that follows"""
+        pooled = None
+        ssh = None
         try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            if key_data:
-                # Handle SSH key authentication
-                key_file = tempfile.NamedTemporaryFile(delete=False, mode='w')
-                key_file.write(key_data)
-                key_file.close()
-                
-                try:
-                    # Try different key types
-                    for key_class in [paramiko.RSAKey, paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.DSSKey]:
-                        try:
-                            private_key = key_class.from_private_key_file(key_file.name)
-                            break
-                        except:
-                            continue
-                    else:
-                        raise Exception("Unsupported key format")
-                    
-                    ssh.connect(host, port=port, username=username, pkey=private_key, timeout=10)
-                except Exception as e:
-                    raise Exception(f"SSH key authentication failed: {str(e)}")
-                finally:
-                    os.unlink(key_file.name)
-            else:
-                ssh.connect(host, port=port, username=username, password=password, timeout=10)
+            # A live pooled transport for the same credentials answers the test directly
+            pool_key = self.transport_pool.make_key(host, port, username, password, key_data)
+            pooled = self.transport_pool.acquire(pool_key)
+            ssh = pooled['ssh'] if pooled else self._open_ssh_client(host, username, password, key_data, port)
             
-            # Test basic command
-            stdin, stdout, stderr = ssh.exec_command('pwd')
-            home_dir = stdout.read().decode().strip()
+            # Home directory and system info in a single round trip
+            stdin, stdout, stderr = ssh.exec_command('pwd; uname -a', timeout=10)
+            lines = stdout.read().decode(errors='replace').splitlines()
+            home_dir = lines[0].strip() if lines else ''
+            system_info = '\n'.join(lines[1:]).strip()
             
-            # Get system info
-            stdin, stdout, stderr = ssh.exec_command('uname -a')
-            system_info = stdout.read().decode().strip()
-            
-            ssh.close()
+            if pooled:
+                self.transport_pool.release(ssh)
+            else:
+                self.handoff.put(pool_key, ssh)
             return {
                 'success': True, 
                 'home_dir': home_dir,
@@ -382,118 +2908,136 @@ class SCPManager:
             
         except Exception as e:
             logger.error(f"Connection test failed: {e}")
-            return {'success': False, 'error': str(e)}
+            if pooled:
+                self.transport_pool.release(pooled['ssh'])
+            elif ssh:
+                ssh.close()
+            auth_failed = isinstance(e, paramiko.AuthenticationException) or 'authentication failed' in str(e).lower()
+            return {
+                'success': False,
+                'error': str(e),
+                'error_type': 'auth_failed' if auth_failed else 'ssh_error'
+            }
     
-    def create_connection(self, session_id, host, username, password=None, key_data=None, port=22):
-        """Create and store SSH connection with enhanced keep-alive and large file support"""
-        try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            if key_data:
-                # Handle SSH key authentication with improved error handling
-                key_file = tempfile.NamedTemporaryFile(delete=False, mode='w')
-                key_file.write(key_data)
-                key_file.close()
+    def _open_ssh_client(self, host, username, password=None, key_data=None, port=22, ciphers=None):
+        """Connect and authenticate a new SSH client tuned for large file transfers"""
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        
+        # Negotiate with the host's algorithm profile (or an explicit cipher list)
+        algorithms = self.algorithm_profiles.resolve(host, port)
+        if ciphers:
+            algorithms['ciphers'] = list(ciphers)
+        
+        def transport_factory(sock, **kwargs):
+            transport = paramiko.Transport(sock, **kwargs)
+            SSHAlgorithmProfiles.apply(transport, algorithms)
+            return transport
+        
+        if key_data:
+            # Handle SSH key authentication with improved error handling
+            try:
+                # Parsed in memory once per key, then served from the key cache
+                private_key = self.private_keys.load(key_data)
                 
-                try:
-                    private_key = None
-                    key_errors = []
-                    
-                    # Try different key types with specific error handling
-                    key_types = [
-                        (paramiko.RSAKey, "RSA"),
-                        (paramiko.Ed25519Key, "Ed25519"),
-                        (paramiko.ECDSAKey, "ECDSA"),
-                        (paramiko.DSSKey, "DSS")
-                    ]
-                    
-                    for key_class, key_type in key_types:
-                        try:
-                            private_key = key_class.from_private_key_file(key_file.name)
-                            logger.info(f"Successfully loaded {key_type} key for {username}@{host}")
-                            break
-                        except paramiko.PasswordRequiredException:
-                            key_errors.append(f"{key_type} key requires passphrase (not supported)")
-                        except paramiko.SSHException as e:
-                            key_errors.append(f"{key_type} key format error: {str(e)}")
-                        except Exception as e:
-                            key_errors.append(f"{key_type} key error: {str(e)}")
-                    
-                    if not private_key:
-                        error_msg = f"Failed to load SSH key. Tried formats: {', '.join([kt[1] for kt in key_types])}. Errors: {'; '.join(key_errors)}"
-                        raise Exception(error_msg)
-                    
-                    # Attempt SSH connection with the key
-                    ssh.connect(
-                        host, 
-                        port=port, 
-                        username=username, 
-                        pkey=private_key,
-                        timeout=30,
-                        banner_timeout=30,
-                        auth_timeout=30,
-                        look_for_keys=False,  # Don't look for system keys
-                        allow_agent=False     # Don't use SSH agent
-                    )
-                    
-                    logger.info(f"SSH key authentication successful for {username}@{host}:{port}")
-                    
-                except paramiko.AuthenticationException as e:
-                    raise Exception(f"SSH key authentication failed. Please check:\n• Key file is correct for user '{username}'\n• Key is authorized on the server\n• User account exists\nError: {str(e)}")
-                except paramiko.SSHException as e:
-                    raise Exception(f"SSH connection error: {str(e)}")
-                except Exception as e:
-                    if "Failed to load SSH key" in str(e):
-                        raise e  # Re-raise key loading errors as-is
-                    else:
-                        raise Exception(f"SSH key authentication error: {str(e)}")
-                finally:
-                    # Clean up temporary key file
-                    try:
-                        os.unlink(key_file.name)
-                    except:
-                        pass
-            else:
+                # Attempt SSH connection with the key
                 ssh.connect(
                     host, 
                     port=port, 
                     username=username, 
-                    password=password,
+                    pkey=private_key,
                     timeout=30,
                     banner_timeout=30,
-                    auth_timeout=30
+                    auth_timeout=30,
+                    look_for_keys=False,  # Don't look for system keys
+                    allow_agent=False,    # Don't use SSH agent
+                    transport_factory=transport_factory
                 )
-            
-            # Configure enhanced keep-alive for large file transfers
-            transport = ssh.get_transport()
-            if transport:
-                # More aggressive keep-alive for large file transfers
-                transport.set_keepalive(15)  # Send keep-alive every 15 seconds
-                # Increase window size for better performance with large files
-                transport.window_size = 2147483647  # Maximum window size
-                transport.packetizer.REKEY_BYTES = pow(2, 40)  # 1TB before rekeying
-                transport.packetizer.REKEY_PACKETS = pow(2, 40)  # Large packet count
-                # Disable compression for better large file performance
-                transport.use_compression(False)
-                logger.info(f"Enhanced SSH keep-alive configured for large files: {username}@{host}")
+                
+                logger.info(f"SSH key authentication successful for {username}@{host}:{port}")
+                
+            except paramiko.AuthenticationException as e:
+                raise Exception(f"SSH key authentication failed. Please check:\n• Key file is correct for user '{username}'\n• Key is authorized on the server\n• User account exists\nError: {str(e)}")
+            except paramiko.SSHException as e:
+                raise Exception(f"SSH connection error: {str(e)}")
+            except Exception as e:
+                if "Failed to load SSH key" in str(e):
+                    raise e  # Re-raise key loading errors as-is
+                else:
+                    raise Exception(f"SSH key authentication error: {str(e)}")
+        else:
+            ssh.connect(
+                host, 
+                port=port, 
+                username=username, 
+                password=password,
+                timeout=30,
+                banner_timeout=30,
+                auth_timeout=30,
+                transport_factory=transport_factory
+            )
+        
+        # Configure enhanced keep-alive for large file transfers
+        transport = ssh.get_transport()
+        if transport:
+            # More aggressive keep-alive for large file transfers
+            transport.set_keepalive(15)  # Send keep-alive every 15 seconds
+            # Increase window size for better performance with large files
+            transport.window_size = 2147483647  # Maximum window size
+            transport.packetizer.REKEY_BYTES = pow(2, 40)  # 1TB before rekeying
+            transport.packetizer.REKEY_PACKETS = pow(2, 40)  # Large packet count
+            # Disable compression for better large file performance
+            transport.use_compression(False)
+            logger.info(f"Enhanced SSH keep-alive configured for large files: {username}@{host}")
+        
+        return ssh
+    
+    def create_connection(self, session_id, host, username, password=None, key_data=None, port=22):
+        """Create and store SSH connection with enhanced keep-alive and large file support"""
+        pooled = None
+        self._ensure_reaper()
+        self._enforce_connection_cap(reserve=1)
+        try:
+            # Lease a shared transport for the same user@host:port and credentials,
+            # only doing a full TCP + key exchange + auth handshake on a pool miss
+            pool_key = self.transport_pool.make_key(host, port, username, password, key_data)
+            pooled = self.transport_pool.acquire(pool_key)
+            if pooled:
+                logger.info(f"Reusing pooled SSH transport for {username}@{host}:{port}")
+            else:
+                # Promote the client from a just-completed connection test if there is one
+                ssh = self.handoff.take(pool_key)
+                if ssh:
+                    logger.info(f"Promoting tested SSH connection for {username}@{host}:{port}")
+                else:
+                    ssh = self._open_ssh_client(host, username, password, key_data, port)
+                pooled = self.transport_pool.add(pool_key, ssh)
+            ssh = pooled['ssh']
             
             # Create SFTP client with optimized settings
             sftp = ssh.open_sftp()
             # Optimize SFTP for large file transfers
             sftp.get_channel().settimeout(300)  # 5 minute timeout for operations
             
-            # Detect remote OS for cross-platform compatibility
-            remote_os = self._detect_remote_os(ssh)
+            # Detect remote OS and capabilities (once per pooled transport,
+            # and not at all for hosts already in the capability cache)
+            profile = pooled['info'].get('profile')
+            if profile is None:
+                profile = self._get_remote_profile(ssh)
+                pooled['info']['profile'] = profile
+            remote_os = profile['remote_os']
             
             # Store connection with enhanced metadata
             self.connections[session_id] = {
                 'ssh': ssh,
                 'sftp': sftp,
+                'sftp_pool': SFTPChannelPool(ssh, interactive=sftp),
                 'host': host,
                 'username': username,
                 'port': port,
+                'pool_key': pool_key,
                 'remote_os': remote_os,
+                'capabilities': profile['capabilities'],
                 'created_at': datetime.now(),
                 'last_activity': datetime.now(),
                 'transfer_active': False,
@@ -515,43 +3059,113 @@ class SCPManager:
             return True
         except Exception as e:
             logger.error(f"Connection creation failed: {e}")
+            if pooled:
+                self.transport_pool.release(pooled['ssh'])
             return False
     
+    def benchmark_ciphers(self, host, username, password=None, key_data=None, port=22,
+                          size_mb=SSH_BENCHMARK_SIZE_MB, ciphers=None):
+        """Measure download throughput per cipher and pin the fastest for the host"""
+        candidates = ciphers or self.algorithm_profiles.resolve(host, port)['ciphers']
+        nbytes = int(size_mb * 1024 * 1024)
+        results = []
+        
+        for cipher in candidates:
+            ssh = None
+            try:
+                # A fresh transport that can only negotiate this cipher
+                ssh = self._open_ssh_client(host, username, password, key_data, port, ciphers=[cipher])
+                negotiated = ssh.get_transport().remote_cipher
+                
+                started = time.time()
+                stdin, stdout, stderr = ssh.exec_command(f'head -c {nbytes} /dev/zero', timeout=120)
+                channel = stdout.channel
+                received = 0
+                while True:
+                    chunk = channel.recv(1024 * 1024)
+                    if not chunk:
+                        break
+                    received += len(chunk)
+                elapsed = max(time.time() - started, 1e-6)
+                
+                if received < nbytes:
+                    raise Exception(f"Benchmark stream ended after {received} of {nbytes} bytes")
+                results.append({
+                    'cipher': negotiated,
+                    'mbps': round(received / elapsed / (1024 * 1024), 2),
+                    'seconds': round(elapsed, 3)
+                })
+                logger.info(f"Cipher benchmark {host}:{port} {negotiated}: {results[-1]['mbps']} MB/s")
+            except Exception as e:
+                logger.warning(f"Cipher benchmark {host}:{port} {cipher} failed: {e}")
+                results.append({'cipher': cipher, 'error': str(e)})
+            finally:
+                if ssh:
+                    ssh.close()
+        
+        fastest = self.algorithm_profiles.record_benchmark(host, port, results)
+        if not fastest:
+            return {'success': False, 'error': 'No cipher could be benchmarked', 'results': results}
+        return {'success': True, 'cipher': fastest, 'size_mb': size_mb, 'results': results}
+    
     def _detect_remote_os(self, ssh):
         """Enhanced remote OS detection with detailed information"""
+        return self._get_remote_profile(ssh)['remote_os']
+    
+    def _get_remote_profile(self, ssh):
+        """Remote OS and capabilities, from the on-disk cache when the host key is known"""
+        fingerprint = None
+        try:
+            fingerprint = RemoteCapabilityCache.host_key_fingerprint(ssh.get_transport())
+            cached = self.capability_cache.get(fingerprint)
+            if cached:
+                logger.info(f"Using cached remote profile for host key {fingerprint[:24]}...")
+                return cached
+        except Exception as e:
+            logger.warning(f"Capability cache lookup failed: {e}")
+        
+        remote_os, capabilities = self._probe_remote(ssh)
+        profile = {'remote_os': remote_os, 'capabilities': capabilities}
+        if fingerprint:
+            self.capability_cache.put(fingerprint, profile)
+        return profile
+    
+    def _probe_remote(self, ssh):
+        """Detect OS and capabilities with a single exec of a combined probe script"""
         try:
-            # Try multiple detection methods for better accuracy
+            stdin, stdout, stderr = ssh.exec_command(REMOTE_PROBE_SCRIPT, timeout=10)
+            output = stdout.read().decode(errors='replace')
+            
             detection_results = {}
+            capabilities = {}
+            section = None
+            for line in output.splitlines():
+                if line.startswith('@@'):
+                    section = line[2:].strip()
+                    continue
+                line = line.strip()
+                if not section or not line:
+                    continue
+                if section.startswith('cap_'):
+                    capabilities[section[4:]] = True
+                elif section not in detection_results:
+                    detection_results[section] = line
             
-            # Linux distribution detection
-            commands = [
-                ('cat /etc/os-release 2>/dev/null | grep "^PRETTY_NAME=" | cut -d"=" -f2 | tr -d \'"\'', 'linux_pretty'),
-                ('cat /etc/os-release 2>/dev/null | grep "^NAME=" | cut -d"=" -f2 | tr -d \'"\'', 'linux_name'),
-                ('lsb_release -d 2>/dev/null | cut -f2', 'linux_lsb'),
-                ('cat /etc/redhat-release 2>/dev/null', 'redhat'),
-                ('cat /etc/debian_version 2>/dev/null', 'debian'),
-                ('uname -s', 'uname'),
-                ('uname -r', 'kernel'),
-                ('hostname', 'hostname'),
-                ('sw_vers -productName 2>/dev/null', 'macos'),
-                ('ver 2>/dev/null', 'windows')
-            ]
+            if section is None:
+                # No POSIX shell on the other side (e.g. Windows cmd.exe)
+                stdin, stdout, stderr = ssh.exec_command('ver', timeout=3)
+                if stdout.read().decode(errors='replace').strip():
+                    detection_results['windows'] = 'windows'
             
-            for command, key in commands:
-                try:
-                    stdin, stdout, stderr = ssh.exec_command(command, timeout=3)
-                    output = stdout.read().decode().strip()
-                    if output:
-                        detection_results[key] = output
-                except:
-                    continue
+            for name in REMOTE_CAPABILITY_NAMES:
+                capabilities.setdefault(name, False)
             
             # Analyze results
-            return self._analyze_remote_os_results(detection_results)
+            return self._analyze_remote_os_results(detection_results), capabilities
             
         except Exception as e:
             logger.warning(f"OS detection failed: {e}")
-            return 'server'  # Better than 'unknown'
+            return 'server', {name: False for name in REMOTE_CAPABILITY_NAMES}  # Better than 'unknown'
     
     def _analyze_remote_os_results(self, results):
         """Analyze detection results and return user-friendly OS name"""
@@ -652,147 +3266,113 @@ class SCPManager:
         """Get cross-platform compatible commands"""
         commands = {
             'delete_file': {
-                'macos': 'rm -f "{}"',
-                'linux': 'rm -f "{}"',
-                'freebsd': 'rm -f "{}"',
-                'unix': 'rm -f "{}"',
+                'macos': 'rm -f {}',
+                'linux': 'rm -f {}',
+                'freebsd': 'rm -f {}',
+                'unix': 'rm -f {}',
                 'windows': 'del /f "{}"'
             },
             'delete_dir': {
-                'macos': 'rm -rf "{}"',
-                'linux': 'rm -rf "{}"',
-                'freebsd': 'rm -rf "{}"',
-                'unix': 'rm -rf "{}"',
+                'macos': 'rm -rf {}',
+                'linux': 'rm -rf {}',
+                'freebsd': 'rm -rf {}',
+                'unix': 'rm -rf {}',
                 'windows': 'rmdir /s /q "{}"'
             },
             'move': {
-                'macos': 'mv "{}" "{}"',
-                'linux': 'mv "{}" "{}"',
-                'freebsd': 'mv "{}" "{}"',
-                'unix': 'mv "{}" "{}"',
+                'macos': 'mv {} {}',
+                'linux': 'mv {} {}',
+                'freebsd': 'mv {} {}',
+                'unix': 'mv {} {}',
                 'windows': 'move "{}" "{}"'
             },
+            'chmod': {
+                'macos': 'chmod {} {}',
+                'linux': 'chmod {} {}',
+                'freebsd': 'chmod {} {}',
+                'unix': 'chmod {} {}',
+                'windows': ''
+            },
+            'copy': {
+                'macos': 'cp -R {} {}',
+                'linux': 'cp -R {} {}',
+                'freebsd': 'cp -R {} {}',
+                'unix': 'cp -R {} {}',
+                'windows': 'copy /Y "{}" "{}"'
+            },
             'mkdir': {
-                'macos': 'mkdir -p "{}"',
-                'linux': 'mkdir -p "{}"',
-                'freebsd': 'mkdir -p "{}"',
-                'unix': 'mkdir -p "{}"',
+                'macos': 'mkdir -p {}',
+                'linux': 'mkdir -p {}',
+                'freebsd': 'mkdir -p {}',
+                'unix': 'mkdir -p {}',
                 'windows': 'mkdir "{}"'
             },
             'test_file': {
-                'macos': 'test -f "{}" && echo "FILE" || echo "NOT_FILE"',
-                'linux': 'test -f "{}" && echo "FILE" || echo "NOT_FILE"',
-                'freebsd': 'test -f "{}" && echo "FILE" || echo "NOT_FILE"',
-                'unix': 'test -f "{}" && echo "FILE" || echo "NOT_FILE"',
+                'macos': 'test -f {} && echo "FILE" || echo "NOT_FILE"',
+                'linux': 'test -f {} && echo "FILE" || echo "NOT_FILE"',
+                'freebsd': 'test -f {} && echo "FILE" || echo "NOT_FILE"',
+                'unix': 'test -f {} && echo "FILE" || echo "NOT_FILE"',
                 'windows': 'if exist "{}" echo FILE'
             }
         }
         
         cmd_template = commands.get(operation, {}).get(remote_os, commands.get(operation, {}).get('unix', ''))
         if cmd_template:
+            if remote_os != 'windows':
+                # Double quotes still let the shell expand $, backticks and $(...) in file names
+                args = [shlex.quote(str(arg)) for arg in args]
             return cmd_template.format(*args)
         return None
 
     def _start_enhanced_keepalive_monitor(self, session_id):
-        """Start enhanced background thread to monitor and maintain connection during large transfers"""
-        def enhanced_keepalive_worker():
-            consecutive_failures = 0
-            max_failures = 3
-            
-            while session_id in self.connections:
-                try:
-                    conn = self.connections[session_id]
-                    transport = conn['ssh'].get_transport()
-                    
-                    if transport and transport.is_active():
-                        # Update last activity timestamp
-                        conn['last_activity'] = datetime.now()
-                        
-                        # Adjust keep-alive frequency based on transfer activity
-                        if conn.get('transfer_active', False):
-                            # During transfers, use lighter keep-alive
-                            try:
-                                # Just check transport status, don't send commands during transfer
-                                if transport.is_authenticated():
-                                    logger.debug(f"Transfer keep-alive check passed for session {session_id}")
-                                    consecutive_failures = 0
-                                else:
-                                    consecutive_failures += 1
-                                    logger.warning(f"Transfer keep-alive authentication check failed for session {session_id}")
-                            except Exception as e:
-                                consecutive_failures += 1
-                                logger.warning(f"Transfer keep-alive failed for session {session_id}: {e}")
-                        else:
-                            # When not transferring, use normal keep-alive with lightweight command
-                            try:
-                                conn['sftp'].normalize('.')  # Very lightweight SFTP operation
-                                logger.debug(f"Keep-alive successful for session {session_id}")
-                                consecutive_failures = 0
-                            except Exception as e:
-                                consecutive_failures += 1
-                                logger.warning(f"Keep-alive failed for session {session_id}: {e}")
-                    else:
-                        consecutive_failures += 1
-                        logger.warning(f"Transport inactive for session {session_id}")
-                    
-                    # If too many consecutive failures, mark for reconnection
-                    if consecutive_failures >= max_failures:
-                        logger.error(f"Max keep-alive failures reached for session {session_id}, marking for reconnection")
-                        conn['needs_reauth'] = True
-                        consecutive_failures = 0  # Reset counter
-                        
-                except Exception as e:
-                    consecutive_failures += 1
-                    logger.error(f"Keep-alive monitor error for session {session_id}: {e}")
-                    if consecutive_failures >= max_failures:
-                        break
-                
-                # Adaptive sleep based on transfer activity
-                if session_id in self.connections and self.connections[session_id].get('transfer_active', False):
-                    time.sleep(30)  # Less frequent during transfers
-                else:
-                    time.sleep(45)  # Normal frequency when idle
-        
-        # Start the enhanced keep-alive thread
-        keepalive_thread = threading.Thread(target=enhanced_keepalive_worker, daemon=True)
-        keepalive_thread.start()
-        logger.info(f"Enhanced keep-alive monitor started for session {session_id}")
+        """Schedule periodic health checks for a session on the shared scheduler"""
+        # Spread first checks out so sessions created together don't probe together
+        self.scheduler.schedule(f"keepalive:{session_id}", lambda: self._keepalive_check(session_id),
+                                random.uniform(0.5, 1.0) * KEEPALIVE_IDLE_INTERVAL)
+        logger.info(f"Enhanced keep-alive scheduled for session {session_id}")
 
-    def _start_keepalive_monitor(self, session_id):
-        """Start background thread to monitor and maintain connection"""
-        def keepalive_worker():
-            while session_id in self.connections:
-                try:
-                    conn = self.connections[session_id]
-                    transport = conn['ssh'].get_transport()
-                    
-                    if transport and transport.is_active():
-                        # Update last activity timestamp
-                        conn['last_activity'] = datetime.now()
-                        
-                        # Send a lightweight command to keep connection alive
-                        try:
-                            conn['sftp'].listdir('.')  # Simple directory listing
-                            logger.debug(f"Keep-alive successful for session {session_id}")
-                        except Exception as e:
-                            logger.warning(f"Keep-alive failed for session {session_id}: {e}")
-                            # Try to reconnect if keep-alive fails
-                            self._attempt_reconnection(session_id)
-                    else:
-                        logger.warning(f"Transport inactive for session {session_id}, attempting reconnection")
-                        self._attempt_reconnection(session_id)
-                        
-                except Exception as e:
-                    logger.error(f"Keep-alive monitor error for session {session_id}: {e}")
-                    break
-                
-                # Wait 60 seconds before next keep-alive check
-                time.sleep(60)
+    def _keepalive_check(self, session_id):
+        """Run one health check; returns the delay until the next one, or None to stop"""
+        conn = self.connections.get(session_id)
+        if not conn:
+            return None
+        if conn.get('reconnecting'):
+            return KEEPALIVE_IDLE_INTERVAL
+        
+        healthy = False
+        try:
+            transport = conn['ssh'].get_transport()
+            if not transport or not transport.is_active():
+                logger.warning(f"Transport inactive for session {session_id}")
+                self.request_reconnect(session_id, 'transport_inactive')
+                return KEEPALIVE_IDLE_INTERVAL
+            elif conn.get('transfer_active', False):
+                # During transfers, just check transport status, don't send requests
+                healthy = transport.is_authenticated()
+                if not healthy:
+                    logger.warning(f"Transfer keep-alive authentication check failed for session {session_id}")
+            else:
+                # When not transferring, use a very lightweight SFTP request on the interactive lane
+                with self.sftp_channel(conn, interactive=True) as sftp:
+                    sftp.normalize('.')
+                healthy = True
+        except Exception as e:
+            logger.warning(f"Keep-alive failed for session {session_id}: {e}")
         
-        # Start the keep-alive thread
-        keepalive_thread = threading.Thread(target=keepalive_worker, daemon=True)
-        keepalive_thread.start()
-        logger.info(f"Keep-alive monitor started for session {session_id}")
+        if healthy:
+            conn['keepalive_failures'] = 0
+            logger.debug(f"Keep-alive successful for session {session_id}")
+        else:
+            conn['keepalive_failures'] = conn.get('keepalive_failures', 0) + 1
+            # If too many consecutive failures, mark for reconnection
+            if conn['keepalive_failures'] >= KEEPALIVE_MAX_FAILURES:
+                logger.error(f"Max keep-alive failures reached for session {session_id}, reconnecting")
+                conn['keepalive_failures'] = 0
+                self.request_reconnect(session_id, 'keepalive_failed')
+        conn['last_health_check'] = datetime.now()
+        
+        # Less frequent checks while idle, more frequent during transfers
+        return KEEPALIVE_TRANSFER_INTERVAL if conn.get('transfer_active', False) else KEEPALIVE_IDLE_INTERVAL
     
     def _attempt_reconnection(self, session_id):
         """Attempt to reconnect a dropped connection"""
@@ -808,11 +3388,8 @@ class SCPManager:
             logger.info(f"Attempting reconnection for {username}@{host}:{port}")
             
             # Close existing connection
-            try:
-                conn['sftp'].close()
-                conn['ssh'].close()
-            except:
-                pass
+            self._close_sftp_channels(conn)
+            self._release_transport(conn)
             
             # Create new connection (this will use stored credentials if available)
             # For now, we'll mark the connection as needing re-authentication
@@ -831,6 +3408,95 @@ class SCPManager:
             logger.error(f"Reconnection failed for session {session_id}: {e}")
             return False
     
+    def transport_lost(self, session_id):
+        """Whether a session's transport is down or being rebuilt"""
+        conn = self.connections.get(session_id)
+        if not conn:
+            return False
+        if conn.get('reconnecting'):
+            return True
+        transport = conn['ssh'].get_transport()
+        return not transport or not transport.is_active()
+
+    def request_reconnect(self, session_id, reason):
+        """Start background reconnection for a session unless it is already running"""
+        conn = self.connections.get(session_id)
+        if not conn:
+            return False
+        with self.reconnect_lock:
+            if conn.get('reconnecting'):
+                return True
+            conn['reconnecting'] = {
+                'since': time.time(),
+                'reason': reason,
+                'attempts': 0,
+                'last_error': None,
+                'done': threading.Event()
+            }
+        logger.warning(f"Connection lost for session {session_id} ({reason}), reconnecting in background")
+        self.scheduler.schedule(f"reconnect:{session_id}", lambda: self._reconnect_step(session_id), 0)
+        return True
+
+    def _reconnect_step(self, session_id):
+        """One reconnect attempt; returns the backoff delay before the next, or None when done"""
+        conn = self.connections.get(session_id)
+        state = conn.get('reconnecting') if conn else None
+        if not state:
+            return None
+        state['attempts'] += 1
+        result = self._attempt_auto_reconnect(session_id)
+        
+        if result['success']:
+            elapsed = time.time() - state['since']
+            self.reconnect_latency.record(elapsed)
+            self.reconnect_outcomes['succeeded'] += 1
+            logger.info(f"Session {session_id} reconnected after {elapsed:.1f}s ({state['attempts']} attempt(s))")
+        elif result.get('error_type') not in ('auth_required', 'no_session') and state['attempts'] < RECONNECT_MAX_ATTEMPTS:
+            state['last_error'] = result.get('error')
+            # Exponential backoff with jitter so sessions sharing a host don't retry in lockstep
+            delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** (state['attempts'] - 1))
+            return random.uniform(delay / 2, delay)
+        else:
+            self.reconnect_outcomes['failed'] += 1
+            conn['needs_reauth'] = True
+            logger.error(f"Giving up reconnecting session {session_id} after {state['attempts']} attempt(s): {result.get('error')}")
+        
+        conn.pop('reconnecting', None)
+        state['done'].set()
+        return None
+
+    def wait_for_reconnect(self, session_id, timeout):
+        """Block until a session's background reconnect finishes; True if it is usable again"""
+        if not self.request_reconnect(session_id, 'transfer_error'):
+            return False
+        conn = self.connections.get(session_id)
+        state = conn.get('reconnecting') if conn else None
+        if state:
+            state['done'].wait(timeout)
+        return session_id in self.connections and not self.transport_lost(session_id)
+
+    def reconnect_stats(self):
+        """Reconnect outcomes, sessions currently reconnecting and the latency histogram"""
+        now = time.time()
+        in_progress = [{
+            'host': conn['host'],
+            'username': conn['username'],
+            'reason': conn['reconnecting']['reason'],
+            'attempts': conn['reconnecting']['attempts'],
+            'seconds': round(now - conn['reconnecting']['since'], 1),
+            'last_error': conn['reconnecting']['last_error']
+        } for conn in list(self.connections.values()) if conn.get('reconnecting')]
+        return dict(self.reconnect_outcomes, in_progress=in_progress, latency=self.reconnect_latency.stats())
+
+    @contextmanager
+    def resumable_channel(self, session_id):
+        """Bulk SFTP channel that pauses and resumes across a reconnect"""
+        channel = ResumableSFTP(self, session_id)
+        try:
+            yield channel
+        finally:
+            channel.close()
+
     def _attempt_auto_reconnect(self, session_id):
         """Attempt automatic reconnection after server restart"""
         try:
@@ -845,11 +3511,8 @@ class SCPManager:
             logger.info(f"Attempting auto-reconnect for {username}@{host}:{port}")
             
             # Close existing connection
-            try:
-                conn['sftp'].close()
-                conn['ssh'].close()
-            except:
-                pass
+            self._close_sftp_channels(conn)
+            self._release_transport(conn)
             
             # Test if server is back online
             import socket
@@ -884,58 +3547,22 @@ class SCPManager:
                     'error_type': 'auth_required'
                 }
             
-            # Attempt reconnection with stored credentials
+            # Attempt reconnection with stored credentials, sharing a transport
+            # another session may already have re-established
+            pooled = None
             try:
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                
-                if stored_creds.get('key_data'):
-                    # Use SSH key authentication
-                    key_file = tempfile.NamedTemporaryFile(delete=False, mode='w')
-                    key_file.write(stored_creds['key_data'])
-                    key_file.close()
-                    
-                    try:
-                        private_key = None
-                        # Try different key types
-                        for key_class in [paramiko.RSAKey, paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.DSSKey]:
-                            try:
-                                private_key = key_class.from_private_key_file(key_file.name)
-                                break
-                            except:
-                                continue
-                        
-                        if not private_key:
-                            raise Exception("Could not load SSH key for reconnection")
-                        
-                        ssh.connect(
-                            host, 
-                            port=port, 
-                            username=username, 
-                            pkey=private_key, 
-                            timeout=30,
-                            look_for_keys=False,
-                            allow_agent=False
-                        )
-                    finally:
-                        try:
-                            os.unlink(key_file.name)
-                        except:
-                            pass
-                else:
-                    # Use password authentication
-                    ssh.connect(
-                        host, 
-                        port=port, 
-                        username=username, 
-                        password=stored_creds['password'], 
-                        timeout=30
+                pool_key = conn.get('pool_key') or self.transport_pool.make_key(
+                    host, port, username, stored_creds.get('password'), stored_creds.get('key_data'))
+                pooled = self.transport_pool.acquire(pool_key)
+                if not pooled:
+                    ssh = self._open_ssh_client(
+                        host, username,
+                        password=stored_creds.get('password'),
+                        key_data=stored_creds.get('key_data'),
+                        port=port
                     )
-                
-                # Configure keep-alive
-                transport = ssh.get_transport()
-                if transport:
-                    transport.set_keepalive(30)
+                    pooled = self.transport_pool.add(pool_key, ssh)
+                ssh = pooled['ssh']
                 
                 # Create new SFTP client
                 sftp = ssh.open_sftp()
@@ -943,6 +3570,9 @@ class SCPManager:
                 # Update connection
                 conn['ssh'] = ssh
                 conn['sftp'] = sftp
+                conn['sftp_pool'] = SFTPChannelPool(ssh, interactive=sftp)
+                conn['pool_key'] = pool_key
+                conn['transport_released'] = False
                 conn['last_activity'] = datetime.now()
                 conn['reconnected_at'] = datetime.now()
                 conn['reconnect_count'] = conn.get('reconnect_count', 0) + 1
@@ -959,6 +3589,8 @@ class SCPManager:
                 
             except Exception as e:
                 logger.error(f"Auto-reconnect failed for {username}@{host}:{port}: {e}")
+                if pooled and conn.get('ssh') is not pooled['ssh']:
+                    self.transport_pool.release(pooled['ssh'])
                 conn['needs_reauth'] = True
                 return {
                     'success': False, 
@@ -999,18 +3631,384 @@ class SCPManager:
         conn['last_activity'] = datetime.now()
         return conn
     
+    def _close_sftp_channels(self, conn):
+        """Close a connection's SFTP channel pool (or its single SFTP client) and command shell"""
+        try:
+            if conn.get('sftp_pool'):
+                conn['sftp_pool'].close()
+            else:
+                conn['sftp'].close()
+        except Exception:
+            pass
+        runner = conn.pop('command_runner', None)
+        if runner:
+            runner.close()
+
+    def run_remote_commands(self, conn, commands):
+        """Run shell commands for a connection, on its persistent shell where possible.
+
+        Windows servers have no ``sh``, so each command gets its own exec channel there.
+        """
+        if conn.get('remote_os') == 'windows':
+            results = []
+            for command in commands:
+                stdin, stdout, stderr = conn['ssh'].exec_command(command, timeout=REMOTE_COMMAND_TIMEOUT)
+                out = stdout.read().decode(errors='replace')
+                results.append({
+                    'exit_code': stdout.channel.recv_exit_status(),
+                    'stdout': out,
+                    'stderr': stderr.read().decode(errors='replace')
+                })
+            return results
+        
+        runner = conn.get('command_runner')
+        if runner is None or runner.ssh is not conn['ssh']:
+            runner = conn['command_runner'] = RemoteCommandRunner(conn['ssh'])
+        return runner.run_many(commands)
+
+    def run_remote_command(self, conn, command):
+        """Run one shell command for a connection; returns exit_code, stdout and stderr"""
+        return self.run_remote_commands(conn, [command])[0]
+
+    def _shell_file_commands(self, conn, operation, arguments):
+        """Run one cross-platform file command per argument tuple as a batch; returns an error or None for each"""
+        remote_os = conn.get('remote_os', 'unix')
+        errors = [None] * len(arguments)
+        commands = []
+        for index, args in enumerate(arguments):
+            cmd = self._get_cross_platform_commands(remote_os, operation, *args)
+            if cmd:
+                commands.append((index, cmd))
+            else:
+                errors[index] = f"Operation not supported on {remote_os}"
+        
+        results = self.run_remote_commands(conn, [cmd for _, cmd in commands])
+        for (index, _), result in zip(commands, results):
+            if result['exit_code'] != 0:
+                errors[index] = result['stderr'].strip() or "Operation failed"
+        return errors
+
+    def make_remote_dirs(self, conn, paths):
+        """Create remote folders and any missing parents (like ``mkdir -p``); returns an error or None per path.
+
+        Every ancestor's MKDIR is pipelined in one round trip, parents
+        first; the shell is only used when SFTP itself is unavailable.
+        """
+        try:
+            with self.sftp_channel(conn, interactive=True) as sftp:
+                pipeline = SFTPPipeline(sftp)
+                ancestors = OrderedDict()
+                leaves = []
+                for path in paths:
+                    parts = [part for part in path.replace('\\', '/').split('/') if part]
+                    prefix = '/' if path.startswith('/') else ''
+                    for i in range(1, len(parts) + 1):
+                        ancestors.setdefault(prefix + '/'.join(parts[:i]), i)
+                    leaves.append(prefix + '/'.join(parts))
+                targets = sorted(ancestors, key=ancestors.get)
+                attr = paramiko.SFTPAttributes()
+                attr.st_mode = 0o777
+                replies = pipeline.run([(paramiko.sftp.CMD_MKDIR, target, attr) for target in targets])
+                mkdir_errors = {target: pipeline.error(reply) for target, reply in zip(targets, replies)}
+                
+                errors = [None] * len(paths)
+                failed = [index for index, leaf in enumerate(leaves) if mkdir_errors.get(leaf, True) is not None]
+                # An existing folder is fine, as with mkdir -p
+                existing = pipeline.lstat_many([leaves[index] or '/' for index in failed])
+                for index, attr in zip(failed, existing):
+                    if isinstance(attr, Exception) or not stat.S_ISDIR(attr.st_mode):
+                        errors[index] = str(mkdir_errors.get(leaves[index]) or attr)
+            self.invalidate_listings(conn, paths, ancestors=True)
+            return errors
+        except (paramiko.SSHException, EOFError, socket.error) as e:
+            logger.warning(f"SFTP mkdir unavailable ({e}), falling back to shell commands")
+        errors = self._shell_file_commands(conn, 'mkdir', [(path,) for path in paths])
+        self.invalidate_listings(conn, paths, ancestors=True)
+        return errors
+
+    def make_remote_dir(self, conn, path):
+        """Create one remote folder and any missing parents"""
+        error = self.make_remote_dirs(conn, [path])[0]
+        return {'success': error is None, 'error': error}
+
+    def rename_remote_many(self, conn, pairs):
+        """Rename remote items, pipelined; returns an error or None per (old, new) pair.
+
+        Uses posix-rename where the server has it and plain SFTP rename
+        otherwise, then the shell if SFTP itself is unavailable.
+        """
+        try:
+            with self.sftp_channel(conn, interactive=True) as sftp:
+                pipeline = SFTPPipeline(sftp)
+                errors = [pipeline.error(reply) for reply in pipeline.run(
+                    [(paramiko.sftp.CMD_EXTENDED, 'posix-rename@openssh.com', old, new) for old, new in pairs])]
+                # Servers without the extension answer with an error that has no errno
+                retry = [index for index, error in enumerate(errors) if error is not None and error.errno is None]
+                replies = pipeline.run([(paramiko.sftp.CMD_RENAME,) + tuple(pairs[index]) for index in retry])
+                for index, reply in zip(retry, replies):
+                    errors[index] = pipeline.error(reply)
+            errors = [str(error) if error is not None else None for error in errors]
+        except (paramiko.SSHException, EOFError, socket.error) as e:
+            logger.warning(f"SFTP rename unavailable ({e}), falling back to shell commands")
+            errors = self._shell_file_commands(conn, 'move', pairs)
+        self.invalidate_listings(conn, [path for pair in pairs for path in pair])
+        return errors
+
+    def rename_remote(self, conn, old_path, new_path):
+        """Rename one remote item"""
+        error = self.rename_remote_many(conn, [(old_path, new_path)])[0]
+        return {'success': error is None, 'error': error}
+
+    def chmod_remote_many(self, conn, pairs):
+        """Set permissions on remote items, pipelined; returns an error or None per (path, mode) pair"""
+        try:
+            with self.sftp_channel(conn, interactive=True) as sftp:
+                pipeline = SFTPPipeline(sftp)
+                requests = []
+                for path, mode in pairs:
+                    attr = paramiko.SFTPAttributes()
+                    attr.st_mode = mode
+                    requests.append((paramiko.sftp.CMD_SETSTAT, path, attr))
+                errors = [str(error) if error is not None else None
+                          for error in (pipeline.error(reply) for reply in pipeline.run(requests))]
+        except (paramiko.SSHException, EOFError, socket.error) as e:
+            logger.warning(f"SFTP chmod unavailable ({e}), falling back to shell commands")
+            errors = self._shell_file_commands(conn, 'chmod', [(format(mode, 'o'), path) for path, mode in pairs])
+        self.invalidate_listings(conn, [path for path, _ in pairs])
+        return errors
+
+    def copy_remote_many(self, conn, pairs):
+        """Copy remote items on the server; returns an error or None per (source, destination) pair.
+
+        SFTP has no copy request, so these always run as one shell batch.
+        """
+        errors = self._shell_file_commands(conn, 'copy', pairs)
+        self.invalidate_listings(conn, [destination for _, destination in pairs])
+        return errors
+
+    def _sftp_delete_paths(self, sftp, paths, job=None):
+        """Delete files and folder trees over SFTP; returns {path: error} for failures.
+
+        The trees are walked level by level with every level's directory
+        listings pipelined, the files found are removed in pipelined batches
+        as the walk goes, and folders are removed deepest level first. A
+        DeletionJob, if given, gets progress reports and can stop the walk.
+        """
+        pipeline = SFTPPipeline(sftp)
+        failures = {}
+        
+        def remove(command, targets):
+            replies = pipeline.run([(command, path) for path, _ in targets])
+            for (path, size), reply in zip(targets, replies):
+                error = pipeline.error(reply)
+                if error is not None:
+                    failures.setdefault(path, str(error))
+                elif job is not None:
+                    job.removed(size, is_dir=command == paramiko.sftp.CMD_RMDIR)
+        
+        files = []
+        levels = []
+        level = []
+        for path, attr in zip(paths, pipeline.lstat_many(paths)):
+            if isinstance(attr, Exception):
+                failures[path] = str(attr)
+            elif stat.S_ISDIR(attr.st_mode):
+                level.append(path)
+            else:
+                files.append((path, attr.st_size or 0))
+        remove(paramiko.sftp.CMD_REMOVE, files)
+        
+        while level and not (job and job.cancelled()):
+            levels.append(level)
+            next_level = []
+            # Bounded so a wide level never holds more open handles than the window
+            for start in range(0, len(level), pipeline.window):
+                if job and job.cancelled():
+                    break
+                entries, errors = pipeline.list_many(level[start:start + pipeline.window])
+                failures.update({directory: str(error) for directory, error in errors.items()})
+                files = []
+                for directory, items in entries.items():
+                    for item in items:
+                        item_path = os.path.join(directory, item.filename).replace('\\', '/')
+                        if stat.S_ISDIR(item.st_mode):
+                            next_level.append(item_path)
+                        else:
+                            files.append((item_path, item.st_size or 0))
+                remove(paramiko.sftp.CMD_REMOVE, files)
+            level = next_level
+        
+        for level in reversed(levels):
+            if job and job.cancelled():
+                break
+            remove(paramiko.sftp.CMD_RMDIR, [(path, 0) for path in level])
+        return failures
+
+    def delete_remote_paths(self, conn, paths):
+        """Delete remote files and folders; returns {path: error} for the paths that failed"""
+        try:
+            with self.sftp_channel(conn) as sftp:
+                failures = self._sftp_delete_paths(sftp, paths)
+            failed = {}
+            for path in paths:
+                prefix = path.rstrip('/') + '/'
+                errors = [f"{item}: {error}" for item, error in failures.items() if item == path or item.startswith(prefix)]
+                if errors:
+                    failed[path] = errors[0] if len(errors) == 1 else f"{errors[0]} (and {len(errors) - 1} more)"
+            self.invalidate_listings(conn, paths)
+            return failed
+        except (paramiko.SSHException, EOFError, socket.error) as e:
+            logger.warning(f"SFTP delete unavailable ({e}), falling back to shell commands")
+        
+        # Shell fallback: rm -rf handles files and folders alike, so only Windows needs a stat
+        remote_os = conn.get('remote_os', 'unix')
+        operations = {'delete_dir': [], 'delete_file': []}
+        for path in paths:
+            is_directory = True
+            if remote_os == 'windows':
+                try:
+                    with self.sftp_channel(conn, interactive=True) as sftp:
+                        is_directory = stat.S_ISDIR(sftp.stat(path).st_mode)
+                except:
+                    is_directory = False
+            operations['delete_dir' if is_directory else 'delete_file'].append(path)
+        
+        failed = {}
+        for operation, targets in operations.items():
+            if targets:
+                for path, error in zip(targets, self._shell_file_commands(conn, operation, [(path,) for path in targets])):
+                    if error is not None:
+                        failed[path] = f"{path}: {error}"
+        self.invalidate_listings(conn, paths)
+        return failed
+
+    @contextmanager
+    def sftp_channel(self, conn, interactive=False):
+        """Use an SFTP channel from the connection's pool.
+
+        Interactive operations get the reserved lane; everything else checks
+        out a bulk channel so long transfers don't block browsing.
+        """
+        pool = conn.get('sftp_pool')
+        if pool is None:
+            yield conn['sftp']
+        elif interactive:
+            with pool.interactive_channel() as sftp:
+                yield sftp
+        else:
+            with pool.channel() as sftp:
+                yield sftp
+
+    def _release_transport(self, conn):
+        """Give a connection's pooled transport lease back exactly once"""
+        ssh = conn.get('ssh')
+        if ssh is not None and not conn.get('transport_released'):
+            conn['transport_released'] = True
+            self.transport_pool.release(ssh)
+
     def close_connection(self, session_id):
         """Close connection"""
+        self.transfer_tables.pop(session_id, None)
+        self.scheduler.cancel(f"keepalive:{session_id}")
+        job = self.deletion_jobs.get(session_id)
+        if job is not None and job.side == 'remote':
+            job.cancel()
+        search = self.remote_searches.pop(session_id, None)
+        if search is not None:
+            search.cancel()
+        watch = self.remote_watches.pop(session_id, None)
+        if watch is not None:
+            watch.cancel()
         if session_id in self.connections:
             try:
                 conn = self.connections[session_id]
-                conn['sftp'].close()
-                conn['ssh'].close()
+                self._close_sftp_channels(conn)
+                self._release_transport(conn)
                 del self.connections[session_id]
                 logger.info(f"Connection {session_id} closed")
             except Exception as e:
                 logger.error(f"Error closing connection: {e}")
     
+    def _ensure_reaper(self):
+        if 'session-reaper' not in self.scheduler.jobs:
+            self.scheduler.schedule('session-reaper', self._reap_connections, SESSION_REAPER_INTERVAL)
+
+    def _eviction_candidates(self):
+        """Sessions that may be evicted, least recently used first"""
+        idle = [(conn.get('last_activity', datetime.min), session_id)
+                for session_id, conn in list(self.connections.items())
+                if not conn.get('transfer_active', False)]
+        return [session_id for _, session_id in sorted(idle)]
+
+    def _enforce_connection_cap(self, reserve=0):
+        """Evict least recently used sessions until there is room under the cap"""
+        excess = len(self.connections) + reserve - SESSION_MAX_CONNECTIONS
+        for session_id in self._eviction_candidates()[:max(0, excess)]:
+            self.evict_connection(session_id, 'capacity')
+
+    def _reap_connections(self):
+        """Evict idle sessions and enforce connection and memory limits; runs on the scheduler"""
+        now = datetime.now()
+        for session_id in self._eviction_candidates():
+            conn = self.connections.get(session_id)
+            if conn and (now - conn.get('last_activity', now)).total_seconds() > SESSION_IDLE_TIMEOUT:
+                self.evict_connection(session_id, 'idle_timeout')
+        
+        self._enforce_connection_cap()
+        
+        # Under memory pressure shed a tenth of the remaining idle sessions per pass
+        rss_mb = _process_rss_mb()
+        if rss_mb is not None and rss_mb > SESSION_MEMORY_LIMIT_MB:
+            candidates = self._eviction_candidates()
+            logger.warning(f"Memory at {rss_mb:.0f} MB exceeds {SESSION_MEMORY_LIMIT_MB} MB, shedding idle sessions")
+            for session_id in candidates[:max(1, len(candidates) // 10)]:
+                self.evict_connection(session_id, 'memory_pressure')
+        
+        cutoff = time.time() - SESSION_TOMBSTONE_TTL
+        for session_id, tombstone in list(self.tombstones.items()):
+            if tombstone['evicted_at'] < cutoff:
+                self.tombstones.pop(session_id, None)
+        return SESSION_REAPER_INTERVAL
+
+    def evict_connection(self, session_id, reason):
+        """Close a session on the server's initiative, leaving a tombstone for its browser"""
+        conn = self.connections.get(session_id)
+        if not conn:
+            return False
+        self.tombstones[session_id] = {
+            'reason': reason,
+            'host': conn['host'],
+            'username': conn['username'],
+            'port': conn['port'],
+            'evicted_at': time.time()
+        }
+        while len(self.tombstones) > SESSION_TOMBSTONE_MAX:
+            self.tombstones.popitem(last=False)
+        self.eviction_counts[reason] = self.eviction_counts.get(reason, 0) + 1
+        logger.info(f"Evicting session {session_id} ({conn['username']}@{conn['host']}): {reason}")
+        self.close_connection(session_id)
+        return True
+
+    def get_tombstone(self, session_id):
+        """Why a session was evicted, if it was"""
+        tombstone = self.tombstones.get(session_id)
+        if tombstone and time.time() - tombstone['evicted_at'] < SESSION_TOMBSTONE_TTL:
+            return tombstone
+        return None
+
+    def session_limits(self):
+        """Current session counts against the eviction limits"""
+        rss_mb = _process_rss_mb()
+        return {
+            'connections': len(self.connections),
+            'max_connections': SESSION_MAX_CONNECTIONS,
+            'idle_timeout': SESSION_IDLE_TIMEOUT,
+            'memory_mb': round(rss_mb, 1) if rss_mb is not None else None,
+            'memory_limit_mb': SESSION_MEMORY_LIMIT_MB,
+            'evictions': dict(self.eviction_counts),
+            'tombstones': len(self.tombstones)
+        }
+
     def get_connection(self, session_id):
         """Get existing connection for session"""
         if session_id in self.connections:
@@ -1022,79 +4020,765 @@ class SCPManager:
             return conn_info
         return None
     
-    def list_remote_directory(self, session_id, path='/'):
-        """List remote directory contents"""
+    def invalidate_listings(self, conn, paths, ancestors=False):
+        """Drop cached remote listings and size index rows affected by changes to the given paths"""
+        cache = conn.get('listing_cache')
+        if cache is not None:
+            for path in paths:
+                cache.invalidate(path, ancestors=ancestors)
+        self.size_index.invalidate(self._size_index_scope(conn), paths)
+
+    @staticmethod
+    def _size_index_scope(conn):
+        """Size index scope of a connection's server"""
+        return f"{conn.get('username')}@{conn.get('host')}:{conn.get('port', 22)}"
+
+    def measure_local_tree(self, folder_path, refresh=False):
+        """Size and counts below a local folder, from the persistent size index"""
+        return self.size_index.measure('local', os.path.abspath(folder_path), LocalTreeReader(), sep=os.sep, refresh=refresh)
+
+    def measure_remote_tree(self, conn, sftp, folder_path, refresh=False):
+        """Size and counts below a remote folder, from the persistent size index"""
+        root = folder_path.replace('\\', '/').rstrip('/') or '/'
+        reader = RemoteTreeReader(sftp, clock_offset=self._remote_clock_offset(conn))
+        return self.size_index.measure(self._size_index_scope(conn), root, reader, refresh=refresh)
+
+    def _remote_clock_offset(self, conn):
+        """Lower bound of the server's clock minus ours, in seconds, or None; read once per connection"""
+        if 'clock_offset' not in conn:
+            offset = None
+            if conn.get('remote_os') != 'windows' and conn.get('ssh') is not None:
+                try:
+                    probe = self.run_remote_command(conn, 'date +%s')
+                    if probe['exit_code'] == 0:
+                        # date printed a whole second no later than its own moment, which came before now
+                        offset = int(probe['stdout'].strip()) - time.time()
+                except Exception as e:
+                    logger.warning(f"Could not read the remote clock: {e}")
+            conn['clock_offset'] = offset
+        return conn['clock_offset']
+
+    @staticmethod
+    def _remote_listing_item(path, item):
+        """Listing entry for one remote SFTPAttributes"""
+        is_dir = stat.S_ISDIR(item.st_mode)
+        return {
+            'name': item.filename,
+            'path': os.path.join(path, item.filename).replace('\\', '/'),
+            'is_directory': is_dir,
+            'size': item.st_size if not is_dir else 0,
+            'modified': datetime.fromtimestamp(item.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+            'permissions': oct(item.st_mode)[-3:],
+            'owner': getattr(item, 'st_uid', 'unknown'),
+            'group': getattr(item, 'st_gid', 'unknown')
+        }
+
+    @staticmethod
+    def _remote_subfolders(path, attrs):
+        """(path, directory size) for the folders among some SFTPAttributes"""
+        return [(os.path.join(path, attr.filename).replace('\\', '/'), attr.st_size or 0)
+                for attr in attrs if stat.S_ISDIR(attr.st_mode or 0)]
+
+    def _read_remote_listing(self, sftp, path):
+        """Read and format one remote listing; returns (listing, subfolders)"""
+        attrs = sftp.listdir_attr(path)
+        items = [self._remote_listing_item(path, item) for item in attrs]
+        
+        # Sort: directories first, then files
+        listing = _sorted_listing(path, items, [item.st_mtime for item in attrs], [item.st_mode for item in attrs])
+        listing['version'] = _listing_version(path, listing['items'])
+        return listing, self._remote_subfolders(path, attrs)
+
+    def prefetch_after_listing(self, conn, path):
+        """Remember a visit and queue background listings of the folders likely opened next.
+
+        Recently visited subfolders (and the parent) come first, then the
+        smallest visible subfolders. Already cached folders are skipped.
+        """
+        if not LISTING_PREFETCH_ENABLED or conn.get('sftp_pool') is None:
+            return
+        cache = conn['listing_cache']
+        key = ListingCache._key(path)
+        
+        subfolders = cache.subfolders_of(key)
+        children = {child for child, _ in subfolders}
+        parent = key.rsplit('/', 1)[0] or '/'
+        small = [child for child, size in sorted(subfolders, key=lambda folder: folder[1])
+                 if size <= LISTING_PREFETCH_MAX_DIR_BYTES and not child.rsplit('/', 1)[-1].startswith('.')]
+        
+        # Listings of one connection can be served by several request threads at once
+        with self.prefetch_lock:
+            visits = conn.setdefault('listing_visits', OrderedDict())
+            recent = [visited for visited in reversed(visits) if visited in children or (visited == parent != key)]
+            visits[key] = time.time()
+            visits.move_to_end(key)
+            while len(visits) > LISTING_CACHE_MAX_ENTRIES:
+                visits.popitem(last=False)
+        
+        candidates = []
+        for candidate in recent + small:
+            if candidate not in candidates and not cache.fresh(candidate):
+                candidates.append(candidate)
+            if len(candidates) >= LISTING_PREFETCH_PER_LISTING:
+                break
+        if not candidates:
+            return
+        
+        with self.prefetch_lock:
+            stats = conn.setdefault('prefetch_stats', {'scheduled': 0, 'fetched': 0, 'skipped_busy': 0, 'skipped_budget': 0, 'failed': 0})
+            stats['scheduled'] += len(candidates)
+            # The newest navigation replaces prefetches not started yet
+            conn['prefetch_pending'] = candidates
+            if conn.get('prefetch_running'):
+                return
+            conn['prefetch_running'] = True
+        self.prefetch_executor.submit(self._run_prefetches, conn)
+
+    def _run_prefetches(self, conn):
+        """Worker: prefetch the connection's pending folders until none are left"""
+        while True:
+            with self.prefetch_lock:
+                paths = conn.pop('prefetch_pending', None)
+                if not paths:
+                    conn['prefetch_running'] = False
+                    return
+            try:
+                self._prefetch_listings(conn, paths)
+            except Exception as e:
+                logger.debug(f"Listing prefetch failed: {e}")
+
+    def _take_prefetch_budget(self, conn):
+        """Spend one prefetch from the connection's per-minute budget"""
+        now = time.time()
+        with self.prefetch_lock:
+            budget = conn.setdefault('prefetch_budget', {'window_start': now, 'used': 0})
+            if now - budget['window_start'] >= 60:
+                budget['window_start'] = now
+                budget['used'] = 0
+            if budget['used'] >= LISTING_PREFETCH_BUDGET:
+                return False
+            budget['used'] += 1
+            return True
+
+    def _count_prefetch(self, conn, outcome, count=1):
+        """Add to one of the connection's prefetch counters"""
+        with self.prefetch_lock:
+            conn['prefetch_stats'][outcome] += count
+
+    def _prefetch_listings(self, conn, paths):
+        """List folders into the cache on a spare bulk channel, yielding to any transfer"""
+        pool = conn.get('sftp_pool')
+        cache = conn['listing_cache']
+        sftp = None if conn.get('transfer_active') else pool.checkout_if_quiet()
+        if sftp is None:
+            self._count_prefetch(conn, 'skipped_busy', len(paths))
+            return
+        try:
+            for index, path in enumerate(paths):
+                if conn.get('transfer_active') or pool.closed:
+                    self._count_prefetch(conn, 'skipped_busy', len(paths) - index)
+                    return
+                if cache.fresh(path):
+                    continue
+                if not self._take_prefetch_budget(conn):
+                    self._count_prefetch(conn, 'skipped_budget', len(paths) - index)
+                    return
+                generation = cache.generation
+                try:
+                    listing, subfolders = self._read_remote_listing(sftp, path)
+                except Exception as e:
+                    # Typically a folder we may not read; the user will see the error if they open it
+                    self._count_prefetch(conn, 'failed')
+                    logger.debug(f"Prefetch of {path} failed: {e}")
+                    continue
+                if cache.put(path, listing, subfolders, generation=generation, prefetched=True):
+                    self._count_prefetch(conn, 'fetched')
+        finally:
+            pool.checkin(sftp)
+
+    def stream_remote_directory(self, conn, path='/', refresh=False):
+        """Yield NDJSON lines for a remote listing as the server's READDIR replies arrive.
+
+        The first line is ``{"event": "start"}``, then one line per entry in
+        server order, one chunk per READDIR reply, and finally
+        ``{"event": "end"}`` (or ``{"event": "error"}``). A completed stream
+        fills the listing cache, so the sorted listing that follows is a cache hit.
+        """
+        cache = conn.get('listing_cache')
+        if cache is None:
+            cache = conn['listing_cache'] = ListingCache()
+        cached = None if refresh else cache.get(path)
+        yield json.dumps({'event': 'start', 'current_path': path, 'cached': cached is not None}) + '\n'
+        
+        if cached is not None:
+            items = cached[1]['items']
+            for start in range(0, len(items), LISTING_PAGE_SIZE):
+                yield ''.join(json.dumps(item) + '\n' for item in items[start:start + LISTING_PAGE_SIZE])
+            self.prefetch_after_listing(conn, path)
+            yield json.dumps({'event': 'end', 'total': len(items)}) + '\n'
+            return
+        
+        items = []
+        mtimes = []
+        modes = []
+        subfolders = []
+        generation = cache.generation
+        # The lane is held only while a batch is read, never while a slow client takes it;
+        # replies to the read-ahead requests are routed back to the pipeline by number
+        # even when another request on the lane reads them in between
+        batches = None
+        try:
+            with self.sftp_channel(conn, interactive=True) as sftp:
+                batches = SFTPPipeline(sftp).iter_dir(path)
+                batch = next(batches, None)
+            while batch is not None:
+                entries = [self._remote_listing_item(path, attr) for attr in batch]
+                items.extend(entries)
+                mtimes.extend(attr.st_mtime for attr in batch)
+                modes.extend(attr.st_mode for attr in batch)
+                subfolders.extend(self._remote_subfolders(path, batch))
+                yield ''.join(json.dumps(entry) + '\n' for entry in entries)
+                with self.sftp_channel(conn, interactive=True):
+                    batch = next(batches, None)
+        except Exception as e:
+            logger.error(f"Error streaming remote directory {path}: {e}")
+            yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+            return
+        finally:
+            if batches is not None:
+                # Stopping early still reads the outstanding replies and closes the handle
+                with self.sftp_channel(conn, interactive=True):
+                    batches.close()
+        
+        listing = _sorted_listing(path, items, mtimes, modes)
+        listing['version'] = _listing_version(path, listing['items'])
+        cache.put(path, listing, subfolders, generation=generation)
+        self.prefetch_after_listing(conn, path)
+        yield json.dumps({'event': 'end', 'total': len(items)}) + '\n'
+
+    def _remote_find_available(self, conn):
+        """Whether the server's find understands -printf (GNU find); probed once per connection"""
+        if 'find_printf' not in conn:
+            available = False
+            if conn.get('remote_os') != 'windows' and conn.get('ssh') is not None:
+                try:
+                    probe = self.run_remote_command(conn, "find / -maxdepth 0 -printf '' >/dev/null 2>&1")
+                    available = probe['exit_code'] == 0
+                except Exception as e:
+                    logger.warning(f"Could not probe remote find: {e}")
+            conn['find_printf'] = available
+        return conn['find_printf']
+
+    def _search_with_find(self, conn, search):
+        """Yield candidate entries printed by a remote find, or None while it is quiet"""
+        channel = conn['ssh'].get_transport().open_session()
+        try:
+            channel.exec_command(search.find_command())
+            pending = b''
+            while not search.cancelled:
+                select.select([channel], [], [], SEARCH_POLL_INTERVAL)
+                if channel.recv_ready():
+                    records = (pending + channel.recv(65536)).split(b'\0')
+                    pending = records.pop()
+                    for record in records:
+                        search.scanned += 1
+                        try:
+                            yield search.find_item(record)
+                        except ValueError:
+                            logger.warning(f"Skipping unreadable find output: {record[:200]!r}")
+                elif channel.exit_status_ready():
+                    # find exits 1 when some folders could not be read
+                    if channel.recv_exit_status() != 0:
+                        search.warning = 'Some folders could not be read'
+                    return
+                else:
+                    yield None
+        finally:
+            channel.close()
+
+    def _search_with_sftp(self, conn, search):
+        """Yield entries of a breadth-first SFTP walk, listing one window of folders per round trip"""
+        with self.sftp_channel(conn) as sftp:
+            pipeline = SFTPPipeline(sftp)
+            level = [search.root]
+            depth = 0
+            while level and not search.cancelled:
+                depth += 1
+                deeper = []
+                for start in range(0, len(level), pipeline.window):
+                    if search.cancelled:
+                        return
+                    entries, errors = pipeline.list_many(level[start:start + pipeline.window])
+                    if errors:
+                        search.warning = 'Some folders could not be read'
+                    for directory, attrs in entries.items():
+                        search.scanned += len(attrs)
+                        for attr in attrs:
+                            item = self._remote_listing_item(directory, attr)
+                            if item['is_directory']:
+                                deeper.append(item['path'])
+                            yield item
+                    yield None
+                if search.max_depth and depth >= search.max_depth:
+                    return
+                level = deeper
+
+    def search_remote(self, conn, search, method='auto'):
+        """Yield NDJSON lines for a remote search as matches are found.
+
+        ``start`` carries the search id (for cancelling) and the method in
+        use, matches follow in batches sent at least every
+        SEARCH_FLUSH_INTERVAL, and ``end`` reports the totals and whether the
+        limit or a cancel stopped the search. A new search cancels the
+        session's previous one.
+        """
+        previous = self.remote_searches.get(search.session_id)
+        if previous is not None:
+            previous.cancel()
+        self.remote_searches[search.session_id] = search
+        try:
+            try:
+                with self.sftp_channel(conn, interactive=True) as sftp:
+                    if not stat.S_ISDIR(sftp.stat(search.root).st_mode or 0):
+                        raise IOError(f"Not a folder: {search.root}")
+                use_find = method == 'find' or (method == 'auto' and self._remote_find_available(conn))
+            except Exception as e:
+                yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+                return
+            search.method = 'find' if use_find else 'sftp'
+            logger.info(f"🔍 Searching {search.root} for '{search.expression}' with {search.method}")
+            yield json.dumps({'event': 'start', 'search_id': search.search_id, 'method': search.method,
+                              'root': search.root, 'query': search.expression, 'limit': search.limit}) + '\n'
+            
+            source = self._search_with_find(conn, search) if use_find else self._search_with_sftp(conn, search)
+            batch = []
+            flushed = time.time()
+            try:
+                for item in source:
+                    if item is not None and search.matches(item):
+                        batch.append(item)
+                        search.found += 1
+                        if search.found >= search.limit:
+                            search.limit_reached = True
+                            break
+                    if batch and (len(batch) >= SEARCH_FLUSH_BATCH or time.time() - flushed >= SEARCH_FLUSH_INTERVAL):
+                        yield ''.join(json.dumps(entry) + '\n' for entry in batch)
+                        batch = []
+                        flushed = time.time()
+            except Exception as e:
+                logger.error(f"Error searching {search.root}: {e}")
+                yield ''.join(json.dumps(entry) + '\n' for entry in batch) + json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+                return
+            finally:
+                source.close()
+            yield ''.join(json.dumps(entry) + '\n' for entry in batch) + json.dumps(search.summary()) + '\n'
+        finally:
+            if self.remote_searches.get(search.session_id) is search:
+                del self.remote_searches[search.session_id]
+
+    def cancel_remote_search(self, session_id, search_id=None):
+        """Cancel the session's running search (only if it is ``search_id``, when given)"""
+        search = self.remote_searches.get(session_id)
+        if search is None or (search_id and search.search_id != search_id):
+            return False
+        search.cancel()
+        return True
+
+    def _remote_inotify_available(self, conn):
+        """Whether the server has inotifywait; probed once per connection"""
+        if 'inotifywait' not in conn:
+            available = False
+            if conn.get('remote_os') != 'windows' and conn.get('ssh') is not None:
+                try:
+                    available = self.run_remote_command(conn, 'command -v inotifywait >/dev/null 2>&1')['exit_code'] == 0
+                except Exception as e:
+                    logger.warning(f"Could not probe remote inotifywait: {e}")
+            conn['inotifywait'] = available
+        return conn['inotifywait']
+
+    @staticmethod
+    def _listing_changes(old, new):
+        """(added entries, modified entries, removed names) between two listings of a folder"""
+        before = {item['name']: item for item in old['items']}
+        after = {item['name']: item for item in new['items']}
+        added = [item for name, item in after.items() if name not in before]
+        modified = [item for name, item in after.items() if name in before and before[name] != item]
+        removed = [name for name in before if name not in after]
+        return added, modified, removed
+
+    def _patch_listing(self, path, listing, attrs):
+        """A copy of a folder's listing with some entries replaced: name -> SFTPAttributes, or None if gone"""
+        entries = {item['name']: (item, mtime, mode)
+                   for item, mtime, mode in zip(listing['items'], listing['_mtimes'], listing['_modes'])}
+        for name, attr in attrs.items():
+            if attr is None:
+                entries.pop(name, None)
+            else:
+                entries[name] = (self._remote_listing_item(path, attr), attr.st_mtime, attr.st_mode)
+        rows = list(entries.values())
+        patched = _sorted_listing(path, [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows])
+        patched['version'] = _listing_version(path, patched['items'])
+        return patched
+
+    def _watch_baseline(self, conn, watch):
+        """Stat each watched folder and take its listing from the cache, or read it; raises IOError"""
+        cache = conn.get('listing_cache')
+        if cache is None:
+            cache = conn['listing_cache'] = ListingCache()
+        with self.sftp_channel(conn, interactive=True) as sftp:
+            attrs = SFTPPipeline(sftp).stat_many(watch.paths)
+            stated_at = time.time()
+            for path, attr in zip(watch.paths, attrs):
+                if isinstance(attr, Exception) or not stat.S_ISDIR(attr.st_mode or 0):
+                    raise IOError(f"Not a folder: {path}")
+                watch.mtimes[path] = attr.st_mtime
+                watch.seen_at[path] = stated_at
+                cached = cache.get(path)
+                if cached is not None and '_mtimes' in cached[1]:
+                    watch.listed_at[path], watch.listings[path] = cached
+                    continue
+                generation = cache.generation
+                watch.listed_at[path] = time.time()
+                watch.listings[path], subfolders = self._read_remote_listing(sftp, path)
+                cache.put(path, watch.listings[path], subfolders, generation=generation)
+
+    def _store_watched_listing(self, conn, watch, path, listing, generation, subfolders=None):
+        """Record a watched folder's new listing and cache it; returns its change line, or None if nothing visible changed"""
+        added, modified, removed = self._listing_changes(watch.listings[path], listing)
+        watch.listings[path] = listing
+        if not (added or modified or removed):
+            return None
+        cache = conn['listing_cache']
+        if subfolders is None:
+            sizes = dict(cache.subfolders_of(path))
+            subfolders = [(item['path'], sizes.get(item['path'], 0)) for item in listing['items'] if item['is_directory']]
+        cache.put(path, listing, subfolders, generation=generation)
+        # Files rewritten in place leave their folder's mtime alone, so the size index is told directly
+        rewritten = [item['path'] for item in modified if not item['is_directory']]
+        if rewritten:
+            self.size_index.invalidate(self._size_index_scope(conn), rewritten)
+        watch.changes += 1
+        return json.dumps({'event': 'change', 'path': path, 'added': added, 'modified': modified, 'removed': removed,
+                           'total': len(listing['items']), 'version': listing['version']}) + '\n'
+
+    def _apply_watch_changes(self, conn, watch, touched):
+        """Change lines for touched folders: read the named entries again, or list the folder again for None"""
+        lines = []
+        cache = conn['listing_cache']
+        generation = cache.generation
+        with self.sftp_channel(conn, interactive=True) as sftp:
+            pipeline = SFTPPipeline(sftp)
+            for path, names in touched.items():
+                if path not in watch.listings:
+                    continue
+                subfolders = None
+                if names is None:
+                    listed_at = time.time()
+                    try:
+                        listing, subfolders = self._read_remote_listing(sftp, path)
+                    except FileNotFoundError:
+                        watch.paths.remove(path)
+                        del watch.listings[path]
+                        self.invalidate_listings(conn, [path])
+                        watch.changes += 1
+                        lines.append(json.dumps({'event': 'gone', 'path': path}) + '\n')
+                        continue
+                    watch.listed_at[path] = listed_at
+                else:
+                    names = sorted(names)
+                    attrs = pipeline.lstat_many([os.path.join(path, name).replace('\\', '/') for name in names])
+                    for name, attr in zip(names, attrs):
+                        if not isinstance(attr, Exception):
+                            attr.filename = name
+                    listing = self._patch_listing(path, watch.listings[path],
+                                                  {name: None if isinstance(attr, Exception) else attr for name, attr in zip(names, attrs)})
+                line = self._store_watched_listing(conn, watch, path, listing, generation, subfolders)
+                if line:
+                    lines.append(line)
+        return lines
+
+    def _check_watched_folders(self, conn, watch):
+        """Change lines for watched folders whose mtime moved since they were listed, or too recently to be sure"""
+        clock_offset = self._remote_clock_offset(conn)
+        with self.sftp_channel(conn, interactive=True) as sftp:
+            attrs = SFTPPipeline(sftp).stat_many(watch.paths)
+        stated_at = time.time()
+        stale = {}
+        for path, attr in zip(list(watch.paths), attrs):
+            mtime = None if isinstance(attr, Exception) else attr.st_mtime
+            if mtime is None or mtime != watch.mtimes[path]:
+                watch.mtimes[path] = mtime
+                watch.seen_at[path] = stated_at
+                stale[path] = None
+            elif not _mtime_settled(mtime, watch.seen_at[path], watch.listed_at[path], clock_offset, WATCH_MTIME_SLACK):
+                stale[path] = None
+        return self._apply_watch_changes(conn, watch, stale) if stale else []
+
+    def _follow_inotify(self, conn, watch):
+        """Yield change lines from inotifywait on an exec channel; raises IOError if it can't run or stops"""
+        channel = conn['ssh'].get_transport().open_session()
+        try:
+            channel.exec_command(watch.inotify_command())
+            # inotifywait says so on stderr once its watches are in place;
+            # anything that changed before then is caught by an mtime check
+            errors = b''
+            deadline = time.time() + WATCH_START_TIMEOUT
+            while b'Watches established' not in errors:
+                if watch.cancelled:
+                    return
+                if time.time() > deadline or (channel.exit_status_ready() and not channel.recv_stderr_ready()):
+                    raise IOError(errors.decode(errors='replace').strip() or 'inotifywait did not start')
+                select.select([channel], [], [], WATCH_SETTLE_INTERVAL)
+                if channel.recv_stderr_ready():
+                    errors += channel.recv_stderr(4096)
+            yield from self._check_watched_folders(conn, watch)
+            
+            pending = b''
+            touched = {}
+            gathering = None
+            while watch.paths and not watch.cancelled:
+                select.select([channel], [], [], WATCH_SETTLE_INTERVAL)
+                while channel.recv_stderr_ready():
+                    channel.recv_stderr(4096)
+                quiet = not channel.recv_ready()
+                if not quiet:
+                    pending += channel.recv(65536)
+                    complete, newline, rest = pending.rpartition(b'\n')
+                    text = complete.decode(errors='replace')
+                    # A quoted name can itself hold a newline; wait for the rest of it
+                    if newline and text.count('"') % 2 == 0:
+                        pending = rest
+                        for record in csv.reader(io.StringIO(text)):
+                            watch.note_event(touched, record)
+                        if touched and gathering is None:
+                            gathering = time.time()
+                if touched and (quiet or time.time() - gathering >= WATCH_SETTLE_INTERVAL):
+                    yield from self._apply_watch_changes(conn, watch, touched)
+                    touched = {}
+                    gathering = None
+                elif quiet and channel.exit_status_ready():
+                    # inotifywait exits by itself once every watched folder is gone
+                    if watch.paths:
+                        raise IOError(f"inotifywait exited with status {channel.recv_exit_status()}")
+                    return
+                elif watch.heartbeat_due():
+                    yield json.dumps({'event': 'heartbeat'}) + '\n'
+        finally:
+            channel.close()
+
+    def _follow_polling(self, conn, watch):
+        """Yield change lines from checking the watched folders' mtimes every WATCH_POLL_INTERVAL"""
+        while watch.paths and not watch.cancel_event.wait(WATCH_POLL_INTERVAL):
+            lines = self._check_watched_folders(conn, watch)
+            if lines:
+                yield from lines
+            elif watch.heartbeat_due():
+                yield json.dumps({'event': 'heartbeat'}) + '\n'
+
+    def watch_remote(self, conn, watch, method='auto'):
+        """Yield NDJSON lines for changes in the watched remote folders until cancelled.
+
+        ``start`` carries the watch id (for cancelling), the method in use and
+        each folder's listing version. Every ``change`` line lists the entries
+        added, modified and removed in one folder, which are applied to the
+        listing cache as well. ``gone`` means a watched folder was removed,
+        and ``heartbeat`` lines keep a quiet feed alive. If inotifywait stops,
+        the watch carries on by polling. A new watch cancels the session's
+        previous one.
+        """
+        previous = self.remote_watches.get(watch.session_id)
+        if previous is not None:
+            previous.cancel()
+        self.remote_watches[watch.session_id] = watch
+        try:
+            try:
+                self._watch_baseline(conn, watch)
+                use_inotify = method == 'inotify' or (method == 'auto' and self._remote_inotify_available(conn))
+            except Exception as e:
+                yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+                return
+            watch.method = 'inotify' if use_inotify else 'poll'
+            logger.info(f"👁️ Watching {', '.join(watch.paths)} with {watch.method}")
+            yield json.dumps({'event': 'start', 'watch_id': watch.watch_id, 'method': watch.method, 'paths': watch.paths,
+                              'versions': {path: watch.listings[path]['version'] for path in watch.paths}}) + '\n'
+            
+            try:
+                if use_inotify:
+                    source = self._follow_inotify(conn, watch)
+                    try:
+                        for line in source:
+                            watch.last_sent = time.time()
+                            yield line
+                    except IOError as e:
+                        logger.warning(f"inotifywait stopped watching {', '.join(watch.paths)}, polling instead: {e}")
+                        watch.method = 'poll'
+                        yield json.dumps({'event': 'method', 'method': 'poll', 'reason': str(e)}) + '\n'
+                    finally:
+                        source.close()
+                if watch.method == 'poll':
+                    for line in self._follow_polling(conn, watch):
+                        watch.last_sent = time.time()
+                        yield line
+            except Exception as e:
+                logger.error(f"Error watching {', '.join(watch.paths)}: {e}")
+                yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+                return
+            yield json.dumps(watch.summary()) + '\n'
+        finally:
+            if self.remote_watches.get(watch.session_id) is watch:
+                del self.remote_watches[watch.session_id]
+
+    def cancel_remote_watch(self, session_id, watch_id=None):
+        """Stop the session's change feed (only if it is ``watch_id``, when given)"""
+        watch = self.remote_watches.get(session_id)
+        if watch is None or (watch_id and watch.watch_id != watch_id):
+            return False
+        watch.cancel()
+        return True
+
+    def list_remote_directory(self, session_id, path='/', refresh=False, prefetch=True):
+        """List remote directory contents, served from the connection's listing cache when fresh"""
         conn = self.get_connection(session_id)
         if not conn:
             return {'error': 'No connection found'}
         
+        cache = conn.get('listing_cache')
+        if cache is None:
+            cache = conn['listing_cache'] = ListingCache()
+        if not refresh:
+            cached = cache.get(path)
+            if cached is not None:
+                stored_at, listing = cached
+                if prefetch:
+                    self.prefetch_after_listing(conn, path)
+                return dict(listing, cached=True, cache_age=round(time.time() - stored_at, 1))
+        
         try:
-            sftp = conn['sftp']
-            items = []
-            
-            for item in sftp.listdir_attr(path):
-                item_path = os.path.join(path, item.filename).replace('\\', '/')
-                is_dir = stat.S_ISDIR(item.st_mode)
-                
-                items.append({
-                    'name': item.filename,
-                    'path': item_path,
-                    'is_directory': is_dir,
-                    'size': item.st_size if not is_dir else 0,
-                    'modified': datetime.fromtimestamp(item.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'permissions': oct(item.st_mode)[-3:],
-                    'owner': getattr(item, 'st_uid', 'unknown'),
-                    'group': getattr(item, 'st_gid', 'unknown')
-                })
-            
-            # Sort: directories first, then files
-            items.sort(key=lambda x: (not x['is_directory'], x['name'].lower()))
-            
-            return {'items': items, 'current_path': path}
+            generation = cache.generation
+            with self.sftp_channel(conn, interactive=True) as sftp:
+                listing, subfolders = self._read_remote_listing(sftp, path)
+            cache.put(path, listing, subfolders, generation=generation)
+            if prefetch:
+                self.prefetch_after_listing(conn, path)
+            return dict(listing, cached=False)
             
         except Exception as e:
             logger.error(f"Error listing remote directory {path}: {e}")
             return {'error': str(e)}
     
-    def list_local_directory(self, path=None):
-        """List local directory contents with OS-specific default"""
+    def paged_listing(self, owner, load, sort='name', order='asc', expression='', limit=LISTING_PAGE_SIZE, cursor=None):
+        """One page of a sorted, filtered directory listing.
+
+        Without a cursor the directory is listed with ``load()`` and a view
+        built over it; with one the page comes straight from that view, so
+        later pages cost only their own size.
+        """
+        limit = max(1, min(limit, LISTING_PAGE_MAX))
+        if cursor:
+            page = self.listing_pager.page(owner, cursor, limit)
+            if page is None:
+                return {'error': 'Listing cursor has expired, reload the folder', 'cursor_expired': True}
+            return page
+        
+        listing = load()
+        if 'error' in listing:
+            return listing
         try:
-            # Use OS-specific default path if no path is provided
-            if not path or path.strip() == '':
-                path = OS_INFO['default_path']
+            raw = (listing['_mtimes'], listing['_modes']) if '_mtimes' in listing else None
+            view_id = self.listing_pager.create(owner, listing['current_path'], listing['items'], sort, order, expression,
+                                                raw=raw, version=listing.get('version'))
+        except ValueError as e:
+            return {'error': str(e)}
+        page = self.listing_pager.page(owner, f"{view_id}:0", limit)
+        for key in ('cached', 'cache_age', 'version'):
+            if key in listing:
+                page[key] = listing[key]
+        return page
+
+    def _resolve_local_path(self, path):
+        """The folder a local listing of ``path`` shows, with OS-specific defaults, or None"""
+        # Use OS-specific default path if no path is provided
+        if not path or path.strip() == '':
+            path = OS_INFO['default_path']
+        
+        # Normalize Windows paths
+        if OS_INFO['system'] == 'windows':
+            path = os.path.normpath(path)
+            # Handle drive root paths (e.g., "C:" -> "C:\")
+            if len(path) == 2 and path[1] == ':':
+                path = path + '\\'
+        
+        # Allow root directory access
+        if path == '/':
+            # Root directory is allowed
+            pass
+        elif not os.path.exists(path):
+            # If path doesn't exist, default to OS-specific default
+            path = OS_INFO['default_path']
             
-            # Normalize Windows paths
-            if OS_INFO['system'] == 'windows':
-                path = os.path.normpath(path)
-                # Handle drive root paths (e.g., "C:" -> "C:\")
-                if len(path) == 2 and path[1] == ':':
-                    path = path + '\\'
+        if not os.path.exists(path):
+            # Final fallback to user home
+            path = OS_INFO['home_path']
             
-            # Allow root directory access
-            if path == '/':
-                # Root directory is allowed
-                pass
-            elif not os.path.exists(path):
-                # If path doesn't exist, default to OS-specific default
-                path = OS_INFO['default_path']
-                
-            if not os.path.exists(path):
-                # Final fallback to user home
-                path = OS_INFO['home_path']
-                
-            if not os.path.exists(path):
+        return path if os.path.exists(path) else None
+
+    @staticmethod
+    def _local_listing_version(path, rows):
+        """Content version of a local folder from its entries' raw stat fields"""
+        digest = hashlib.blake2b(path.encode(errors='surrogatepass'), digest_size=12)
+        digest.update(repr(sorted(rows)).encode(errors='surrogatepass'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _local_stat_row(name, stat_info):
+        return (name, stat_info.st_mode, stat_info.st_size, stat_info.st_mtime_ns, stat_info.st_uid, stat_info.st_gid)
+
+    def local_listing_version(self, path=None):
+        """The version list_local_directory would report, from stat calls alone, or None.
+
+        Skipping the formatting makes this several times cheaper than the
+        listing, so an unchanged folder can be answered with a 304 without
+        building it.
+        """
+        path = self._resolve_local_path(path)
+        if path is None:
+            return None
+        rows = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        rows.append(self._local_stat_row(entry.name, entry.stat()))
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return self._local_listing_version(path, rows)
+
+    def list_local_directory(self, path=None):
+        """List local directory contents with OS-specific default"""
+        try:
+            path = self._resolve_local_path(path)
+            if path is None:
                 return {'error': 'No accessible path found'}
             
             items = []
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                is_dir = os.path.isdir(item_path)
-                
-                try:
-                    stat_info = os.stat(item_path)
+            rows = []
+            # One stat per entry: the type comes from the stat result that
+            # DirEntry caches, not from a separate isdir() call
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        stat_info = entry.stat()
+                    except OSError as e:
+                        # Skip items we can't access
+                        logger.warning(f"Cannot access {entry.path}: {e}")
+                        continue
+                    is_dir = stat.S_ISDIR(stat_info.st_mode)
+                    rows.append(self._local_stat_row(entry.name, stat_info))
                     items.append({
-                        'name': item,
-                        'path': item_path,
+                        'name': entry.name,
+                        'path': entry.path,
                         'is_directory': is_dir,
                         'size': stat_info.st_size if not is_dir else 0,
                         'modified': datetime.fromtimestamp(stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
@@ -1102,19 +4786,235 @@ class SCPManager:
                         'owner': stat_info.st_uid,
                         'group': stat_info.st_gid
                     })
+            
+            # Sort: directories first, then files
+            listing = _sorted_listing(path, items, [row[3] // 1000000000 for row in rows], [row[1] for row in rows])
+            listing['version'] = self._local_listing_version(path, rows)
+            return listing
+            
+        except Exception as e:
+            logger.error(f"Error listing local directory {path}: {e}")
+            return {'error': str(e)}
+
+    def list_local_columns(self, path=None):
+        """list_local_directory in the columnar format (see ``listing_columns``), built straight from stat results.
+
+        No per-entry dicts or timestamp strings are made, so a large folder
+        costs a fraction of listing it and converting.
+        """
+        try:
+            path = self._resolve_local_path(path)
+            if path is None:
+                return {'error': 'No accessible path found'}
+            
+            rows = []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        rows.append(self._local_stat_row(entry.name, entry.stat()))
+                    except OSError as e:
+                        logger.warning(f"Cannot access {entry.path}: {e}")
+            version = self._local_listing_version(path, rows)
+            
+            # Same order as list_local_directory: directories first, then by name
+            rows.sort(key=lambda row: (not stat.S_ISDIR(row[1]), row[0].lower()))
+            return {
+                'current_path': path,
+                'version': version,
+                'format': 'columns',
+                'count': len(rows),
+                'columns': {
+                    'name': [row[0] for row in rows],
+                    'size': [0 if stat.S_ISDIR(row[1]) else row[2] for row in rows],
+                    'mtime': [row[3] // 1000000000 for row in rows],
+                    'mode': [row[1] for row in rows],
+                    'owner': [row[4] for row in rows],
+                    'group': [row[5] for row in rows]
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Error listing local directory {path}: {e}")
+            return {'error': str(e)}
+
+    def record_transfer_history(self, session_id, direction, status='completed', errors=None, progress_info=None):
+        """Persist a finished transfer job before its progress info is cleaned up"""
+        # Cancellation removes the session's progress entry, so callers that
+        # still hold the job's progress dict pass it in directly
+        if progress_info is None:
+            progress_info = getattr(self, 'transfer_progress', {}).get(session_id)
+        conn = self.connections.get(session_id)
+        if not progress_info or not conn:
+            return False
+        
+        table = self.transfer_tables.get(session_id)
+        rates = []
+        if table is not None:
+            rates = [table.rate(row) for row in range(len(table)) if table.states[row] == FILE_STATE_DONE]
+        
+        return self.history.record({
+            'job_id': progress_info.get('job_id'),
+            'host': conn['host'],
+            'port': conn['port'],
+            'username': conn['username'],
+            'direction': direction,
+            'status': status,
+            'started_at': progress_info['start_time'].timestamp(),
+            'finished_at': time.time(),
+            'bytes': progress_info['transferred_size'],
+            'files': progress_info['files_completed'],
+            'files_failed': progress_info.get('files_failed', 0),
+            'dirs': progress_info['dirs_completed'],
+            'rates': rates,
+            'errors': errors or []
+        })
+
+    def start_transfer_table(self, session_id):
+        """Create a fresh per-file table for a new transfer job"""
+        # A cancel only applies to the job it was aimed at; the next one starts clean
+        if session_id in self.connections:
+            self.connections[session_id]['transfer_cancelled'] = False
+        table = TransferFileTable(session_id)
+        self.transfer_tables[session_id] = table
+        return table
+
+    def start_deletion_job(self, session_id, side, paths):
+        """Start deleting local or remote paths in the background; returns the job id"""
+        conn = None
+        if side == 'remote':
+            conn = self.get_connection(session_id)
+            if not conn:
+                return {'success': False, 'error': 'No connection found'}
+        
+        running = self.deletion_jobs.get(session_id)
+        if running is not None and running.state == 'running':
+            return {'success': False, 'error': 'A deletion job is already running for this session'}
+        if conn is not None and conn.get('transfer_active'):
+            return {'success': False, 'error': 'A transfer is running on this connection'}
+        
+        job = DeletionJob(session_id, side, paths, self.start_transfer_table(session_id))
+        self.deletion_jobs[session_id] = job
+        if not hasattr(self, 'transfer_progress'):
+            self.transfer_progress = {}
+        self.transfer_progress[session_id] = job.progress
+        if conn is not None:
+            # Keeps the reaper away and keep-alive in transfer mode while the job runs
+            conn['transfer_active'] = True
+        
+        worker = threading.Thread(target=self._run_deletion_job, args=(job, conn), daemon=True)
+        worker.start()
+        logger.info(f"🗑️ Deletion job {job.job_id} started for {len(paths)} {side} path(s)")
+        return {'success': True, 'job_id': job.job_id}
+
+    def cancel_deletion_job(self, session_id):
+        """Ask a session's running deletion job to stop; returns True if one was running"""
+        job = self.deletion_jobs.get(session_id)
+        if job is None or job.state != 'running':
+            return False
+        job.cancel()
+        return True
+
+    def _run_deletion_job(self, job, conn):
+        """Delete each requested path in turn, reporting progress on the job"""
+        try:
+            for index, path in enumerate(job.paths):
+                if job.cancelled():
+                    break
+                job.begin(index)
+                try:
+                    if job.side == 'local':
+                        errors = self._delete_local_tree(job, path)
+                    else:
+                        errors = self._delete_remote_tree(job, conn, path)
                 except Exception as e:
-                    # Skip items we can't access
-                    logger.warning(f"Cannot access {item_path}: {e}")
-                    continue
-            
-            # Sort: directories first, then files
-            items.sort(key=lambda x: (not x['is_directory'], x['name'].lower()))
-            
-            return {'items': items, 'current_path': path}
+                    errors = [f"{path}: {str(e)}"]
+                if job.side == 'remote':
+                    self.invalidate_listings(conn, [path])
+                job.end(errors)
             
+            job.state = 'cancelled' if job.cancelled() else ('completed_with_errors' if job.errors else 'completed')
         except Exception as e:
-            logger.error(f"Error listing local directory {path}: {e}")
-            return {'error': str(e)}
+            logger.error(f"Deletion job {job.job_id} failed: {e}")
+            job.errors.append(str(e))
+            job.state = 'failed'
+        finally:
+            job.finished_at = time.time()
+            if conn is not None:
+                conn['transfer_active'] = False
+            job.progress['current_file'] = 'Deletion cancelled' if job.state == 'cancelled' else 'Deletion completed!'
+            logger.info(f"🗑️ Deletion job {job.job_id} {job.state}: {job.progress['entries_removed']} entries, {job.progress['bytes_freed']} bytes freed")
+        
+        # Leave the final progress readable for a few seconds, like transfers do
+        def cleanup_progress():
+            time.sleep(5)
+            if getattr(self, 'transfer_progress', {}).get(job.session_id) is job.progress:
+                del self.transfer_progress[job.session_id]
+        threading.Thread(target=cleanup_progress, daemon=True).start()
+
+    def _delete_local_tree(self, job, path):
+        """Delete one local path; directories are cleared level by level by a thread pool"""
+        errors = []
+        try:
+            info = os.lstat(path)
+        except OSError as e:
+            return [f"{path}: {e.strerror or str(e)}"]
+        if not stat.S_ISDIR(info.st_mode):
+            try:
+                os.unlink(path)
+                job.removed(info.st_size)
+            except OSError as e:
+                errors.append(f"{path}: {e.strerror or str(e)}")
+            return errors
+        
+        def clear(directory):
+            # Unlink the files in one directory and return its subdirectories
+            subdirs = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if job.cancelled():
+                            break
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                                continue
+                            size = entry.stat(follow_symlinks=False).st_size
+                            os.unlink(entry.path)
+                            job.removed(size)
+                        except OSError as e:
+                            errors.append(f"{entry.path}: {e.strerror or str(e)}")
+            except OSError as e:
+                errors.append(f"{directory}: {e.strerror or str(e)}")
+            return subdirs
+        
+        def remove_dir(directory):
+            try:
+                os.rmdir(directory)
+                job.removed(is_dir=True)
+            except OSError as e:
+                errors.append(f"{directory}: {e.strerror or str(e)}")
+        
+        levels = []
+        level = [path]
+        with ThreadPoolExecutor(max_workers=DELETE_LOCAL_WORKERS) as pool:
+            while level and not job.cancelled():
+                levels.append(level)
+                level = [subdir for subdirs in pool.map(clear, level) for subdir in subdirs]
+            for level in reversed(levels):
+                if job.cancelled():
+                    break
+                list(pool.map(remove_dir, level))
+        return errors
+
+    def _delete_remote_tree(self, job, conn, path):
+        """Delete one remote path with the pipelined SFTP walk, or the shell if SFTP is unavailable"""
+        try:
+            with self.sftp_channel(conn) as sftp:
+                failures = self._sftp_delete_paths(sftp, [path], job=job)
+            return [f"{item}: {error}" for item, error in failures.items()]
+        except (paramiko.SSHException, EOFError, socket.error) as e:
+            logger.warning(f"SFTP delete unavailable ({e}), falling back to shell commands")
+        return list(self.delete_remote_paths(conn, [path]).values())
 
     def transfer_multiple_files(self, session_id, file_list, direction, source_base, dest_base):
         """Transfer multiple files/folders with progress tracking"""
@@ -1122,8 +5022,21 @@ class SCPManager:
         if not conn:
             return {'success': False, 'error': 'No connection found'}
         
+        # Bulk transfers run on their own SFTP channel so browsing stays responsive,
+        # and pause rather than fail if the connection drops and is rebuilt
+        with self.resumable_channel(session_id) as sftp:
+            result = self._transfer_multiple_files(session_id, sftp, file_list, direction, source_base, dest_base)
+        destinations = [os.path.join(dest_base, os.path.relpath(file_path, source_base)) for file_path in file_list]
+        if direction == 'upload':
+            self.invalidate_listings(conn, [path.replace('\\', '/') for path in destinations], ancestors=True)
+        else:
+            self.size_index.invalidate('local', [os.path.abspath(path) for path in destinations], sep=os.sep)
+        return result
+
+    def _transfer_multiple_files(self, session_id, sftp, file_list, direction, source_base, dest_base):
+        """Transfer multiple files/folders over the given SFTP channel"""
+        progress_info = None
         try:
-            sftp = conn['sftp']
             results = []
             
             # Calculate total size and count files/directories for progress tracking
@@ -1131,6 +5044,7 @@ class SCPManager:
             file_sizes = {}
             total_files_count = 0
             total_dirs_count = 0
+            dir_items = set()
             
             logger.info(f"Starting transfer calculation for {len(file_list)} items")
             
@@ -1139,6 +5053,7 @@ class SCPManager:
                     if direction == 'upload':
                         if os.path.isdir(file_path):
                             size, files, dirs = self._get_local_folder_details(file_path)
+                            dir_items.add(file_path)
                             total_dirs_count += dirs + 1  # +1 for the folder itself
                             total_files_count += files
                             logger.info(f"Local folder {file_path}: {files} files, {dirs} dirs, {size} bytes")
@@ -1148,7 +5063,8 @@ class SCPManager:
                             logger.info(f"Local file {file_path}: {size} bytes")
                     else:  # download
                         if self._is_remote_directory(sftp, file_path):
-                            size, files, dirs = self._get_remote_folder_details(sftp, file_path)
+                            size, files, dirs = self._get_remote_folder_details(sftp, file_path, self.connections.get(session_id))
+                            dir_items.add(file_path)
                             total_dirs_count += dirs + 1  # +1 for the folder itself
                             total_files_count += files
                             logger.info(f"Remote folder {file_path}: {files} files, {dirs} dirs, {size} bytes")
@@ -1166,8 +5082,17 @@ class SCPManager:
             
             logger.info(f"Transfer totals: {total_files_count} files, {total_dirs_count} dirs, {total_size} bytes")
             
+            # Queue top-level files in the per-file table; files inside folders
+            # are added as the recursive transfer reaches them
+            table = self.start_transfer_table(session_id)
+            queued_rows = {}
+            for file_path in file_list:
+                if file_path not in dir_items:
+                    queued_rows[file_path] = table.add(file_path, file_sizes.get(file_path, 0))
+            
             # Store progress info in session
             progress_info = {
+                'job_id': table.job_id,
                 'total_size': total_size,
                 'transferred_size': 0,
                 'current_file': 'Starting transfer...',
@@ -1212,14 +5137,14 @@ class SCPManager:
                             # Ensure destination directory exists
                             dest_dir = os.path.dirname(dest_path)
                             self._ensure_remote_dir(sftp, dest_dir)
-                            self._upload_file_with_progress(sftp, file_path, dest_path, session_id)
+                            self._upload_file_with_progress(sftp, file_path, dest_path, session_id, row=queued_rows.get(file_path))
                     else:  # download
                         if self._is_remote_directory(sftp, file_path):
                             self._download_folder_recursive_with_progress(sftp, file_path, dest_path, session_id)
                         else:
                             # Ensure local directory exists
                             os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                            self._download_file_with_progress(sftp, file_path, dest_path, session_id)
+                            self._download_file_with_progress(sftp, file_path, dest_path, session_id, row=queued_rows.get(file_path))
                     
                     results.append({'file': file_path, 'success': True})
                     logger.info(f"Successfully transferred {file_path}")
@@ -1228,6 +5153,16 @@ class SCPManager:
                     logger.error(f"Error transferring {file_path}: {e}")
                     results.append({'file': file_path, 'success': False, 'error': str(e)})
             
+            # Record the job in the persistent history store
+            errors = [f"{r['file']}: {r['error']}" for r in results if not r['success']]
+            cancelled = session_id in self.connections and self.connections[session_id].get('transfer_cancelled', False)
+            self.record_transfer_history(
+                session_id, direction,
+                status='cancelled' if cancelled else ('completed_with_errors' if errors else 'completed'),
+                errors=errors,
+                progress_info=progress_info
+            )
+            
             # Final progress update
             if session_id in self.transfer_progress:
                 self.transfer_progress[session_id]['current_file'] = 'Transfer completed!'
@@ -1254,59 +5189,58 @@ class SCPManager:
             # Check if it was a cancellation
             if "cancelled by user" in str(e):
                 logger.info(f"Transfer was cancelled by user for session {session_id}")
+                self.record_transfer_history(session_id, direction, status='cancelled', progress_info=progress_info)
                 # Clean up progress info on cancellation
                 if hasattr(self, 'transfer_progress') and session_id in self.transfer_progress:
                     del self.transfer_progress[session_id]
                 return {'success': False, 'error': 'Transfer cancelled by user', 'cancelled': True}
             
             # Clean up progress info on error
+            self.record_transfer_history(session_id, direction, status='failed', errors=[str(e)], progress_info=progress_info)
             if hasattr(self, 'transfer_progress') and session_id in self.transfer_progress:
                 del self.transfer_progress[session_id]
             return {'success': False, 'error': str(e)}
 
     def _get_local_folder_details(self, folder_path):
         """Calculate total size, file count, and directory count of local folder"""
+        totals = self.measure_local_tree(folder_path)
+        return totals['bytes'], totals['files'], totals['dirs']
+
+    def _scan_local_tree(self, folder_path, sizes=True):
+        """Total size, file count and directory count under a local folder, via os.scandir.
+
+        Entry types come from the directory listing itself, so the only stat
+        calls are for file sizes (none with ``sizes=False``). Symlinked
+        folders are counted but not followed, as with os.walk.
+        """
         total_size = 0
         file_count = 0
         dir_count = 0
-        try:
-            for dirpath, dirnames, filenames in os.walk(folder_path):
-                dir_count += len(dirnames)
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
+        pending = [folder_path]
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
                     try:
-                        total_size += os.path.getsize(filepath)
-                        file_count += 1
-                    except:
-                        pass
-        except:
-            pass
-        return total_size, file_count, dir_count
-    
-    def _get_remote_folder_details(self, sftp, folder_path):
-        """Calculate total size, file count, and directory count of remote folder"""
-        total_size = 0
-        file_count = 0
-        dir_count = 0
-        try:
-            def count_recursive(remote_path):
-                nonlocal total_size, file_count, dir_count
-                try:
-                    for item in sftp.listdir_attr(remote_path):
-                        item_path = os.path.join(remote_path, item.filename).replace('\\', '/')
-                        if stat.S_ISDIR(item.st_mode):
+                        if entry.is_dir():
                             dir_count += 1
-                            count_recursive(item_path)
+                            if not entry.is_symlink():
+                                pending.append(entry.path)
                         else:
+                            if sizes:
+                                total_size += entry.stat().st_size
                             file_count += 1
-                            total_size += item.st_size
-                except Exception as e:
-                    logger.warning(f"Could not access {remote_path}: {e}")
-            
-            count_recursive(folder_path)
-        except:
-            pass
+                    except OSError:
+                        pass
         return total_size, file_count, dir_count
+    
+    def _get_remote_folder_details(self, sftp, folder_path, conn=None):
+        """Calculate total size, file count, and directory count of remote folder"""
+        totals = self.measure_remote_tree(conn or {}, sftp, folder_path)
+        return totals['bytes'], totals['files'], totals['dirs']
         """Calculate total size of local folder"""
         total_size = 0
         try:
@@ -1335,7 +5269,7 @@ class SCPManager:
             pass
         return total_size
     
-    def _upload_file_with_progress(self, sftp, local_path, remote_path, session_id):
+    def _upload_file_with_progress(self, sftp, local_path, remote_path, session_id, row=None):
         """Upload single file with fixed completion tracking"""
         file_size = os.path.getsize(local_path)
         
@@ -1343,6 +5277,14 @@ class SCPManager:
         if session_id in self.connections:
             self.connections[session_id]['transfer_active'] = True
         
+        # Track this file in the per-file table
+        table = self.transfer_tables.get(session_id)
+        if table is not None:
+            if row is None:
+                row = table.add(local_path, file_size, FILE_STATE_ACTIVE)
+            else:
+                table.start(row, file_size)
+        
         # Store the initial transferred size for this file
         initial_transferred = 0
         if session_id in self.transfer_progress:
@@ -1359,6 +5301,9 @@ class SCPManager:
                 logger.info(f"Transfer cancelled by user for session {session_id}")
                 raise Exception("Transfer cancelled by user")
             
+            if table is not None:
+                table.update(row, transferred)
+            
             if session_id in self.transfer_progress:
                 # Calculate the actual progress for this specific file
                 # Set the total transferred size to initial + current file progress
@@ -1402,6 +5347,9 @@ class SCPManager:
             
             sftp.put(local_path, remote_path, callback=progress_callback)
             
+            if table is not None:
+                table.finish(row, True)
+            
             # Ensure completion is recorded (fallback if callback didn't trigger)
             if session_id in self.transfer_progress and not transfer_completed:
                 self.transfer_progress[session_id]['files_completed'] += 1
@@ -1414,6 +5362,9 @@ class SCPManager:
                 self.connections[session_id]['stats']['last_transfer_time'] = datetime.now()
                 
         except Exception as e:
+            if table is not None:
+                table.finish(row, False)
+            
             # Update failed file count
             if session_id in self.transfer_progress:
                 self.transfer_progress[session_id]['files_failed'] += 1
@@ -1461,7 +5412,7 @@ class SCPManager:
         
         # Reset callback state
         progress_callback.last_transferred = 0
-    def _download_file_with_progress(self, sftp, remote_path, local_path, session_id):
+    def _download_file_with_progress(self, sftp, remote_path, local_path, session_id, row=None):
         """Download single file with fixed completion tracking"""
         try:
             file_size = sftp.stat(remote_path).st_size
@@ -1472,6 +5423,14 @@ class SCPManager:
         if session_id in self.connections:
             self.connections[session_id]['transfer_active'] = True
         
+        # Track this file in the per-file table
+        table = self.transfer_tables.get(session_id)
+        if table is not None:
+            if row is None:
+                row = table.add(remote_path, file_size, FILE_STATE_ACTIVE)
+            else:
+                table.start(row, file_size)
+        
         # Store the initial transferred size for this file
         initial_transferred = 0
         if session_id in self.transfer_progress:
@@ -1488,6 +5447,9 @@ class SCPManager:
                 logger.info(f"Transfer cancelled by user for session {session_id}")
                 raise Exception("Transfer cancelled by user")
             
+            if table is not None:
+                table.update(row, transferred)
+            
             if session_id in self.transfer_progress:
                 # Calculate the actual progress for this specific file
                 # Set the total transferred size to initial + current file progress
@@ -1531,6 +5493,9 @@ class SCPManager:
             
             sftp.get(remote_path, local_path, callback=progress_callback)
             
+            if table is not None:
+                table.finish(row, True)
+            
             # Ensure completion is recorded (fallback if callback didn't trigger)
             if session_id in self.transfer_progress and not transfer_completed:
                 self.transfer_progress[session_id]['files_completed'] += 1
@@ -1543,6 +5508,9 @@ class SCPManager:
                 self.connections[session_id]['stats']['last_transfer_time'] = datetime.now()
                 
         except Exception as e:
+            if table is not None:
+                table.finish(row, False)
+            
             # Update failed file count
             if session_id in self.transfer_progress:
                 self.transfer_progress[session_id]['files_failed'] += 1
@@ -1571,12 +5539,13 @@ class SCPManager:
                     logger.warning(f"Could not create or verify remote directory {remote_path}: {e}")
             
             # Upload all items in the directory FIRST
-            for item in os.listdir(local_path):
-                local_item_path = os.path.join(local_path, item)
+            with os.scandir(local_path) as entries:
+                children = [(entry.name, entry.path, entry.is_dir()) for entry in entries]
+            for item, local_item_path, is_dir in children:
                 remote_item_path = os.path.join(remote_path, item).replace('\\', '/')
                 
                 try:
-                    if os.path.isdir(local_item_path):
+                    if is_dir:
                         logger.info(f"Uploading folder: {local_item_path} -> {remote_item_path}")
                         # Update current file being processed
                         if session_id in self.transfer_progress:
@@ -1720,12 +5689,13 @@ class SCPManager:
                     logger.warning(f"Could not create or verify remote directory {remote_path}: {e}")
             
             # Upload all items in the directory
-            for item in os.listdir(local_path):
-                local_item_path = os.path.join(local_path, item)
+            with os.scandir(local_path) as entries:
+                children = [(entry.name, entry.path, entry.is_dir()) for entry in entries]
+            for item, local_item_path, is_dir in children:
                 remote_item_path = os.path.join(remote_path, item).replace('\\', '/')
                 
                 try:
-                    if os.path.isdir(local_item_path):
+                    if is_dir:
                         logger.info(f"Uploading folder: {local_item_path} -> {remote_item_path}")
                         self._upload_folder_recursive(sftp, local_item_path, remote_item_path)
                     else:
@@ -1742,6 +5712,46 @@ class SCPManager:
 # Global SCP manager instance
 scp_manager = SCPManager()
 
+# API endpoints that work without a live remote session
+SESSION_FREE_ENDPOINTS = {
+    'get_saved_credentials', 'get_os_info', 'load_credential', 'delete_credential',
+    'test_connection', 'login', 'disconnect', 'list_local', 'count_local_items',
+    'create_local_folder', 'rename_local_item', 'delete_local_files',
+    'get_transfer_history', 'get_transfer_trends',
+    'scheduler_status', 'session_limits', 'ssh_algorithms', 'reconnect_status',
+    'batch_operations', 'start_deletion_job', 'deletion_job_status'
+}
+
+EVICTION_MESSAGES = {
+    'idle_timeout': f'Session closed after {SESSION_IDLE_TIMEOUT // 60} minutes of inactivity.',
+    'capacity': 'Session closed because the server reached its connection limit.',
+    'memory_pressure': 'Session closed because the server was running low on memory.'
+}
+
+@app.before_request
+def report_evicted_session():
+    """Give requests from an evicted session a clean re-login signal"""
+    session_id = session.get('session_id')
+    if not session_id or not request.path.startswith('/api/') or request.endpoint in SESSION_FREE_ENDPOINTS:
+        return None
+    return evicted_session_response(session_id)
+
+def evicted_session_response(session_id):
+    """401 session_evicted response for an evicted session, or None"""
+    tombstone = scp_manager.get_tombstone(session_id)
+    if not tombstone:
+        return None
+    return jsonify({
+        'success': False,
+        'connected': False,
+        'error': f"{EVICTION_MESSAGES.get(tombstone['reason'], 'Session closed by the server.')} Please log in again.",
+        'error_type': 'session_evicted',
+        'reason': tombstone['reason'],
+        'host': tombstone['host'],
+        'username': tombstone['username'],
+        'port': tombstone['port']
+    }), 401
+
 @app.route('/')
 def index():
     """Main application page"""
@@ -1803,6 +5813,10 @@ def test_connection():
         if not host:
             return jsonify({'success': False, 'error': 'Host is required'})
         
+        username = data.get('username')
+        password = data.get('password')
+        key_data = data.get('key_data')
+        
         # Test basic network connectivity first
         import socket
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -1819,6 +5833,14 @@ def test_connection():
                     'error_type': 'server_unreachable'
                 })
             
+            # With credentials, authenticate and keep the client for the login that follows
+            if username and (password or key_data):
+                result = scp_manager.test_connection(host, username, password, key_data, port)
+                if result['success']:
+                    result['message'] = f'Connected to {host}:{port} as {username}'
+                    result['server_info'] = {'host': host, 'port': port, 'ssh_available': True}
+                return jsonify(result)
+            
             # If basic connectivity works, try SSH handshake
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -1910,12 +5932,9 @@ def login():
     if success:
         session['session_id'] = session_id
         
-        # Detect remote OS
-        remote_os = 'unknown'
-        try:
-            remote_os = scp_manager.detect_remote_os(session_id)
-        except Exception as e:
-            logger.warning(f"Could not detect remote OS: {e}")
+        # Remote OS and capabilities were detected (or loaded from cache) while connecting
+        conn = scp_manager.connections.get(session_id, {})
+        remote_os = conn.get('remote_os', 'unknown')
         
         # Save credentials if requested
         if data.get('save_credentials'):
@@ -1930,7 +5949,8 @@ def login():
         return jsonify({
             'success': True, 
             'session_id': session_id,
-            'remote_os': remote_os
+            'remote_os': remote_os,
+            'capabilities': conn.get('capabilities', {})
         })
     else:
         return jsonify({'success': False, 'error': 'Failed to connect'})
@@ -1944,22 +5964,171 @@ def disconnect():
         session.pop('session_id', None)
     return jsonify({'success': True})
 
+def listing_etag(result):
+    """Weak ETag for a listing response, or None.
+
+    It combines the listing's content version (or the cursor, whose view
+    never changes) with the request's arguments, leaving out ``refresh``
+    and ``prefetch``, which don't change the listing. A page's
+    ``next_cursor`` is part of it too, so a 304 never leaves the client
+    holding a cursor to a view that is gone.
+    """
+    base = result.get('version') or request.args.get('cursor')
+    if not base:
+        return None
+    args = sorted((name, value) for name, value in request.args.items(multi=True) if name not in ('refresh', 'prefetch'))
+    return hashlib.blake2b(repr((request.path, base, args, result.get('next_cursor'))).encode(), digest_size=12).hexdigest()
+
+def conditional_listing(result, etag=None):
+    """JSON response for a listing, or an empty 304 when the client's If-None-Match still holds.
+
+    Bodies are compared by ETag before serializing, so an unchanged refresh
+    costs neither serialization nor bandwidth. ``no-cache`` makes browsers
+    store the listing but revalidate it on every fetch.
+    """
+    if result is not None:
+        etag = None if 'error' in result else listing_etag(result)
+    if etag and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        # Raw stat arrays kept for the columnar format stay on the server
+        response = jsonify({key: value for key, value in result.items() if not key.startswith('_')})
+    if etag:
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def listing_response(owner, load, version=None, load_columns=None):
+    """Answer a listing request, paginated when any paging, sort or filter argument is given.
+
+    ``version``, when given, cheaply computes the listing's content version
+    so a revalidation of an unchanged folder is answered before ``load()``.
+    Paged requests are not: their first page's cursor must name a live
+    view, which only building (or reusing) the view guarantees.
+    With ``format=columns`` the listing or page is sent in the columnar
+    format; ``load_columns``, when given, builds an unpaged one directly.
+    """
+    args = request.args
+    listing_format = args.get('format', 'rows')
+    if listing_format not in LISTING_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(LISTING_FORMATS)}"})
+    encode = listing_columns if listing_format == 'columns' else (lambda result: result)
+    paged = any(name in args for name in ('limit', 'cursor', 'sort', 'order', 'filter'))
+    if version is not None and request.if_none_match and not paged:
+        current = version()
+        etag = current and listing_etag({'version': current})
+        if etag and request.if_none_match.contains_weak(etag):
+            return conditional_listing(None, etag)
+    if not paged:
+        if listing_format == 'columns' and load_columns is not None:
+            return conditional_listing(load_columns())
+        return conditional_listing(encode(load()))
+    try:
+        limit = int(args.get('limit', LISTING_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'})
+    return conditional_listing(encode(scp_manager.paged_listing(
+        owner, load,
+        sort=args.get('sort', 'name'),
+        order=args.get('order', 'asc'),
+        expression=args.get('filter', ''),
+        limit=limit,
+        cursor=args.get('cursor')
+    )))
+
 @app.route('/api/list-remote')
 def list_remote():
     """List remote directory"""
     session_id = session.get('session_id')
     path = request.args.get('path', '/')
     
-    result = scp_manager.list_remote_directory(session_id, path)
-    return jsonify(result)
+    refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+    prefetch = request.args.get('prefetch', '1').lower() not in ('0', 'false', 'no')
+    
+    return listing_response(session_id, lambda: scp_manager.list_remote_directory(session_id, path, refresh=refresh, prefetch=prefetch))
+
+@app.route('/api/list-remote-stream')
+def list_remote_stream():
+    """Stream a remote directory listing as NDJSON while it is being read"""
+    conn = scp_manager.get_connection(session.get('session_id'))
+    if not conn:
+        return jsonify({'error': 'No connection found'})
+    path = request.args.get('path', '/')
+    refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+    
+    return Response(stream_with_context(scp_manager.stream_remote_directory(conn, path, refresh=refresh)),
+                    mimetype='application/x-ndjson', headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/search-remote')
+def search_remote():
+    """Search a remote folder tree, streaming matches as NDJSON"""
+    session_id = session.get('session_id')
+    conn = scp_manager.get_connection(session_id)
+    if not conn:
+        return jsonify({'error': 'No connection found'})
+    args = request.args
+    method = args.get('method', 'auto')
+    if method not in ('auto', 'find', 'sftp'):
+        return jsonify({'error': "method must be 'auto', 'find' or 'sftp'"})
+    try:
+        limit = max(1, min(int(args.get('limit', SEARCH_RESULT_LIMIT)), SEARCH_RESULT_MAX))
+        max_depth = int(args['max_depth']) if args.get('max_depth') else None
+    except ValueError:
+        return jsonify({'error': 'limit and max_depth must be numbers'})
+    if max_depth is not None and max_depth < 1:
+        return jsonify({'error': 'max_depth must be at least 1'})
+    try:
+        search = RemoteSearch(session_id, args.get('path', '/'), args.get('query', ''), limit=limit, max_depth=max_depth)
+    except ValueError as e:
+        return jsonify({'error': str(e)})
+    if not search.terms:
+        return jsonify({'error': 'A search query is required'})
+    
+    return Response(stream_with_context(scp_manager.search_remote(conn, search, method=method)),
+                    mimetype='application/x-ndjson', headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/search-remote/cancel', methods=['POST'])
+def cancel_search_remote():
+    """Cancel the running remote search"""
+    data = request.get_json(silent=True) or {}
+    if scp_manager.cancel_remote_search(session.get('session_id'), data.get('search_id')):
+        return jsonify({'success': True})
+    return jsonify({'success': False, 'error': 'No search running'})
+
+@app.route('/api/watch-remote')
+def watch_remote():
+    """Stream changes in the open remote folders as NDJSON"""
+    session_id = session.get('session_id')
+    conn = scp_manager.get_connection(session_id)
+    if not conn:
+        return jsonify({'error': 'No connection found'})
+    method = request.args.get('method', 'auto')
+    if method not in ('auto', 'inotify', 'poll'):
+        return jsonify({'error': "method must be 'auto', 'inotify' or 'poll'"})
+    paths = request.args.getlist('path') or ['/']
+    if len(paths) > WATCH_MAX_PATHS:
+        return jsonify({'error': f'At most {WATCH_MAX_PATHS} folders can be watched at once'})
+    
+    watch = RemoteWatch(session_id, paths)
+    return Response(stream_with_context(scp_manager.watch_remote(conn, watch, method=method)),
+                    mimetype='application/x-ndjson', headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/watch-remote/cancel', methods=['POST'])
+def cancel_watch_remote():
+    """Stop the remote change feed"""
+    data = request.get_json(silent=True) or {}
+    if scp_manager.cancel_remote_watch(session.get('session_id'), data.get('watch_id')):
+        return jsonify({'success': True})
+    return jsonify({'success': False, 'error': 'No watch running'})
 
 @app.route('/api/list-local')
 def list_local():
     """List local directory with OS-specific default"""
     path = request.args.get('path', OS_INFO['default_path'])
     
-    result = scp_manager.list_local_directory(path)
-    return jsonify(result)
+    return listing_response(session.get('session_id') or '', lambda: scp_manager.list_local_directory(path),
+                            version=lambda: scp_manager.local_listing_version(path),
+                            load_columns=lambda: scp_manager.list_local_columns(path))
 
 @app.route('/api/count-local-items')
 def count_local_items():
@@ -1972,16 +6141,12 @@ def count_local_items():
             path = OS_INFO['default_path']
             
         if os.path.isfile(path):
-            return jsonify({'success': True, 'files': 1, 'directories': 0})
+            return jsonify({'success': True, 'files': 1, 'directories': 0, 'total_size': os.path.getsize(path)})
         elif os.path.isdir(path):
-            file_count = 0
-            dir_count = 0
-            
-            for root, dirs, files in os.walk(path):
-                file_count += len(files)
-                dir_count += len(dirs)
+            totals = scp_manager.measure_local_tree(path, refresh=request.args.get('refresh', '').lower() in ('1', 'true', 'yes'))
             
-            return jsonify({'success': True, 'files': file_count, 'directories': dir_count})
+            return jsonify({'success': True, 'files': totals['files'], 'directories': totals['dirs'], 'total_size': totals['bytes'],
+                            'index': {'rescanned': totals['rescanned'], 'reused': totals['reused']}})
         else:
             return jsonify({'success': False, 'error': 'Path does not exist'})
             
@@ -2000,35 +6165,18 @@ def count_remote_items():
         return jsonify({'success': False, 'error': 'No connection found'})
     
     try:
-        sftp = conn['sftp']
-        
-        # Check if it's a file or directory
-        try:
-            stat_info = sftp.stat(path)
-            if not stat.S_ISDIR(stat_info.st_mode):
-                return jsonify({'success': True, 'files': 1, 'directories': 0})
-        except:
-            return jsonify({'success': False, 'error': 'Path does not exist'})
-        
-        # Count files and directories recursively
-        file_count = 0
-        dir_count = 0
-        
-        def count_recursive(remote_path):
-            nonlocal file_count, dir_count
+        with scp_manager.sftp_channel(conn) as sftp:
+            # Check if it's a file or directory
             try:
-                for item in sftp.listdir_attr(remote_path):
-                    item_path = os.path.join(remote_path, item.filename).replace('\\', '/')
-                    if stat.S_ISDIR(item.st_mode):
-                        dir_count += 1
-                        count_recursive(item_path)
-                    else:
-                        file_count += 1
-            except Exception as e:
-                logger.warning(f"Could not access {remote_path}: {e}")
-        
-        count_recursive(path)
-        return jsonify({'success': True, 'files': file_count, 'directories': dir_count})
+                stat_info = sftp.stat(path)
+                if not stat.S_ISDIR(stat_info.st_mode):
+                    return jsonify({'success': True, 'files': 1, 'directories': 0, 'total_size': stat_info.st_size})
+            except:
+                return jsonify({'success': False, 'error': 'Path does not exist'})
+            
+            totals = scp_manager.measure_remote_tree(conn, sftp, path, refresh=request.args.get('refresh', '').lower() in ('1', 'true', 'yes'))
+        return jsonify({'success': True, 'files': totals['files'], 'directories': totals['dirs'], 'total_size': totals['bytes'],
+                        'index': {'rescanned': totals['rescanned'], 'reused': totals['reused']}})
         
     except Exception as e:
         logger.error(f"Error counting remote items in {path}: {e}")
@@ -2056,7 +6204,10 @@ def get_transfer_progress():
         progress_info = scp_manager.transfer_progress[session_id]
         
         # Calculate progress percentage
-        if progress_info['total_size'] > 0:
+        if progress_info.get('operation') == 'delete':
+            # Tree sizes aren't known up front, so deletions report finished paths
+            progress_percent = (progress_info['items_completed'] / progress_info['total_items']) * 100 if progress_info['total_items'] else 0
+        elif progress_info['total_size'] > 0:
             progress_percent = min(100, (progress_info['transferred_size'] / progress_info['total_size']) * 100)
         else:
             # Fallback to item-based progress
@@ -2103,6 +6254,10 @@ def get_transfer_progress():
             'total_files': progress_info['total_files'],
             'total_dirs': progress_info['total_dirs'],
             'total_items': progress_info['total_items'],
+            'job_id': progress_info.get('job_id'),
+            'operation': progress_info.get('operation', 'transfer'),
+            'entries_removed': progress_info.get('entries_removed'),
+            'bytes_freed': progress_info.get('bytes_freed'),
             'debug_info': {
                 'session_active': session_id in scp_manager.connections,
                 'transfer_active': scp_manager.connections.get(session_id, {}).get('transfer_active', False) if session_id in scp_manager.connections else False,
@@ -2125,6 +6280,63 @@ def get_transfer_progress():
             }
         })
 
+@app.route('/api/transfer-files')
+def get_transfer_files():
+    """Get per-file state of the current transfer job in a columnar layout"""
+    session_id = session.get('session_id')
+    table = scp_manager.transfer_tables.get(session_id) if session_id else None
+    if table is None:
+        return jsonify({'success': False, 'error': 'No transfer job found'})
+    
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(max(1, int(request.args.get('limit', 500))), TRANSFER_FILES_MAX_PAGE)
+        since = request.args.get('since')
+        since = int(since) if since not in (None, '') else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'offset, limit and since must be integers'})
+    
+    # A client still looking at an older job gets a full page instead of a delta
+    job_id = request.args.get('job_id')
+    job_changed = bool(job_id) and job_id != table.job_id
+    if job_changed:
+        since = None
+    
+    result = table.snapshot(offset=offset, limit=limit, since=since)
+    result['success'] = True
+    result['job_changed'] = job_changed
+    return jsonify(result)
+
+@app.route('/api/transfer-history')
+def get_transfer_history():
+    """Get recently completed transfer jobs, optionally for one host"""
+    try:
+        host = request.args.get('host')
+        limit = min(max(1, int(request.args.get('limit', 50))), 1000)
+        return jsonify({'success': True, 'jobs': scp_manager.history.recent(host=host, limit=limit)})
+    except Exception as e:
+        logger.error(f"Error reading transfer history: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/transfer-history/trends')
+def get_transfer_trends():
+    """Get throughput trends per host over time to spot degrading links"""
+    try:
+        host = request.args.get('host')
+        days = min(max(1, int(request.args.get('days', 30))), 3650)
+        bucket = request.args.get('bucket', 'day')
+        if bucket not in TransferHistoryStore.BUCKET_FORMATS:
+            return jsonify({'success': False, 'error': f'Unsupported bucket: {bucket}'})
+        return jsonify({
+            'success': True,
+            'bucket': bucket,
+            'days': days,
+            'hosts': scp_manager.history.trends(host=host, days=days, bucket=bucket)
+        })
+    except Exception as e:
+        logger.error(f"Error reading transfer trends: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/cancel-transfer', methods=['POST'])
 def cancel_transfer():
     """Cancel current transfer operation"""
@@ -2138,6 +6350,15 @@ def cancel_transfer():
             del scp_manager.transfer_progress[session_id]
             logger.info(f"Cleared transfer progress for session {session_id}")
         
+        # Deletion jobs share the transfer progress surface, so cancel them here too
+        if scp_manager.cancel_deletion_job(session_id):
+            logger.info(f"Cancelled deletion job for session {session_id}")
+            # The deletion worker finishes the job itself; leave the transfer flags alone
+            return jsonify({
+                'success': True,
+                'message': 'Deletion cancelled successfully'
+            })
+        
         # Mark transfer as cancelled in connection
         if session_id in scp_manager.connections:
             scp_manager.connections[session_id]['transfer_active'] = False
@@ -2207,7 +6428,9 @@ def download_file():
         if not hasattr(scp_manager, 'transfer_progress'):
             scp_manager.transfer_progress = {}
         
+        table = scp_manager.start_transfer_table(session_id)
         scp_manager.transfer_progress[session_id] = {
+            'job_id': table.job_id,
             'total_size': file_size,
             'transferred_size': 0,
             'current_file': f'Downloading {os.path.basename(remote_path)}',
@@ -2221,8 +6444,10 @@ def download_file():
             'total_items': 1
         }
         
-        # Use the enhanced download method with progress tracking
-        scp_manager._download_file_with_progress(sftp, remote_path, local_path, session_id)
+        # Use the enhanced download method with progress tracking on a bulk channel
+        with scp_manager.resumable_channel(session_id) as transfer_sftp:
+            scp_manager._download_file_with_progress(transfer_sftp, remote_path, local_path, session_id)
+        scp_manager.record_transfer_history(session_id, 'download')
         
         # Clean up progress info after a short delay
         def cleanup_progress():
@@ -2239,6 +6464,7 @@ def download_file():
         
     except Exception as e:
         logger.error(f"Download error: {e}")
+        scp_manager.record_transfer_history(session_id, 'download', status='failed', errors=[str(e)])
         # Clean up progress info on error
         if hasattr(scp_manager, 'transfer_progress') and session_id in scp_manager.transfer_progress:
             del scp_manager.transfer_progress[session_id]
@@ -2277,7 +6503,9 @@ def upload_file():
         if not hasattr(scp_manager, 'transfer_progress'):
             scp_manager.transfer_progress = {}
         
+        table = scp_manager.start_transfer_table(session_id)
         scp_manager.transfer_progress[session_id] = {
+            'job_id': table.job_id,
             'total_size': file_size,
             'transferred_size': 0,
             'current_file': f'Uploading {os.path.basename(local_path)}',
@@ -2291,8 +6519,13 @@ def upload_file():
             'total_items': 1
         }
         
-        # Use the enhanced upload method with progress tracking
-        scp_manager._upload_file_with_progress(sftp, local_path, remote_path, session_id)
+        # Use the enhanced upload method with progress tracking on a bulk channel
+        try:
+            with scp_manager.resumable_channel(session_id) as transfer_sftp:
+                scp_manager._upload_file_with_progress(transfer_sftp, local_path, remote_path, session_id)
+        finally:
+            scp_manager.invalidate_listings(conn, [remote_path], ancestors=True)
+        scp_manager.record_transfer_history(session_id, 'upload')
         
         # Clean up progress info after a short delay
         def cleanup_progress():
@@ -2309,6 +6542,7 @@ def upload_file():
         
     except Exception as e:
         logger.error(f"Upload error: {e}")
+        scp_manager.record_transfer_history(session_id, 'upload', status='failed', errors=[str(e)])
         # Clean up progress info on error
         if hasattr(scp_manager, 'transfer_progress') and session_id in scp_manager.transfer_progress:
             del scp_manager.transfer_progress[session_id]
@@ -2364,28 +6598,14 @@ def create_remote_folder():
             return jsonify({'success': False, 'error': validation['error']})
         
         conn = scp_manager.connections[session_id]
-        ssh = conn['ssh']
-        remote_os = conn.get('remote_os', 'unix')
-        
-        # Use cross-platform mkdir command
-        cmd = scp_manager._get_cross_platform_commands(remote_os, 'mkdir', folder_path)
-        
-        if not cmd:
-            return jsonify({'success': False, 'error': f'Create folder operation not supported on {remote_os}'})
+        result = scp_manager.make_remote_dir(conn, folder_path)
         
-        stdin, stdout, stderr = ssh.exec_command(f'{cmd} && echo "SUCCESS" || echo "FAILED"')
-        
-        result = stdout.read().decode().strip()
-        error_output = stderr.read().decode().strip()
-        
-        if result == "SUCCESS":
-            logger.info(f"Successfully created folder {folder_path} on {remote_os}")
+        if result['success']:
+            logger.info(f"Successfully created folder {folder_path}")
             return jsonify({'success': True})
         else:
-            if not error_output:
-                error_output = "Create folder operation failed"
-            logger.error(f"Failed to create folder {folder_path}: {error_output}")
-            return jsonify({'success': False, 'error': f'Failed to create folder: {error_output}'})
+            logger.error(f"Failed to create folder {folder_path}: {result['error']}")
+            return jsonify({'success': False, 'error': f"Failed to create folder: {result['error']}"})
     except Exception as e:
         logger.error(f"Create remote folder error: {e}")
         return jsonify({'success': False, 'error': str(e)})
@@ -2449,28 +6669,14 @@ def rename_remote_item():
             return jsonify({'success': False, 'error': new_validation['error']})
         
         conn = scp_manager.connections[session_id]
-        ssh = conn['ssh']
-        remote_os = conn.get('remote_os', 'unix')
-        
-        # Use cross-platform move command
-        cmd = scp_manager._get_cross_platform_commands(remote_os, 'move', old_path, new_path)
-        
-        if not cmd:
-            return jsonify({'success': False, 'error': f'Rename operation not supported on {remote_os}'})
-        
-        stdin, stdout, stderr = ssh.exec_command(f'{cmd} && echo "SUCCESS" || echo "FAILED"')
-        
-        result = stdout.read().decode().strip()
-        error_output = stderr.read().decode().strip()
+        result = scp_manager.rename_remote(conn, old_path, new_path)
         
-        if result == "SUCCESS":
-            logger.info(f"Successfully renamed {old_path} to {new_path} on {remote_os}")
+        if result['success']:
+            logger.info(f"Successfully renamed {old_path} to {new_path}")
             return jsonify({'success': True})
         else:
-            if not error_output:
-                error_output = "Rename operation failed"
-            logger.error(f"Failed to rename {old_path} to {new_path}: {error_output}")
-            return jsonify({'success': False, 'error': f'Failed to rename: {error_output}'})
+            logger.error(f"Failed to rename {old_path} to {new_path}: {result['error']}")
+            return jsonify({'success': False, 'error': f"Failed to rename: {result['error']}"})
     except Exception as e:
         logger.error(f"Rename remote item error: {e}")
         return jsonify({'success': False, 'error': str(e)})
@@ -2538,46 +6744,14 @@ def delete_remote_files():
                 return jsonify({'success': False, 'error': validation['error']})
         
         conn = scp_manager.connections[session_id]
-        ssh = conn['ssh']
-        sftp = conn['sftp']
-        remote_os = conn.get('remote_os', 'unix')
-        failed_files = []
+        try:
+            failed_files = list(scp_manager.delete_remote_paths(conn, files).values())
+        except Exception as e:
+            failed_files = [f"Delete batch failed: {str(e)}"]
+            logger.error(f"Error deleting remote files: {e}")
         
-        for file_path in files:
-            try:
-                # Check if it's a file or directory using SFTP
-                try:
-                    file_stat = sftp.stat(file_path)
-                    is_directory = stat.S_ISDIR(file_stat.st_mode)
-                except:
-                    # If stat fails, assume it's a file
-                    is_directory = False
-                
-                # Use cross-platform commands
-                if is_directory:
-                    cmd = scp_manager._get_cross_platform_commands(remote_os, 'delete_dir', file_path)
-                else:
-                    cmd = scp_manager._get_cross_platform_commands(remote_os, 'delete_file', file_path)
-                
-                if not cmd:
-                    failed_files.append(f"{file_path}: Unsupported OS for delete operation")
-                    continue
-                
-                # Execute the command
-                stdin, stdout, stderr = ssh.exec_command(f'{cmd} && echo "SUCCESS" || echo "FAILED"')
-                result = stdout.read().decode().strip()
-                
-                if result != "SUCCESS":
-                    error_output = stderr.read().decode().strip()
-                    if not error_output:
-                        error_output = "Delete operation failed"
-                    failed_files.append(f"{file_path}: {error_output}")
-                else:
-                    logger.info(f"Successfully deleted {file_path} on {remote_os}")
-                    
-            except Exception as e:
-                failed_files.append(f"{file_path}: {str(e)}")
-                logger.error(f"Error deleting {file_path}: {e}")
+        if not failed_files:
+            logger.info(f"Successfully deleted {len(files)} remote item(s)")
         
         if failed_files:
             return jsonify({'success': False, 'error': f'Failed to delete: {"; ".join(failed_files)}'})
@@ -2587,6 +6761,85 @@ def delete_remote_files():
         logger.error(f"Delete remote files error: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/batch', methods=['POST'])
+def batch_operations():
+    """Run an ordered list of file operations on either panel in one request"""
+    try:
+        data = request.get_json() or {}
+        operations = data.get('operations')
+        
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'success': False, 'error': 'No operations specified'})
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            return jsonify({'success': False, 'error': f'At most {BATCH_MAX_OPERATIONS} operations per batch'})
+        
+        # Local-only batches work without a session; remote ones need a live connection
+        session_id = session.get('session_id')
+        conn = scp_manager.get_connection(session_id) if session_id else None
+        has_remote = any(isinstance(op, dict) and op.get('side') == 'remote' for op in operations)
+        if has_remote and conn is None and session_id:
+            evicted = evicted_session_response(session_id)
+            if evicted:
+                return evicted
+        
+        batch = FileOperationBatch(scp_manager, conn, operations, stop_on_error=bool(data.get('stop_on_error')))
+        results = batch.run()
+        failed = sum(1 for result in results if not result['success'])
+        logger.info(f"Batch of {len(results)} operation(s) ran in {len(batch.waves)} wave(s), {failed} failed")
+        
+        return jsonify({
+            'success': failed == 0,
+            'results': results,
+            'waves': len(batch.waves),
+            'failed': failed
+        })
+    except Exception as e:
+        logger.error(f"Batch operations error: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/delete-jobs', methods=['POST'])
+def start_deletion_job():
+    """Start deleting local or remote files and folders in the background"""
+    try:
+        data = request.get_json() or {}
+        side = data.get('side')
+        files = data.get('files', [])
+        
+        if side not in ('local', 'remote'):
+            return jsonify({'success': False, 'error': "side must be 'local' or 'remote'"})
+        if not files:
+            return jsonify({'success': False, 'error': 'No files specified'})
+        
+        session_id = session.get('session_id')
+        if side == 'remote':
+            if session_id and session_id not in scp_manager.connections:
+                evicted = evicted_session_response(session_id)
+                if evicted:
+                    return evicted
+            for file_path in files:
+                validation = validate_remote_operation(file_path, 'Delete')
+                if not validation['allowed']:
+                    return jsonify({'success': False, 'error': validation['error']})
+        elif not session_id:
+            # Local jobs need a key for progress polling even before any login
+            session_id = session['session_id'] = uuid.uuid4().hex
+        
+        if not session_id:
+            return jsonify({'success': False, 'error': 'Not connected'})
+        return jsonify(scp_manager.start_deletion_job(session_id, side, files))
+    except Exception as e:
+        logger.error(f"Start deletion job error: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/delete-jobs')
+def deletion_job_status():
+    """Get the state and counters of this session's latest deletion job"""
+    session_id = session.get('session_id')
+    job = scp_manager.deletion_jobs.get(session_id) if session_id else None
+    if job is None:
+        return jsonify({'success': False, 'error': 'No deletion job found'})
+    return jsonify({'success': True, 'job': job.status()})
+
 @app.route('/api/keep-alive', methods=['POST'])
 def keep_alive():
     """Keep session alive and check connection health with transfer-aware logic"""
@@ -2665,25 +6918,15 @@ def keep_alive():
                 error_type = 'connection_error'
                 user_msg = f'Connection error: {str(e)}'
             
-            # Attempt auto-reconnect for certain error types
+            # Hand certain error types to the background reconnector
             if error_type in ['server_shutdown', 'server_restart']:
-                reconnect_result = scp_manager._attempt_auto_reconnect(session_id)
-                
-                if reconnect_result['success']:
-                    return jsonify({
-                        'success': True,
-                        'status': 'Reconnected automatically',
-                        'message': 'Connection was restored automatically after server restart',
-                        'reconnected': True,
-                        'timestamp': datetime.now().isoformat()
-                    })
-                else:
-                    return jsonify({
-                        'success': False,
-                        'error': f'{user_msg} Reconnection failed: {reconnect_result["error"]}',
-                        'error_type': error_type,
-                        'reconnect_failed': True
-                    }), 500
+                scp_manager.request_reconnect(session_id, error_type)
+                return jsonify({
+                    'success': False,
+                    'error': user_msg,
+                    'error_type': error_type,
+                    'reconnecting': True
+                }), 503
             else:
                 return jsonify({
                     'success': False,
@@ -2727,11 +6970,13 @@ def keep_alive_ping():
         
         # Very lightweight check - just verify transport is active
         transport = ssh.get_transport()
-        if not transport or not transport.is_active():
+        if conn.get('reconnecting') or not transport or not transport.is_active():
+            scp_manager.request_reconnect(session_id, 'transport_inactive')
             return jsonify({
                 'success': False,
-                'error': 'Transport inactive',
-                'error_type': 'no_connection'
+                'error': 'Connection lost, reconnecting in the background',
+                'error_type': 'server_restart',
+                'reconnecting': True
             }), 503
         
         # Check if idle for more than 1 hour (3600000 ms)
@@ -2761,6 +7006,91 @@ def keep_alive_ping():
             'error_type': 'network_error'
         }), 500
 
+@app.route('/api/transport-pool')
+def transport_pool_status():
+    """Get the session's own pooled transport and shared pool counters"""
+    conn = scp_manager.get_connection(session.get('session_id'))
+    if not conn:
+        return jsonify({'error': 'No connection found'})
+    return jsonify({
+        'success': True,
+        'transport': scp_manager.transport_pool.describe(conn.get('pool_key')),
+        'pool': scp_manager.transport_pool.stats(),
+        'handoff': scp_manager.handoff.stats(),
+        'private_keys': scp_manager.private_keys.stats()
+    })
+
+@app.route('/api/scheduler')
+def scheduler_status():
+    """Get background health-check scheduler statistics"""
+    return jsonify({'success': True, 'scheduler': scp_manager.scheduler.stats()})
+
+@app.route('/api/ssh-algorithms', methods=['GET', 'POST'])
+def ssh_algorithms():
+    """Get or select the SSH algorithm profile for a host"""
+    try:
+        data = request.json if request.method == 'POST' else request.args
+        host = data.get('host')
+        port = int(data.get('port', 22))
+        
+        if not host:
+            return jsonify({'success': False, 'error': 'Host is required'})
+        
+        if request.method == 'POST':
+            profile = data.get('profile')
+            if profile not in SSH_ALGORITHM_PROFILES:
+                return jsonify({'success': False, 'error': f"Unknown profile '{profile}'. Use one of: {', '.join(SSH_ALGORITHM_PROFILES)}"})
+            scp_manager.algorithm_profiles.set_profile(host, port, profile)
+            logger.info(f"SSH algorithm profile for {host}:{port} set to {profile}")
+        
+        return jsonify({
+            'success': True,
+            'host': host,
+            'port': port,
+            'profiles': list(SSH_ALGORITHM_PROFILES),
+            'settings': scp_manager.algorithm_profiles.settings(host, port),
+            'effective': scp_manager.algorithm_profiles.resolve(host, port),
+            'supported': SSHAlgorithmProfiles.supported()
+        })
+    except Exception as e:
+        logger.error(f"SSH algorithm settings error: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/ssh-benchmark', methods=['POST'])
+def ssh_benchmark():
+    """Benchmark cipher throughput to the connected host and pin the fastest"""
+    session_id = session.get('session_id')
+    conn = scp_manager.get_connection(session_id) if session_id else None
+    if not conn:
+        return jsonify({'success': False, 'error': 'No connection found'})
+    
+    data = request.json or {}
+    credentials = conn.get('stored_credentials') or {}
+    try:
+        size_mb = min(float(data.get('size_mb', SSH_BENCHMARK_SIZE_MB)), 256)
+        result = scp_manager.benchmark_ciphers(
+            conn['host'], conn['username'],
+            password=credentials.get('password'),
+            key_data=credentials.get('key_data'),
+            port=conn['port'],
+            size_mb=size_mb,
+            ciphers=data.get('ciphers')
+        )
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"SSH benchmark error: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/reconnects')
+def reconnect_status():
+    """Get background reconnection outcomes and latency histogram"""
+    return jsonify({'success': True, 'reconnects': scp_manager.reconnect_stats()})
+
+@app.route('/api/session-limits')
+def session_limits():
+    """Get session counts, eviction limits and eviction totals"""
+    return jsonify({'success': True, 'limits': scp_manager.session_limits()})
+
 @app.route('/api/connection-status')
 def connection_status():
     """Get current connection status and statistics"""
@@ -2778,12 +7108,19 @@ def connection_status():
         last_activity = conn.get('last_activity', datetime.now())
         uptime_seconds = (datetime.now() - created_at).total_seconds()
         idle_seconds = (datetime.now() - last_activity).total_seconds()
+        transport = conn['ssh'].get_transport()
         
         return jsonify({
             'connected': True,
             'host': conn['host'],
             'username': conn['username'],
             'port': conn['port'],
+            'cipher': transport.remote_cipher if transport else None,
+            'mac': transport.remote_mac if transport else None,
+            'sftp_channels': conn['sftp_pool'].stats() if conn.get('sftp_pool') else None,
+            'command_channel': conn['command_runner'].stats() if conn.get('command_runner') else None,
+            'listing_cache': conn['listing_cache'].stats() if conn.get('listing_cache') else None,
+            'listing_prefetch': dict(conn['prefetch_stats'], budget_per_minute=LISTING_PREFETCH_BUDGET) if conn.get('prefetch_stats') else None,
             'uptime_seconds': uptime_seconds,
             'idle_seconds': idle_seconds,
             'uptime_formatted': str(datetime.now() - created_at).split('.')[0],
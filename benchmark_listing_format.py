@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the listing response formats
+Compares the default row format (one object per entry) with the columnar
+format (parallel arrays) on a large generated directory: response size,
+gzipped size and server-side time, for a fresh local listing, for an
+already built listing (as served from the remote listing cache) and for
+one page of a paginated listing
+
+Usage: python3 benchmark_listing_format.py [entries]   (default 100000)
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+sys.path.append('.')
+
+import app_enhanced
+from app_enhanced import app, scp_manager, listing_columns
+
+ROUNDS = 3
+
+def build(root, entries):
+    """A flat folder of ``entries`` items, one in a hundred of them folders"""
+    for i in range(entries):
+        if i % 100 == 0:
+            os.mkdir(os.path.join(root, f'dir{i}'))
+        else:
+            with open(os.path.join(root, f'file{i}.dat'), 'wb') as handle:
+                handle.write(b'x' * (i % 5000))
+
+def best_of(function):
+    """Fastest of a few runs, in ms, and the last run's result"""
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, result
+
+def report(name, elapsed, body, baseline=None):
+    zipped = len(gzip.compress(body, 6))
+    line = f"{name:34s} {elapsed:9.1f} ms {len(body) / 1024:10.0f} KiB {zipped / 1024:8.0f} KiB gz"
+    if baseline:
+        line += f"   {baseline[0] / elapsed:4.1f}x faster, {baseline[1] / len(body):4.1f}x smaller"
+    print(line)
+    return elapsed, len(body)
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    root = tempfile.mkdtemp(prefix='format-bench-')
+    try:
+        print(f"🧪 Listing format benchmark: {entries} entries")
+        print("=" * 100)
+        build(root, entries)
+        with app.test_client() as client:
+            # Whole folder through the endpoint: listing, encoding and serialization
+            client.get(f'/api/list-local?path={root}')  # warm the dentry cache
+            elapsed, response = best_of(lambda: client.get(f'/api/list-local?path={root}'))
+            rows = report('local listing (rows)', elapsed, response.data)
+            elapsed, response = best_of(lambda: client.get(f'/api/list-local?path={root}&format=columns'))
+            report('local listing (columns)', elapsed, response.data, rows)
+
+            # A listing that already exists, like a cached remote one: encoding and serialization only
+            listing = scp_manager.list_local_directory(root)
+            with app.test_request_context():
+                public = {key: value for key, value in listing.items() if not key.startswith('_')}
+                elapsed, body = best_of(lambda: app.json.response(public).get_data())
+                rows = report('built listing (rows)', elapsed, body)
+                elapsed, body = best_of(lambda: app.json.response(listing_columns(listing)).get_data())
+                report('built listing (columns)', elapsed, body, rows)
+                columns = listing_columns(listing)
+                elapsed, body = best_of(lambda: app.json.response(columns).get_data())
+                report('  of which serialization', elapsed, body, rows)
+
+            # Later pages of a paginated listing come from the sorted view
+            cursor = client.get(f'/api/list-local?path={root}&limit=1000').get_json()['next_cursor']
+            elapsed, response = best_of(lambda: client.get(f'/api/list-local?cursor={cursor}&limit=1000'))
+            rows = report('page of 1000 (rows)', elapsed, response.data)
+            elapsed, response = best_of(lambda: client.get(f'/api/list-local?cursor={cursor}&limit=1000&format=columns'))
+            report('page of 1000 (columns)', elapsed, response.data, rows)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    app_enhanced.logger.setLevel('WARNING')
+    sys.exit(main())
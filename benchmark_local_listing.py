@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the local filesystem layer
+Compares the os.scandir-based listing and folder scan with the previous
+os.listdir/os.walk versions on a large generated directory
+
+Usage: python3 benchmark_local_listing.py [entries]   (default 100000)
+
+Syscalls are counted with strace when it is installed. Otherwise the
+stat calls each version makes are counted in-process: os.stat/os.lstat
+calls, plus the first DirEntry.stat() per entry. DirEntry caches its stat
+result and takes file types from the directory listing.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+sys.path.append('.')
+
+import app_enhanced
+from app_enhanced import scp_manager
+
+def legacy_list(path):
+    """The previous list_local_directory loop: listdir, then isdir and stat per entry"""
+    items = []
+    for item in os.listdir(path):
+        item_path = os.path.join(path, item)
+        is_dir = os.path.isdir(item_path)
+        try:
+            stat_info = os.stat(item_path)
+            items.append({
+                'name': item,
+                'path': item_path,
+                'is_directory': is_dir,
+                'size': stat_info.st_size if not is_dir else 0,
+                'modified': datetime.fromtimestamp(stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+                'permissions': oct(stat_info.st_mode)[-3:],
+                'owner': stat_info.st_uid,
+                'group': stat_info.st_gid
+            })
+        except OSError:
+            continue
+    items.sort(key=lambda x: (not x['is_directory'], x['name'].lower()))
+    return items
+
+def legacy_details(path):
+    """The previous _get_local_folder_details: os.walk plus getsize per file"""
+    total_size = file_count = dir_count = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        dir_count += len(dirnames)
+        for filename in filenames:
+            try:
+                total_size += os.path.getsize(os.path.join(dirpath, filename))
+                file_count += 1
+            except OSError:
+                pass
+    return total_size, file_count, dir_count
+
+CASES = {
+    'listing (legacy)': lambda root: legacy_list(os.path.join(root, 'flat')),
+    'listing (scandir)': lambda root: scp_manager.list_local_directory(os.path.join(root, 'flat'))['items'],
+    'folder details (legacy)': lambda root: legacy_details(os.path.join(root, 'tree')),
+    'folder details (scandir)': lambda root: scp_manager._scan_local_tree(os.path.join(root, 'tree')),
+    'item count (legacy os.walk)': lambda root: sum(len(d) + len(f) for _, d, f in os.walk(os.path.join(root, 'tree'))),
+    'item count (scandir)': lambda root: scp_manager._scan_local_tree(os.path.join(root, 'tree'), sizes=False)
+}
+
+def build(root, entries):
+    """A flat folder of ``entries`` items and a tree with the same number of files"""
+    flat = os.path.join(root, 'flat')
+    os.makedirs(flat)
+    for i in range(entries):
+        if i % 100 == 0:
+            os.mkdir(os.path.join(flat, f'dir{i}'))
+        else:
+            open(os.path.join(flat, f'file{i}.dat'), 'wb').close()
+    per_folder = 1000
+    for i in range(entries):
+        folder = os.path.join(root, 'tree', f'd{i // per_folder}')
+        if i % per_folder == 0:
+            os.makedirs(folder)
+        open(os.path.join(folder, f'f{i}'), 'wb').close()
+
+class CountingEntry:
+    """DirEntry wrapper that counts the stat calls that reach the kernel"""
+    def __init__(self, entry, counter):
+        self.entry = entry
+        self.counter = counter
+        self.stated = False
+
+    def __getattr__(self, name):
+        return getattr(self.entry, name)
+
+    def stat(self, **kwargs):
+        if not self.stated:
+            self.counter['stat'] += 1
+            self.stated = True
+        return self.entry.stat(**kwargs)
+
+    def is_dir(self, **kwargs):
+        # Types come from the listing except for symlinks, which need a stat
+        if self.entry.is_symlink() and not self.stated:
+            self.counter['stat'] += 1
+            self.stated = True
+        return self.entry.is_dir(**kwargs)
+
+class CountingScandir:
+    def __init__(self, iterator, counter):
+        self.iterator = iterator
+        self.counter = counter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.iterator.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return CountingEntry(next(self.iterator), self.counter)
+
+def count_in_process(case, root):
+    """Run one case with os.stat/os.lstat/os.scandir/os.listdir counted"""
+    counter = {'stat': 0, 'listdir': 0}
+    real = {name: getattr(os, name) for name in ('stat', 'lstat', 'scandir', 'listdir')}
+
+    def counted_stat(*args, **kwargs):
+        counter['stat'] += 1
+        return real['stat'](*args, **kwargs)
+
+    def counted_lstat(*args, **kwargs):
+        counter['stat'] += 1
+        return real['lstat'](*args, **kwargs)
+
+    def counted_scandir(*args):
+        counter['listdir'] += 1
+        return CountingScandir(real['scandir'](*args), counter)
+
+    def counted_listdir(*args):
+        counter['listdir'] += 1
+        return real['listdir'](*args)
+
+    os.stat, os.lstat, os.scandir, os.listdir = counted_stat, counted_lstat, counted_scandir, counted_listdir
+    try:
+        CASES[case](root)
+    finally:
+        for name, function in real.items():
+            setattr(os, name, function)
+    return f"{counter['stat']} stat, {counter['listdir']} dir reads"
+
+def count_with_strace(case, root):
+    """Run one case in a child process under strace -c; returns its syscall total"""
+    script = (f"import sys; sys.path.append('.'); import benchmark_local_listing as b; "
+              f"b.CASES[{case!r}]({root!r})")
+    # The child's interpreter start-up is measured too and subtracted below
+    def total(code):
+        with tempfile.NamedTemporaryFile('r', suffix='.strace') as report:
+            subprocess.run(['strace', '-f', '-c', '-o', report.name, sys.executable, '-c', code],
+                           capture_output=True)
+            for line in report.read().splitlines():
+                # "% time  seconds  usecs/call  calls  errors  total"
+                if line.strip().endswith('total'):
+                    return int(line.split()[3])
+        return 0
+    baseline = total("import sys; sys.path.append('.'); import benchmark_local_listing")
+    return f"{total(script) - baseline} syscalls"
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    root = tempfile.mkdtemp(prefix='listing-bench-')
+    try:
+        print(f"🧪 Local listing benchmark: {entries} entries")
+        print("=" * 70)
+        build(root, entries)
+        counter = count_with_strace if shutil.which('strace') else count_in_process
+        print(f"Syscalls counted {'with strace' if counter is count_with_strace else 'in-process (strace not installed)'}")
+        for case in CASES:
+            CASES[case](root)  # warm the dentry cache so every run sees the same state
+            started = time.perf_counter()
+            CASES[case](root)
+            elapsed = time.perf_counter() - started
+            print(f"{case:30s} {elapsed * 1000:9.1f} ms   {counter(case, root)}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    app_enhanced.logger.setLevel('WARNING')
+    sys.exit(main())
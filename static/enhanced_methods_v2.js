@@ -18,6 +18,15 @@ class EnhancedSCPWebAppV2 {
         // Initialize file arrays
         this.localFiles = [];
         this.remoteFiles = [];
+        // Large folders arrive a page at a time; the cursor fetches the next page
+        this.listingPageSize = 1000;
+        // Listings come as parallel arrays and are turned into entries here (see decodeListing)
+        this.listingFormat = 'columns';
+        this.nextCursor = { local: null, remote: null };
+        this.remoteSearchId = null;
+        // Opt-in live view: the server pushes changes to the open remote folder (see watchRemoteDirectory)
+        this.remoteWatchEnabled = false;
+        this.remoteWatchId = null;
         this.osInfo = null;
         this.lastClickedFile = { local: null, remote: null };
         this.transferInProgress = false;
@@ -1826,6 +1835,8 @@ class EnhancedSCPWebAppV2 {
                 } else {
                     this.handleKeepAliveFailure(data);
                 }
+            } else if (response.status === 401 || response.status === 503) {
+                this.handleKeepAliveFailure(await response.json());
             } else {
                 throw new Error(`HTTP ${response.status}`);
             }
@@ -1837,6 +1848,16 @@ class EnhancedSCPWebAppV2 {
     }
     
     handleKeepAliveFailure(data) {
+        // The server closed this session (idle, connection limit or memory) - no point retrying
+        if (data.error_type === 'session_evicted') {
+            this.showNotification(`🔌 ${data.error}`, 'warning');
+            this.showReconnectButton('Session closed by server - Click to log in again');
+            this.showKeepAliveIndicator('error');
+            this.isConnected = false;
+            this.stopKeepAlive();
+            return;
+        }
+        
         this.keepAliveState.consecutiveFailures++;
         
         // Only show reconnect button after multiple consecutive failures
@@ -2420,6 +2441,23 @@ class EnhancedSCPWebAppV2 {
             console.log(`Progress text updated to: ${progressValue}%`);
         }
         
+        if (progressDetails && progressData.operation === 'delete') {
+            progressDetails.innerHTML = `
+                <div class="progress-file" style="margin-bottom: 10px; font-weight: 500; color: rgba(255, 255, 255, 0.95);">
+                    🗑️ ${progressData.current_file || 'Deleting...'}
+                </div>
+                <div class="progress-counts" style="display: grid; grid-template-columns: 1fr 1fr; gap: 8px; margin-bottom: 8px; font-size: 13px;">
+                    <div style="display: flex; align-items: center; gap: 5px; color: rgba(255, 255, 255, 0.9);">
+                        <span>🧹 Removed: ${progressData.entries_removed || 0}</span>
+                    </div>
+                    <div style="display: flex; align-items: center; gap: 5px; color: rgba(255, 255, 255, 0.9);">
+                        <span>💾 Freed: ${this.formatSize(progressData.bytes_freed || 0)}</span>
+                    </div>
+                </div>
+            `;
+            return;
+        }
+
         if (progressDetails) {
             const speed = this.formatSpeed(progressData.speed || 0);
             const eta = this.formatTime(progressData.eta || 0);
@@ -2870,6 +2908,30 @@ class EnhancedSCPWebAppV2 {
         if (remoteHomeBtn) remoteHomeBtn.addEventListener('click', () => this.navigateRemote('/home'));
         if (remoteRootBtn) remoteRootBtn.addEventListener('click', () => this.navigateRemote('/'));
         if (remoteRefreshBtn) remoteRefreshBtn.addEventListener('click', () => this.refreshRemote());
+        
+        const remoteWatchBtn = document.getElementById('remoteWatchBtn');
+        if (remoteWatchBtn) {
+            remoteWatchBtn.addEventListener('click', () => {
+                this.remoteWatchEnabled = !this.remoteWatchEnabled;
+                remoteWatchBtn.classList.toggle('active', this.remoteWatchEnabled);
+                if (this.remoteWatchEnabled) {
+                    this.watchRemoteDirectory(this.currentRemotePath);
+                } else {
+                    this.stopRemoteWatch();
+                }
+            });
+        }
+        
+        const remoteSearchInput = document.getElementById('remoteSearchInput');
+        if (remoteSearchInput) {
+            remoteSearchInput.addEventListener('keydown', (e) => {
+                if (e.key === 'Enter' && remoteSearchInput.value.trim()) {
+                    this.searchRemote(remoteSearchInput.value.trim());
+                } else if (e.key === 'Escape') {
+                    this.cancelRemoteSearch();
+                }
+            });
+        }
     }
 
     getConnectionData() {
@@ -2971,16 +3033,14 @@ class EnhancedSCPWebAppV2 {
         loginLoading.style.display = 'inline-block';
         
         try {
-            // Step 1: Test server availability first
+            // Step 1: Test server availability first. Sending the credentials lets the
+            // server keep this authenticated connection for the login below.
             this.setLoginStatus('🔍 Checking server availability...', 'info');
             
             const testResponse = await fetch('/api/test-connection', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ 
-                    host: connectionData.host, 
-                    port: parseInt(connectionData.port) 
-                })
+                body: JSON.stringify(connectionData)
             });
             
             const testResult = await testResponse.json();
@@ -2999,6 +3059,9 @@ class EnhancedSCPWebAppV2 {
                     case 'ssh_unavailable':
                         errorMsg = `🔒 SSH service not available on ${connectionData.host}:${connectionData.port}.\n\nPlease check:\n• SSH service is running\n• Correct port number`;
                         break;
+                    case 'auth_failed':
+                        errorMsg = `🔐 Authentication failed.\n\nPlease check:\n• Username and password\n• SSH key file (if using key auth)\n• User account exists on server`;
+                        break;
                     default:
                         errorMsg = `❌ Server check failed: ${testResult.error}`;
                 }
@@ -3063,6 +3126,7 @@ class EnhancedSCPWebAppV2 {
 
     async disconnect() {
         try {
+            this.remoteWatchToken = null;
             await fetch('/api/disconnect', { method: 'POST' });
         } catch (error) {
             console.error('Disconnect error:', error);
@@ -3083,14 +3147,41 @@ class EnhancedSCPWebAppV2 {
     }
 
     async refreshRemote() {
-        await this.loadRemoteDirectory(this.currentRemotePath);
+        // Bypass the server's listing cache so changes made outside the app show up
+        await this.loadRemoteDirectory(this.currentRemotePath, true);
+    }
+
+    decodeListing(panel, result) {
+        // Columnar listings carry one array per field; rebuild the entry objects the panels use
+        if (result.format !== 'columns') return result;
+        const columns = result.columns;
+        const base = result.current_path || '';
+        const separator = panel === 'local' && this.osInfo?.system === 'windows' ? '\\' : '/';
+        const prefix = base.endsWith(separator) ? base : base + separator;
+        const pad = (value) => String(value).padStart(2, '0');
+        const items = columns.name.map((name, index) => {
+            const mode = columns.mode[index];
+            const when = new Date(columns.mtime[index] * 1000);
+            return {
+                name,
+                path: prefix + name,
+                is_directory: (mode & 0o170000) === 0o040000,
+                size: columns.size[index],
+                modified: `${when.getFullYear()}-${pad(when.getMonth() + 1)}-${pad(when.getDate())} ` +
+                          `${pad(when.getHours())}:${pad(when.getMinutes())}:${pad(when.getSeconds())}`,
+                permissions: (mode & 0o777).toString(8).padStart(3, '0'),
+                owner: columns.owner[index],
+                group: columns.group[index]
+            };
+        });
+        return { ...result, items };
     }
 
     async loadLocalDirectory(path) {
         console.log(`📂 loadLocalDirectory called with path: "${path}"`);
         try {
-            const response = await fetch(`/api/list-local?path=${encodeURIComponent(path)}`);
-            const result = await response.json();
+            const response = await fetch(`/api/list-local?path=${encodeURIComponent(path)}&limit=${this.listingPageSize}&format=${this.listingFormat}`);
+            const result = this.decodeListing('local', await response.json());
             
             console.log(`📂 API response for path "${path}":`, result);
             
@@ -3101,23 +3192,28 @@ class EnhancedSCPWebAppV2 {
             
             this.currentLocalPath = result.current_path;
             this.localFiles = result.items || []; // Update localFiles array
+            this.nextCursor.local = result.next_cursor || null;
             this.updateBreadcrumb('local', this.currentLocalPath);
             this.renderFileList('local', result.items);
-            this.updateFileCount('local', result.items.length);
+            this.updateFileCount('local', result.total ?? result.items.length);
         } catch (error) {
             console.error('Failed to load local directory:', error);
         }
     }
 
-    async loadRemoteDirectory(path) {
+    async loadRemoteDirectory(path, refresh = false) {
         try {
             // Show root directory warning if in root
             if (this.isRootDirectory(path)) {
                 this.showRootDirectoryWarning();
             }
             
-            const response = await fetch(`/api/list-remote?path=${encodeURIComponent(path)}`);
-            const result = await response.json();
+            // Rows show up while the server reads the folder; the stream also fills the
+            // server's listing cache, so the sorted first page below needs no second read
+            const streamed = await this.streamRemoteDirectory(path, refresh);
+            
+            const response = await fetch(`/api/list-remote?path=${encodeURIComponent(path)}&limit=${this.listingPageSize}&format=${this.listingFormat}${refresh && !streamed ? '&refresh=1' : ''}`);
+            const result = this.decodeListing('remote', await response.json());
             
             if (result.error) {
                 console.error('Error loading remote directory:', result.error);
@@ -3126,9 +3222,14 @@ class EnhancedSCPWebAppV2 {
             
             this.currentRemotePath = result.current_path;
             this.remoteFiles = result.items || []; // Update remoteFiles array
+            this.nextCursor.remote = result.next_cursor || null;
             this.updateBreadcrumb('remote', this.currentRemotePath);
             this.renderFileList('remote', result.items);
-            this.updateFileCount('remote', result.items.length);
+            this.updateFileCount('remote', result.total ?? result.items.length);
+            
+            if (this.remoteWatchEnabled) {
+                this.watchRemoteDirectory(this.currentRemotePath);
+            }
             
             // Show warning again if we ended up in root after navigation
             if (this.isRootDirectory(this.currentRemotePath)) {
@@ -3139,19 +3240,275 @@ class EnhancedSCPWebAppV2 {
         }
     }
 
+    async streamRemoteDirectory(path, refresh = false) {
+        try {
+            const response = await fetch(`/api/list-remote-stream?path=${encodeURIComponent(path)}${refresh ? '&refresh=1' : ''}`);
+            if (!response.body || !(response.headers.get('Content-Type') || '').includes('ndjson')) {
+                return false;
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            let received = 0;
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop();
+                
+                const items = [];
+                for (const line of lines) {
+                    if (!line) continue;
+                    const entry = JSON.parse(line);
+                    if (entry.event === 'start') {
+                        this.currentRemotePath = entry.current_path;
+                        this.remoteFiles = [];
+                        this.nextCursor.remote = null;
+                        this.updateBreadcrumb('remote', this.currentRemotePath);
+                        this.renderFileList('remote', []);
+                    } else if (entry.event === 'error') {
+                        console.error('Error streaming remote directory:', entry.error);
+                        return false;
+                    } else if (!entry.event) {
+                        items.push(entry);
+                    }
+                }
+                
+                // Only the first page is drawn; the rest of a huge folder is paged in later
+                received += items.length;
+                const room = this.listingPageSize - this.remoteFiles.length;
+                if (items.length && room > 0) {
+                    const shown = items.slice(0, room);
+                    this.remoteFiles.push(...shown);
+                    this.renderFileList('remote', shown, true);
+                }
+                this.updateFileCount('remote', received);
+            }
+            return true;
+        } catch (error) {
+            console.error('Failed to stream remote directory:', error);
+            return false;
+        }
+    }
+
+    async searchRemote(query) {
+        // Results replace the remote listing as they arrive; navigating or refreshing shows the folder again
+        await this.cancelRemoteSearch();
+        const root = this.currentRemotePath || '/';
+        try {
+            const response = await fetch(`/api/search-remote?path=${encodeURIComponent(root)}&query=${encodeURIComponent(query)}`);
+            if (!response.body || !(response.headers.get('Content-Type') || '').includes('ndjson')) {
+                const result = await response.json();
+                this.showNotification(`🔍 ${result.error}`, 'error');
+                return;
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop();
+                
+                const items = [];
+                for (const line of lines) {
+                    if (!line) continue;
+                    const entry = JSON.parse(line);
+                    if (entry.event === 'start') {
+                        this.remoteSearchId = entry.search_id;
+                        this.remoteFiles = [];
+                        this.nextCursor.remote = null;
+                        this.renderFileList('remote', []);
+                    } else if (entry.event === 'end') {
+                        const stopped = entry.cancelled ? ' (stopped)' : entry.limit_reached ? ` (first ${entry.matches} shown)` : '';
+                        this.showNotification(`🔍 ${entry.matches} matches for "${query}" in ${entry.elapsed}s${stopped}`, entry.warning ? 'warning' : 'success');
+                    } else if (entry.event === 'error') {
+                        this.showNotification(`🔍 Search failed: ${entry.error}`, 'error');
+                    } else {
+                        items.push(entry);
+                    }
+                }
+                
+                if (items.length) {
+                    this.remoteFiles.push(...items);
+                    this.renderFileList('remote', items, true);
+                    this.updateFileCount('remote', this.remoteFiles.length);
+                }
+            }
+        } catch (error) {
+            console.error('Failed to search remote files:', error);
+        } finally {
+            this.remoteSearchId = null;
+        }
+    }
+
+    async cancelRemoteSearch() {
+        if (!this.remoteSearchId) return;
+        try {
+            await fetch('/api/search-remote/cancel', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ search_id: this.remoteSearchId })
+            });
+        } catch (error) {
+            console.error('Failed to cancel remote search:', error);
+        }
+    }
+
+    async watchRemoteDirectory(path) {
+        // One watch per session: starting a new one ends the previous feed on the server
+        const token = {};
+        this.remoteWatchToken = token;
+        try {
+            const response = await fetch(`/api/watch-remote?path=${encodeURIComponent(path)}`);
+            if (!response.body || !(response.headers.get('Content-Type') || '').includes('ndjson')) {
+                const result = await response.json();
+                console.error('Error watching remote directory:', result.error);
+                return;
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done || this.remoteWatchToken !== token) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop();
+                
+                for (const line of lines) {
+                    if (!line) continue;
+                    const entry = JSON.parse(line);
+                    if (entry.event === 'start') {
+                        this.remoteWatchId = entry.watch_id;
+                        console.log(`👁️ Watching ${entry.paths.join(', ')} (${entry.method})`);
+                    } else if (entry.event === 'method') {
+                        console.log(`👁️ Watching by ${entry.method}: ${entry.reason}`);
+                    } else if (entry.event === 'change') {
+                        this.applyRemoteChange(entry);
+                    } else if (entry.event === 'gone') {
+                        if (entry.path === this.currentRemotePath) {
+                            this.showNotification(`📁 ${entry.path} was removed on the server`, 'warning');
+                            this.navigateRemote(this.getParentPath(entry.path));
+                        }
+                    } else if (entry.event === 'error') {
+                        console.error('Error watching remote directory:', entry.error);
+                    }
+                }
+            }
+        } catch (error) {
+            console.error('Failed to watch remote directory:', error);
+        } finally {
+            if (this.remoteWatchToken === token) {
+                this.remoteWatchId = null;
+            }
+        }
+    }
+
+    async stopRemoteWatch() {
+        this.remoteWatchToken = null;
+        if (!this.remoteWatchId) return;
+        const watchId = this.remoteWatchId;
+        this.remoteWatchId = null;
+        try {
+            await fetch('/api/watch-remote/cancel', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ watch_id: watchId })
+            });
+        } catch (error) {
+            console.error('Failed to stop remote watch:', error);
+        }
+    }
+
+    applyRemoteChange(change) {
+        // Patch the shown listing in place, keeping the server's order: folders first, then by name
+        if (change.path !== this.currentRemotePath) return;
+        const byName = new Map(this.remoteFiles.map(item => [item.name, item]));
+        change.removed.forEach(name => byName.delete(name));
+        change.modified.forEach(item => byName.set(item.name, item));
+        
+        // Later pages are fetched from the server; only entries that fall within the loaded range are added
+        const order = (a, b) => (b.is_directory - a.is_directory) ||
+            (a.name.toLowerCase() < b.name.toLowerCase() ? -1 : a.name.toLowerCase() > b.name.toLowerCase() ? 1 : 0);
+        const last = this.nextCursor.remote ? this.remoteFiles[this.remoteFiles.length - 1] : null;
+        change.added.forEach(item => {
+            if (!last || order(item, last) < 0) byName.set(item.name, item);
+        });
+        
+        this.remoteFiles = [...byName.values()].sort(order);
+        this.renderFileList('remote', this.remoteFiles);
+        this.updateFileCount('remote', change.total);
+        
+        const listEl = document.getElementById('remoteFileList');
+        for (const path of [...this.selectedRemoteFiles]) {
+            const element = listEl && listEl.querySelector(`[data-path="${CSS.escape(path)}"]`);
+            if (element) {
+                element.classList.add('selected');
+            } else {
+                this.selectedRemoteFiles.delete(path);
+            }
+        }
+        this.updateTransferButtons();
+    }
+
+    async loadMoreFiles(panel) {
+        const cursor = this.nextCursor[panel];
+        if (!cursor) return;
+        const path = panel === 'local' ? this.currentLocalPath : this.currentRemotePath;
+        try {
+            const response = await fetch(`/api/list-${panel}?path=${encodeURIComponent(path)}&cursor=${encodeURIComponent(cursor)}&limit=${this.listingPageSize}&format=${this.listingFormat}`);
+            const result = this.decodeListing(panel, await response.json());
+            
+            if (result.cursor_expired) {
+                // The sorted view timed out on the server; start the folder again
+                if (panel === 'local') {
+                    await this.loadLocalDirectory(path);
+                } else {
+                    await this.loadRemoteDirectory(path);
+                }
+                return;
+            }
+            if (result.error) {
+                console.error(`Error loading more ${panel} files:`, result.error);
+                return;
+            }
+            
+            const files = panel === 'local' ? this.localFiles : this.remoteFiles;
+            files.push(...result.items);
+            this.nextCursor[panel] = result.next_cursor || null;
+            this.renderFileList(panel, result.items, true);
+        } catch (error) {
+            console.error(`Failed to load more ${panel} files:`, error);
+        }
+    }
+
     updateFileCount(panel, count) {
         const countEl = document.getElementById(`${panel}FileCount`);
         countEl.textContent = `(${count} items)`;
     }
 
-    renderFileList(panel, items) {
+    renderFileList(panel, items, append = false) {
         const listEl = document.getElementById(`${panel}FileList`);
         const view = this.currentView[panel];
         
-        listEl.innerHTML = '';
+        let firstIndex = 0;
+        if (append) {
+            listEl.querySelector('.load-more-item')?.remove();
+            firstIndex = listEl.querySelectorAll('.file-item').length;
+        } else {
+            listEl.innerHTML = '';
+        }
         listEl.className = `file-list ${view}-view`;
 
-        items.forEach((item, index) => {
+        items.forEach((item, itemIndex) => {
+            const index = firstIndex + itemIndex;
             const itemEl = document.createElement('div');
             itemEl.className = 'file-item';
             itemEl.dataset.path = item.path;
@@ -3218,6 +3575,14 @@ class EnhancedSCPWebAppV2 {
             listEl.appendChild(itemEl);
         });
         
+        if (this.nextCursor[panel]) {
+            const moreEl = document.createElement('div');
+            moreEl.className = 'load-more-item';
+            moreEl.textContent = `Load more (${listEl.querySelectorAll('.file-item').length} shown)`;
+            moreEl.addEventListener('click', () => this.loadMoreFiles(panel));
+            listEl.appendChild(moreEl);
+        }
+        
         // Update selection display
         this.updateSelectionDisplay(panel);
     }
@@ -3487,15 +3852,79 @@ class EnhancedSCPWebAppV2 {
         });
     }
 
-    async performDeleteLocal(fileList) {
+    async runBatch(operations) {
+        // One request for many file operations; failed items are folded into result.error
+        const response = await fetch('/api/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ operations: operations })
+        });
+
+        const result = await response.json();
+        if (!result.success && Array.isArray(result.results)) {
+            result.error = result.results
+                .filter(item => !item.success)
+                .map(item => {
+                    const op = operations[item.index];
+                    return `${op.path || op.old_path || op.source}: ${item.error}`;
+                })
+                .join('; ');
+        }
+        return result;
+    }
+
+    async runDeletionJob(panel, fileList) {
+        // Deletions run as background jobs on the server and report through the transfer progress modal
+        const response = await fetch('/api/delete-jobs', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ side: panel, files: fileList })
+        });
+        const started = await response.json();
+        if (!started.success) {
+            return started;
+        }
+
+        this.showProgressModal('🗑️', `Deleting ${fileList.length} item${fileList.length > 1 ? 's' : ''}...`);
+        this.transferInProgress = true;
+        this.startProgressMonitoring();
+
         try {
-            const response = await fetch('/api/delete-local-files', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ files: fileList })
-            });
+            while (true) {
+                await new Promise(resolve => setTimeout(resolve, 500));
+                const status = await (await fetch('/api/delete-jobs', { cache: 'no-cache' })).json();
+                const job = status.job;
+                if (!status.success || !job || job.job_id !== started.job_id) {
+                    return { success: false, error: status.error || 'Deletion job not found' };
+                }
+                if (job.state === 'running') {
+                    continue;
+                }
+                if (job.state === 'cancelled') {
+                    return { success: false, cancelled: true, error: 'Deletion cancelled' };
+                }
+                const more = job.error_count > job.errors.length ? ` (and ${job.error_count - job.errors.length} more)` : '';
+                return job.error_count === 0
+                    ? { success: true, job: job }
+                    : { success: false, job: job, error: job.errors.join('; ') + more };
+            }
+        } finally {
+            this.transferInProgress = false;
+            this.stopProgressMonitoring();
+            this.hideProgressModal();
+        }
+    }
 
-            const result = await response.json();
+    async performDeleteLocal(fileList) {
+        try {
+            const result = await this.runDeletionJob('local', fileList);
+            
+            if (result.cancelled) {
+                // Part of the selection may be gone already
+                this.clearSelectionLocal();
+                await this.loadLocalDirectory(this.currentLocalPath);
+                return;
+            }
             
             if (result.success) {
                 this.showNotification(`✅ Successfully deleted ${fileList.length} item${fileList.length > 1 ? 's' : ''}`, 'success');
@@ -3545,13 +3974,14 @@ class EnhancedSCPWebAppV2 {
 
     async performDeleteRemote(fileList) {
         try {
-            const response = await fetch('/api/delete-remote-files', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ files: fileList })
-            });
-
-            const result = await response.json();
+            const result = await this.runDeletionJob('remote', fileList);
+            
+            if (result.cancelled) {
+                // Part of the selection may be gone already
+                this.clearSelectionRemote();
+                await this.loadRemoteDirectory(this.currentRemotePath);
+                return;
+            }
             
             if (result.success) {
                 this.showNotification(`✅ Successfully deleted ${fileList.length} item${fileList.length > 1 ? 's' : ''}`, 'success');
@@ -3659,17 +4089,7 @@ class EnhancedSCPWebAppV2 {
         }
 
         try {
-            const endpoint = panel === 'local' ? '/api/create-local-folder' : '/api/create-remote-folder';
-            
-            const response = await fetch(endpoint, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ path: fullPath })
-            });
-
-            const result = await response.json();
+            const result = await this.runBatch([{ op: 'mkdir', side: panel, path: fullPath }]);
             
             if (result && result.success === true) {
                 this.showNotification(`✅ Successfully created folder "${folderName}"`, 'success');
@@ -3755,20 +4175,7 @@ class EnhancedSCPWebAppV2 {
         const newPath = parentPath ? `${parentPath}${separator}${newName}` : newName;
 
         try {
-            const endpoint = panel === 'local' ? '/api/rename-local-item' : '/api/rename-remote-item';
-            
-            const response = await fetch(endpoint, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    old_path: oldPath,
-                    new_path: newPath
-                })
-            });
-
-            const result = await response.json();
+            const result = await this.runBatch([{ op: 'rename', side: panel, old_path: oldPath, new_path: newPath }]);
             
             if (result.success) {
                 this.showNotification(`✅ Successfully renamed to "${newName}"`, 'success');
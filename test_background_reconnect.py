@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test for background reconnection with backoff and transfers resuming across it
+Uses placeholder connections and a stubbed reconnect so no SSH server is required
+"""
+
+import sys
+import threading
+sys.path.append('.')
+
+import app_enhanced
+from app_enhanced import scp_manager, LatencyHistogram
+
+class FakeTransport:
+    def __init__(self, active=True):
+        self.active = active
+
+    def is_active(self):
+        return self.active
+
+class FakeSSH:
+    def __init__(self, active=True):
+        self.transport = FakeTransport(active)
+
+    def get_transport(self):
+        return self.transport
+
+class FlakySFTP:
+    """SFTP stand-in whose calls fail while its transport is down"""
+    def __init__(self, ssh):
+        self.ssh = ssh
+        self.calls = 0
+
+    def stat(self, path):
+        self.calls += 1
+        if not self.ssh.transport.active:
+            raise EOFError("connection dropped")
+        if path == '/missing':
+            raise FileNotFoundError(path)
+        return path
+
+class FakeChannelPool:
+    def __init__(self, ssh):
+        self.sftp = FlakySFTP(ssh)
+        self.returned = []
+
+    def checkout(self):
+        return self.sftp
+
+    def checkin(self, sftp):
+        self.returned.append(sftp)
+
+def add_session(session_id, active=True):
+    ssh = FakeSSH(active)
+    scp_manager.connections[session_id] = {
+        'ssh': ssh,
+        'sftp_pool': FakeChannelPool(ssh),
+        'host': 'reconnect-host',
+        'username': 'tester',
+        'port': 22
+    }
+    return scp_manager.connections[session_id]
+
+def stub_reconnect(outcomes):
+    """Replace the real reconnect with scripted results"""
+    def attempt(session_id):
+        success = outcomes.pop(0)
+        if success:
+            conn = scp_manager.connections[session_id]
+            conn['ssh'] = FakeSSH()
+            conn['sftp_pool'] = FakeChannelPool(conn['ssh'])
+            return {'success': True}
+        return {'success': False, 'error': 'still down', 'error_type': 'server_unreachable'}
+    scp_manager._attempt_auto_reconnect = attempt
+
+def restore_reconnect():
+    scp_manager.__dict__.pop('_attempt_auto_reconnect', None)
+
+def test_histogram_buckets():
+    """Latencies land in the first bucket whose bound covers them"""
+    histogram = LatencyHistogram(bounds=[1, 5])
+    for seconds in (0.2, 1.0, 3.0, 12.0):
+        histogram.record(seconds)
+    stats = histogram.stats()
+    assert stats['buckets'] == {'1': 2, '5': 1, '+Inf': 1}
+    assert stats['count'] == 4 and stats['max'] == 12.0
+    print("✅ Reconnect latency histogram buckets")
+
+def test_backoff_with_jitter_then_success():
+    """Failed attempts back off exponentially with jitter; success records latency"""
+    add_session('flaky', active=False)
+    stub_reconnect([False, False, False, True])
+    try:
+        scp_manager.connections['flaky']['reconnecting'] = {
+            'since': 0, 'reason': 'test', 'attempts': 0, 'last_error': None,
+            'done': threading.Event()
+        }
+        done = scp_manager.connections['flaky']['reconnecting']['done']
+        count_before = scp_manager.reconnect_latency.stats()['count']
+
+        for attempt in range(1, 4):
+            delay = scp_manager._reconnect_step('flaky')
+            ceiling = min(app_enhanced.RECONNECT_MAX_DELAY, app_enhanced.RECONNECT_BASE_DELAY * 2 ** (attempt - 1))
+            assert ceiling / 2 <= delay <= ceiling
+
+        assert scp_manager._reconnect_step('flaky') is None
+        assert done.is_set() and 'reconnecting' not in scp_manager.connections['flaky']
+        assert scp_manager.reconnect_latency.stats()['count'] == count_before + 1
+        print("✅ Reconnect backs off with jitter and records latency")
+    finally:
+        restore_reconnect()
+        scp_manager.connections.pop('flaky', None)
+
+def test_auth_required_stops_retrying():
+    """Without stored credentials the reconnector gives up and flags re-auth"""
+    add_session('noauth', active=False)
+    scp_manager._attempt_auto_reconnect = lambda session_id: {
+        'success': False, 'error': 'credentials needed', 'error_type': 'auth_required'}
+    try:
+        scp_manager.connections['noauth']['reconnecting'] = {
+            'since': 0, 'reason': 'test', 'attempts': 0, 'last_error': None,
+            'done': threading.Event()
+        }
+        assert scp_manager._reconnect_step('noauth') is None
+        assert scp_manager.connections['noauth']['needs_reauth'] is True
+        print("✅ Reconnect stops when credentials are required")
+    finally:
+        restore_reconnect()
+        scp_manager.connections.pop('noauth', None)
+
+def test_transfer_channel_resumes_on_new_transport():
+    """A call that fails on a dropped transport is retried on the rebuilt one"""
+    conn = add_session('resume')
+    stub_reconnect([True])
+    try:
+        with scp_manager.resumable_channel('resume') as sftp:
+            assert sftp.stat('/a') == '/a'
+            old_pool = conn['sftp_pool']
+            conn['ssh'].transport.active = False
+
+            assert sftp.stat('/b') == '/b'
+            new_pool = scp_manager.connections['resume']['sftp_pool']
+            assert new_pool is not old_pool and sftp.resumed == 1
+            assert old_pool.returned == [old_pool.sftp]
+        assert new_pool.returned == [new_pool.sftp]
+        print("✅ Transfers pause and resume on the new transport")
+    finally:
+        restore_reconnect()
+        scp_manager.connections.pop('resume', None)
+        scp_manager.scheduler.cancel('reconnect:resume')
+
+def test_application_errors_are_not_retried():
+    """Errors on a healthy transport propagate immediately"""
+    add_session('healthy')
+    try:
+        with scp_manager.resumable_channel('healthy') as sftp:
+            try:
+                sftp.stat('/missing')
+                assert False, "missing file should raise"
+            except FileNotFoundError:
+                pass
+            assert sftp.calls == 1 and sftp.resumed == 0
+        print("✅ Errors on a live connection are not retried")
+    finally:
+        scp_manager.connections.pop('healthy', None)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Background Reconnect")
+    print("=" * 50)
+    test_histogram_buckets()
+    test_backoff_with_jitter_then_success()
+    test_auth_required_stops_retrying()
+    test_transfer_channel_resumes_on_new_transport()
+    test_application_errors_are_not_retried()
+    print("=" * 50)
+    print("🎉 All background reconnect tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test for the /api/batch file operations endpoint
+Checks dependency waves, skipping after failures, local operations and remote grouping
+Remote operations go to a recording stand-in so no SSH server is required
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append('.')
+
+from app_enhanced import app, FileOperationBatch
+
+class RecordingManager:
+    """Records which remote batches ran; paths containing 'bad' fail"""
+    def __init__(self):
+        self.calls = []
+
+    def _errors(self, name, items):
+        self.calls.append((name, list(items)))
+        return ['Failure' if 'bad' in str(item) else None for item in items]
+
+    def make_remote_dirs(self, conn, paths):
+        return self._errors('mkdir', paths)
+
+    def rename_remote_many(self, conn, pairs):
+        return self._errors('rename', pairs)
+
+    def delete_remote_paths(self, conn, paths):
+        return {path: error for path, error in zip(paths, self._errors('delete', paths)) if error}
+
+    def chmod_remote_many(self, conn, pairs):
+        return self._errors('chmod', pairs)
+
+    def copy_remote_many(self, conn, pairs):
+        return self._errors('copy', pairs)
+
+def test_dependent_operations_wait_for_their_parents():
+    """Operations on overlapping paths land in later waves; independent ones share a wave"""
+    operations = [
+        {'op': 'mkdir', 'side': 'remote', 'path': '/home/u/new'},
+        {'op': 'mkdir', 'side': 'remote', 'path': '/home/u/other'},
+        {'op': 'rename', 'side': 'remote', 'old_path': '/home/u/new', 'new_path': '/home/u/renamed'},
+        {'op': 'chmod', 'side': 'remote', 'path': '/home/u/renamed/x', 'mode': '750'},
+        {'op': 'mkdir', 'side': 'local', 'path': '/home/u/new'}
+    ]
+    batch = FileOperationBatch(RecordingManager(), {}, operations)
+    assert batch.waves == [[0, 1, 4], [2], [3]]
+    print("✅ Dependent operations wait for the operations they touch")
+
+def test_remote_operations_of_a_wave_run_as_one_batch():
+    """Each wave sends one request batch per kind of remote operation"""
+    manager = RecordingManager()
+    operations = [{'op': 'delete', 'side': 'remote', 'path': f'/home/u/f{i}'} for i in range(5)]
+    operations.append({'op': 'mkdir', 'side': 'remote', 'path': '/home/u/dir'})
+    results = FileOperationBatch(manager, {}, operations).run()
+    assert all(result['success'] for result in results)
+    assert manager.calls == [('delete', [f'/home/u/f{i}' for i in range(5)]), ('mkdir', ['/home/u/dir'])]
+    print("✅ A wave's remote operations are batched by kind")
+
+def test_failed_operation_skips_its_dependents():
+    """Dependents of a failure are skipped; unrelated operations still run"""
+    operations = [
+        {'op': 'mkdir', 'side': 'remote', 'path': '/home/u/bad'},
+        {'op': 'copy', 'side': 'remote', 'source': '/home/u/bad', 'destination': '/home/u/copy'},
+        {'op': 'mkdir', 'side': 'remote', 'path': '/home/u/fine'},
+        {'op': 'chmod', 'side': 'remote', 'path': '/home/u/fine', 'mode': 'rwx'},
+        {'op': 'mkdir', 'side': 'remote', 'path': '/etc/evil'}
+    ]
+    results = FileOperationBatch(RecordingManager(), {}, operations).run()
+    assert [result['success'] for result in results] == [False, False, True, False, False]
+    assert results[1]['skipped'] and 'operation 0' in results[1]['error']
+    assert 'octal' in results[3]['error'] and 'not allowed' in results[4]['error']
+
+    halted = [operations[0], operations[2], {'op': 'chmod', 'side': 'remote', 'path': '/home/u/fine', 'mode': '755'}]
+    results = FileOperationBatch(RecordingManager(), {}, halted, stop_on_error=True).run()
+    assert results[1]['success'] and results[2]['skipped'] is True
+    print("✅ Failures skip dependents and stop_on_error halts the batch")
+
+def test_local_batch_through_endpoint():
+    """Local-only batches run without an SSH session"""
+    workdir = tempfile.mkdtemp()
+    try:
+        folder = os.path.join(workdir, 'folder')
+        operations = [
+            {'op': 'mkdir', 'side': 'local', 'path': folder},
+            {'op': 'copy', 'side': 'local', 'source': folder, 'destination': folder + '-copy'},
+            {'op': 'rename', 'side': 'local', 'old_path': folder, 'new_path': folder + '-renamed'},
+            {'op': 'chmod', 'side': 'local', 'path': folder + '-copy', 'mode': '700'},
+            {'op': 'delete', 'side': 'local', 'path': os.path.join(workdir, 'missing')}
+        ]
+        with app.test_client() as client:
+            data = client.post('/api/batch', json={'operations': operations}).get_json()
+        assert data['failed'] == 1 and not data['success']
+        assert data['results'][4]['error'] == 'File does not exist'
+        assert sorted(os.listdir(workdir)) == ['folder-copy', 'folder-renamed']
+        assert os.stat(folder + '-copy').st_mode & 0o777 == 0o700
+        print("✅ Local batch runs through /api/batch")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Batch Operations")
+    print("=" * 50)
+    test_dependent_operations_wait_for_their_parents()
+    test_remote_operations_of_a_wave_run_as_one_batch()
+    test_failed_operation_skips_its_dependents()
+    test_local_batch_through_endpoint()
+    print("=" * 50)
+    print("🎉 All batch operation tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Test for shared SSH connection pooling
+Uses small fake SSH clients so no SSH server is required
+"""
+
+import io
+import os
+import sys
+import time
+import tempfile
+import threading
+sys.path.append('.')
+
+import paramiko
+from app_enhanced import app, scp_manager, SSHTransportPool, SFTPChannelPool, ConnectionHandoffCache, SSHAlgorithmProfiles, PrivateKeyCache
+
+class FakeTransport:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def is_authenticated(self):
+        return self.active
+
+class FakeChannel:
+    def __init__(self):
+        self.closed = False
+
+    def settimeout(self, timeout):
+        pass
+
+class FakeSFTP:
+    def __init__(self):
+        self.channel = FakeChannel()
+
+    def get_channel(self):
+        return self.channel
+
+    def close(self):
+        self.channel.closed = True
+
+class FakeSSHClient:
+    def __init__(self, max_sftp=None):
+        self.transport = FakeTransport()
+        self.closed = False
+        self.max_sftp = max_sftp
+        self.opened = 0
+
+    def get_transport(self):
+        return self.transport
+
+    def open_sftp(self):
+        if self.max_sftp is not None and self.opened >= self.max_sftp:
+            raise Exception("administratively prohibited")
+        self.opened += 1
+        return FakeSFTP()
+
+    def close(self):
+        self.closed = True
+        self.transport.active = False
+
+def test_pool_key_hides_credentials():
+    """Pool keys carry a credential fingerprint, never the secret itself"""
+    key = SSHTransportPool.make_key('host', 22, 'user', password='hunter2')
+    assert 'hunter2' not in repr(key)
+    assert key != SSHTransportPool.make_key('host', 22, 'user', password='other')
+    assert key == SSHTransportPool.make_key('host', '22', 'user', password='hunter2')
+    print("✅ Pool keys use credential fingerprints")
+
+def test_transport_shared_and_reference_counted():
+    """A second lease reuses the transport; release only closes on idle sweep"""
+    pool = SSHTransportPool(idle_timeout=60)
+    key = SSHTransportPool.make_key('host', 22, 'user', password='pw')
+    assert pool.acquire(key) is None
+
+    ssh = FakeSSHClient()
+    first = pool.add(key, ssh)
+    second = pool.acquire(key)
+    assert second is first and first['refs'] == 2
+
+    pool.release(ssh)
+    pool.release(ssh)
+    assert first['refs'] == 0 and not ssh.closed
+    assert pool.sweep() == 0
+
+    first['last_used'] = time.time() - 120
+    assert pool.sweep() == 1
+    assert ssh.closed and not pool.entries
+    print("✅ Transports shared, ref-counted and closed when idle")
+
+def test_pool_endpoint_shows_only_the_sessions_transport():
+    """/api/transport-pool needs a session and never lists other users' hosts"""
+    mine = SSHTransportPool.make_key('mine.example', 22, 'alice', password='pw')
+    theirs = SSHTransportPool.make_key('theirs.example', 22, 'bob', password='pw')
+    scp_manager.transport_pool.add(mine, FakeSSHClient())
+    scp_manager.transport_pool.add(theirs, FakeSSHClient())
+    scp_manager.connections['pool-endpoint'] = {'pool_key': mine}
+    try:
+        with app.test_client() as client:
+            assert client.get('/api/transport-pool').get_json() == {'error': 'No connection found'}
+            with client.session_transaction() as sess:
+                sess['session_id'] = 'pool-endpoint'
+            data = client.get('/api/transport-pool').get_json()
+        assert data['transport']['host'] == 'mine.example' and data['transport']['leases'] == 1
+        assert 'theirs.example' not in repr(data) and 'bob' not in repr(data)
+        assert data['pool']['transports'] >= 2 and data['pool']['leases'] >= 2
+        print("✅ Transport pool endpoint scoped to the session")
+    finally:
+        scp_manager.connections.pop('pool-endpoint', None)
+        scp_manager.transport_pool.entries.pop(mine, None)
+        scp_manager.transport_pool.entries.pop(theirs, None)
+
+def test_dead_transport_replaced():
+    """A dead pooled transport is dropped instead of being leased"""
+    pool = SSHTransportPool()
+    key = SSHTransportPool.make_key('host', 22, 'user', key_data='KEY')
+    ssh = FakeSSHClient()
+    pool.add(key, ssh)
+    ssh.transport.active = False
+
+    assert pool.acquire(key) is None
+    assert key not in pool.entries
+    print("✅ Dead transports are not leased")
+
+def test_racing_add_shares_existing():
+    """Two logins racing to connect end up sharing one transport"""
+    pool = SSHTransportPool()
+    key = SSHTransportPool.make_key('host', 22, 'user', password='pw')
+    winner, loser = FakeSSHClient(), FakeSSHClient()
+    pool.add(key, winner)
+    entry = pool.add(key, loser)
+
+    assert entry['ssh'] is winner and entry['refs'] == 2
+    assert loser.closed
+    print("✅ Racing logins share one transport")
+
+def test_tested_connection_handed_off_once():
+    """A tested client is promoted by the next login and expires if unclaimed"""
+    handoff = ConnectionHandoffCache(ttl=0.2)
+    key = SSHTransportPool.make_key('host', 22, 'user', password='pw')
+    tested = FakeSSHClient()
+    handoff.put(key, tested)
+    assert handoff.take(key) is tested
+    assert handoff.take(key) is None and not tested.closed
+
+    unclaimed = FakeSSHClient()
+    handoff.put(key, unclaimed)
+    time.sleep(0.4)
+    assert unclaimed.closed and handoff.take(key) is None
+    assert handoff.stats()['promoted'] == 1 and handoff.stats()['expired'] == 1
+    print("✅ Tested connections handed off to login, then expired")
+
+def test_sftp_pool_checkout_and_return():
+    """Bulk channels are reused and capped; the interactive lane is separate"""
+    ssh = FakeSSHClient()
+    interactive = FakeSFTP()
+    pool = SFTPChannelPool(ssh, interactive=interactive, max_channels=2)
+
+    first = pool.checkout()
+    second = pool.checkout()
+    assert first is not second and interactive not in (first, second)
+    pool.checkin(first)
+    assert pool.checkout() is first
+    assert ssh.opened == 2
+
+    with pool.interactive_channel() as lane:
+        assert lane is interactive
+    print("✅ SFTP channels checked out, reused and capped")
+
+def test_sftp_pool_waits_for_return():
+    """A checkout beyond the cap waits until a channel is returned"""
+    pool = SFTPChannelPool(FakeSSHClient(), interactive=FakeSFTP(), max_channels=1)
+    held = pool.checkout()
+    got = []
+
+    waiter = threading.Thread(target=lambda: got.append(pool.checkout()))
+    waiter.start()
+    time.sleep(0.1)
+    assert not got
+    pool.checkin(held)
+    waiter.join(2)
+    assert got == [held] and pool.stats()['waits'] == 1
+    print("✅ Checkout waits for a returned channel")
+
+def test_sftp_pool_falls_back_when_server_refuses_channels():
+    """If the server refuses more sessions, bulk work shares the interactive lane"""
+    ssh = FakeSSHClient(max_sftp=0)
+    interactive = FakeSFTP()
+    pool = SFTPChannelPool(ssh, interactive=interactive, max_channels=3)
+
+    with pool.channel() as sftp:
+        assert sftp is interactive
+    assert pool.max_channels == 0
+
+    # Later checkouts share the lane too instead of waiting for a channel that never comes back
+    got = []
+    later = threading.Thread(target=lambda: got.extend([pool.checkout(), pool.checkout()]))
+    later.start()
+    later.join(2)
+    assert got == [interactive, interactive] and pool.stats()['waits'] == 0
+    print("✅ Falls back to the interactive lane when channels are refused")
+
+def test_quiet_checkout_never_competes():
+    """Background checkouts get a channel only while no bulk work runs, and never wait"""
+    ssh = FakeSSHClient()
+    pool = SFTPChannelPool(ssh, interactive=FakeSFTP(), max_channels=2)
+
+    spare = pool.checkout_if_quiet()
+    assert spare is not None
+    pool.checkin(spare)
+    held = pool.checkout()
+    assert pool.checkout_if_quiet() is None
+    pool.checkin(held)
+
+    refusing = SFTPChannelPool(FakeSSHClient(max_sftp=0), interactive=FakeSFTP(), max_channels=2)
+    assert refusing.checkout_if_quiet() is None and refusing.stats()['bulk_open'] == 0
+    print("✅ Quiet checkout yields to bulk work")
+
+def test_algorithm_profiles_and_benchmark_pin():
+    """Profiles skip unsupported algorithms and a benchmark pins the fastest cipher"""
+    handle, path = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    os.unlink(path)
+    try:
+        profiles = SSHAlgorithmProfiles(path=path)
+        supported = SSHAlgorithmProfiles.supported()
+        assert profiles.resolve('host', 22) == supported
+
+        profiles.set_profile('host', 22, 'throughput')
+        ciphers = profiles.resolve('host', 22)['ciphers']
+        assert ciphers and set(ciphers) <= set(supported['ciphers'])
+        assert not any(name.endswith('-cbc') for name in ciphers)
+
+        pinned = profiles.record_benchmark('host', 22, [
+            {'cipher': 'aes128-ctr', 'mbps': 80.0},
+            {'cipher': 'aes256-ctr', 'mbps': 95.5},
+            {'cipher': 'aes192-ctr', 'error': 'refused'}
+        ])
+        assert pinned == 'aes256-ctr'
+        reloaded = SSHAlgorithmProfiles(path=path)
+        assert reloaded.resolve('host', 22)['ciphers'][0] == 'aes256-ctr'
+        assert reloaded.settings('host', 22)['profile'] == 'throughput'
+        print("✅ Algorithm profiles resolved and fastest cipher pinned")
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+def test_private_keys_parsed_once_from_memory():
+    """Keys are parsed from memory once, then served from a bounded cache"""
+    buffer = io.StringIO()
+    paramiko.ECDSAKey.generate().write_private_key(buffer)
+    key_data = buffer.getvalue()
+
+    cache = PrivateKeyCache(max_keys=1)
+    first = cache.load(key_data)
+    assert isinstance(first, paramiko.ECDSAKey)
+    assert cache.load(key_data) is first
+    assert cache.stats()['hits'] == 1 and cache.stats()['last_type'] == 'ECDSA'
+
+    other = io.StringIO()
+    paramiko.ECDSAKey.generate().write_private_key(other)
+    cache.load(other.getvalue())
+    assert cache.stats()['cached'] == 1 and cache.load(key_data) is not first
+
+    try:
+        cache.load('not a key')
+        assert False, "invalid key should not load"
+    except Exception as e:
+        assert 'Failed to load SSH key' in str(e)
+    print("✅ Private keys parsed in memory and cached")
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Connection Pools")
+    print("=" * 50)
+    test_pool_key_hides_credentials()
+    test_transport_shared_and_reference_counted()
+    test_pool_endpoint_shows_only_the_sessions_transport()
+    test_dead_transport_replaced()
+    test_racing_add_shares_existing()
+    test_tested_connection_handed_off_once()
+    test_sftp_pool_checkout_and_return()
+    test_sftp_pool_waits_for_return()
+    test_sftp_pool_falls_back_when_server_refuses_channels()
+    test_quiet_checkout_never_competes()
+    test_algorithm_profiles_and_benchmark_pin()
+    test_private_keys_parsed_once_from_memory()
+    print("=" * 50)
+    print("🎉 All connection pool tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
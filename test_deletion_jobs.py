@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test for background deletion jobs
+Deletes local trees through /api/delete-jobs and checks counters, progress and cancellation
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+sys.path.append('.')
+
+from app_enhanced import app, scp_manager, TransferHistoryStore
+
+def make_tree(root, dirs=5, files=20, size=10):
+    for d in range(dirs):
+        folder = os.path.join(root, f'dir{d}', 'nested')
+        os.makedirs(folder)
+        for f in range(files):
+            with open(os.path.join(folder, f'file{f}.bin'), 'wb') as handle:
+                handle.write(b'x' * size)
+
+def wait_for_job(client, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get('/api/delete-jobs').get_json()['job']
+        if job['state'] != 'running':
+            return job
+        time.sleep(0.02)
+    raise AssertionError("deletion job did not finish")
+
+def test_local_job_counts_entries_and_bytes():
+    """A local job removes whole trees and reports entries removed and bytes freed"""
+    workdir = tempfile.mkdtemp()
+    try:
+        make_tree(os.path.join(workdir, 'cache'))
+        with open(os.path.join(workdir, 'loose.txt'), 'wb') as handle:
+            handle.write(b'12345')
+        with app.test_client() as client:
+            started = client.post('/api/delete-jobs', json={
+                'side': 'local',
+                'files': [os.path.join(workdir, 'cache'), os.path.join(workdir, 'loose.txt'), os.path.join(workdir, 'missing')]
+            }).get_json()
+            assert started['success']
+            job = wait_for_job(client)
+
+            # 100 files + 10 folders + cache itself + loose.txt
+            assert job['entries_removed'] == 112 and job['dirs_removed'] == 11
+            assert job['bytes_freed'] == 100 * 10 + 5
+            assert job['state'] == 'completed_with_errors' and job['error_count'] == 1
+            assert os.listdir(workdir) == []
+
+            # The transfer per-file table carries one row per requested path
+            rows = client.get('/api/transfer-files').get_json()
+            assert rows['job_id'] == started['job_id'] and rows['total'] == 3
+            assert rows['counts'] == {'queued': 0, 'active': 0, 'done': 2, 'failed': 1}
+        print("✅ Local deletion job removes trees and counts bytes freed")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def block_until_cancelled():
+    """Swap in a local delete that waits for cancellation, so a job stays running"""
+    def delete_tree(job, path):
+        job.cancel_event.wait(5)
+        return []
+    scp_manager._delete_local_tree = delete_tree
+
+def restore_delete():
+    scp_manager.__dict__.pop('_delete_local_tree', None)
+
+def test_progress_and_cancel_reuse_transfer_endpoints():
+    """Deletion progress shows on /api/transfer-progress and /api/cancel-transfer stops it"""
+    block_until_cancelled()
+    try:
+        with app.test_client() as client:
+            assert client.post('/api/delete-jobs', json={'side': 'local', 'files': ['/tmp/placeholder']}).get_json()['success']
+            progress = client.get('/api/transfer-progress').get_json()
+            assert progress['operation'] == 'delete' and progress['total_items'] == 1
+
+            assert client.post('/api/cancel-transfer').get_json()['success']
+            job = wait_for_job(client)
+            assert job['state'] == 'cancelled'
+        print("✅ Deletion progress and cancel go through the transfer endpoints")
+    finally:
+        restore_delete()
+
+class CopySFTP:
+    """Just enough SFTP for an upload: put copies into a local folder"""
+    def __init__(self, root):
+        self.root = root
+
+    def stat(self, path):
+        return os.stat(self.root + path)
+
+    def mkdir(self, path):
+        os.mkdir(self.root + path)
+
+    def put(self, local_path, remote_path, callback=None):
+        shutil.copyfile(local_path, self.root + remote_path)
+        size = os.path.getsize(local_path)
+        if callback:
+            callback(size, size)
+
+def test_cancelled_delete_leaves_later_transfers_alone():
+    """Cancelling a deletion does not cancel the session's next transfer"""
+    workdir = tempfile.mkdtemp()
+    history = scp_manager.history
+    scp_manager.history = TransferHistoryStore(os.path.join(workdir, 'history.db'))
+    block_until_cancelled()
+    try:
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['session_id'] = 'delete-then-transfer'
+            conn = {'host': 'h', 'port': 22, 'username': 'u', 'transfer_active': False,
+                    'stats': {'bytes_transferred': 0, 'files_transferred': 0}}
+            scp_manager.connections['delete-then-transfer'] = conn
+            assert client.post('/api/delete-jobs', json={'side': 'local', 'files': ['/tmp/placeholder']}).get_json()['success']
+            assert client.post('/api/cancel-transfer').get_json()['success']
+            assert not conn.get('transfer_cancelled')
+            assert wait_for_job(client)['state'] == 'cancelled'
+
+            # Even a cancel left over from an earlier transfer is cleared when the next one starts
+            conn['transfer_cancelled'] = True
+            source = os.path.join(workdir, 'src')
+            os.makedirs(source)
+            os.makedirs(os.path.join(workdir, 'remote'))
+            with open(os.path.join(source, 'a.txt'), 'wb') as handle:
+                handle.write(b'hello')
+            result = scp_manager._transfer_multiple_files('delete-then-transfer', CopySFTP(os.path.join(workdir, 'remote')),
+                                                          [os.path.join(source, 'a.txt')], 'upload', source, '/')
+            assert result['success'] and all(item['success'] for item in result['results']), result
+            assert os.path.exists(os.path.join(workdir, 'remote', 'a.txt'))
+        print("✅ Cancelling a delete leaves later transfers alone")
+    finally:
+        restore_delete()
+        scp_manager.history = history
+        scp_manager.connections.pop('delete-then-transfer', None)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_one_running_job_per_session():
+    """A second job is refused while the first is still running"""
+    block_until_cancelled()
+    try:
+        with app.test_client() as client:
+            assert client.post('/api/delete-jobs', json={'side': 'local', 'files': ['/tmp/placeholder']}).get_json()['success']
+            second = client.post('/api/delete-jobs', json={'side': 'local', 'files': ['/tmp/other']}).get_json()
+            assert not second['success'] and 'already running' in second['error']
+            client.post('/api/cancel-transfer')
+            wait_for_job(client)
+        print("✅ One deletion job at a time per session")
+    finally:
+        restore_delete()
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Background Deletion Jobs")
+    print("=" * 50)
+    test_local_job_counts_entries_and_bytes()
+    test_progress_and_cancel_reuse_transfer_endpoints()
+    test_cancelled_delete_leaves_later_transfers_alone()
+    test_one_running_job_per_session()
+    print("=" * 50)
+    print("🎉 All deletion job tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test for the shared keep-alive scheduler
+Checks job ordering, rescheduling, cancellation and due/late accounting
+"""
+
+import sys
+import time
+import threading
+sys.path.append('.')
+
+from app_enhanced import PeriodicScheduler
+
+def test_jobs_run_in_due_order_and_reschedule():
+    """Jobs run by due time and repeat with the delay they return"""
+    scheduler = PeriodicScheduler(max_workers=1)
+    order = []
+    counts = {'repeat': 0}
+
+    def repeat():
+        counts['repeat'] += 1
+        order.append('repeat')
+        return 0.05 if counts['repeat'] < 3 else None
+
+    scheduler.schedule('late', lambda: order.append('late'), 0.2)
+    scheduler.schedule('repeat', repeat, 0.01)
+    time.sleep(0.5)
+
+    assert order == ['repeat', 'repeat', 'repeat', 'late']
+    assert scheduler.stats()['scheduled'] == 0
+    print("✅ Jobs run in due order and reschedule themselves")
+
+def test_cancel_stops_future_runs():
+    """A cancelled job is not run again"""
+    scheduler = PeriodicScheduler()
+    runs = []
+    scheduler.schedule('job', lambda: runs.append(1) or 0.05, 0.01)
+    time.sleep(0.1)
+    assert scheduler.cancel('job')
+    seen = len(runs)
+    time.sleep(0.2)
+    assert len(runs) == seen and seen >= 1
+    print("✅ Cancelled jobs stop")
+
+def test_bounded_workers_report_due_and_late():
+    """With every worker busy, waiting checks show up as due and then late"""
+    scheduler = PeriodicScheduler(max_workers=2, late_threshold=0.1)
+    release = threading.Event()
+    for i in range(5):
+        scheduler.schedule(f'probe-{i}', lambda: release.wait(2) and None, 0)
+    time.sleep(0.3)
+
+    stats = scheduler.stats()
+    assert stats['running'] == 2
+    assert stats['due'] == 3 and stats['late'] == 3
+    release.set()
+    time.sleep(0.2)
+    assert scheduler.stats()['late_runs'] == 3
+    print("✅ Probe concurrency bounded; due and late checks reported")
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Keep-Alive Scheduler")
+    print("=" * 50)
+    test_jobs_run_in_due_order_and_reschedule()
+    test_cancel_stops_future_runs()
+    test_bounded_workers_report_due_and_late()
+    print("=" * 50)
+    print("🎉 All scheduler tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Test for the remote directory listing cache
+Checks TTL expiry, LRU eviction, hit ratio, invalidation by the app's own changes
+and background prefetch of likely next folders
+Listings come from an in-memory SFTP stand-in so no SSH server is required
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+sys.path.append('.')
+
+import app_enhanced
+from app_enhanced import app, scp_manager, ListingCache
+from test_remote_commands import InMemorySFTP
+
+class ListingSFTP(InMemorySFTP):
+    """In-memory SFTP that also answers listdir_attr and counts the calls"""
+    def __init__(self, paths):
+        super().__init__(paths)
+        self.listings = 0
+
+    def listdir_attr(self, path):
+        self.listings += 1
+        attrs = []
+        for child in self._children(path):
+            attr = self._attrs(child)
+            attr.filename = os.path.basename(child)
+            attr.st_size = 1
+            attr.st_mtime = 0
+            attrs.append(attr)
+        return attrs
+
+TREE = {
+    '/srv': 'dir', '/srv/a': 'dir', '/srv/a/one.txt': 'file', '/srv/a/b': 'dir',
+    '/srv/a/b/two.txt': 'file', '/srv/c': 'dir', '/srv/c/three.txt': 'file'
+}
+
+def add_session(session_id):
+    sftp = ListingSFTP(TREE)
+    scp_manager.connections[session_id] = {'sftp': sftp, 'remote_os': 'linux'}
+    return scp_manager.connections[session_id], sftp
+
+def test_ttl_and_lru_eviction():
+    """Entries expire after the TTL and the least recently used go first"""
+    cache = ListingCache(ttl=60, max_entries=2)
+    cache.put('/a', {'items': []})
+    cache.put('/b/', {'items': []})
+    assert cache.get('/a') is not None  # /a is now most recently used
+    cache.put('/c', {'items': []})
+    assert cache.get('/b') is None and cache.get('/a') is not None
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get('/a') is None
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['expired'] == 1
+    assert stats['hits'] == 2 and stats['misses'] == 2 and stats['hit_ratio'] == 0.5
+    print("✅ Listings expire after the TTL and LRU entries are evicted")
+
+def test_invalidation_is_scoped():
+    """A change drops its parent's listing and its own subtree, nothing else"""
+    cache = ListingCache()
+    for path in ('/', '/srv', '/srv/a', '/srv/a/b', '/srv/ab', '/srv/c'):
+        cache.put(path, {'items': []})
+    cache.invalidate('/srv/a')
+    assert list(cache.entries) == ['/', '/srv/ab', '/srv/c']
+
+    cache.put('/srv', {'items': []})
+    cache.invalidate('/srv/new/deeper', ancestors=True)
+    assert list(cache.entries) == ['/srv/ab', '/srv/c']
+    print("✅ Invalidation only drops affected listings")
+
+def test_repeat_listings_are_served_from_cache():
+    """The second listing of a folder skips the server unless refresh is asked for"""
+    conn, sftp = add_session('cache-hit')
+    try:
+        first = scp_manager.list_remote_directory('cache-hit', '/srv')
+        second = scp_manager.list_remote_directory('cache-hit', '/srv/')
+        assert first['cached'] is False and second['cached'] is True
+        assert second['items'] == first['items'] and sftp.listings == 1
+
+        assert scp_manager.list_remote_directory('cache-hit', '/srv', refresh=True)['cached'] is False
+        assert sftp.listings == 2
+        # Refreshes skip the lookup, so they don't count against the hit ratio
+        assert conn['listing_cache'].stats()['hit_ratio'] == 0.5
+        print("✅ Repeat listings served from cache, refresh bypasses it")
+    finally:
+        scp_manager.connections.pop('cache-hit', None)
+
+def test_delete_invalidates_affected_listings():
+    """Deleting through the app drops the parent listing but keeps unrelated ones"""
+    conn, sftp = add_session('cache-delete')
+    try:
+        for path in ('/srv', '/srv/a', '/srv/c'):
+            scp_manager.list_remote_directory('cache-delete', path)
+        assert scp_manager.delete_remote_paths(conn, ['/srv/a']) == {}
+        assert set(conn['listing_cache'].entries) == {'/srv/c'}
+
+        names = [item['name'] for item in scp_manager.list_remote_directory('cache-delete', '/srv')['items']]
+        assert names == ['c']
+        print("✅ Deletes invalidate the listings they change")
+    finally:
+        scp_manager.connections.pop('cache-delete', None)
+
+def test_list_remote_endpoint_refresh_flag():
+    """/api/list-remote passes refresh=1 through and reports cache use"""
+    conn, sftp = add_session('cache-endpoint')
+    try:
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['session_id'] = 'cache-endpoint'
+            assert client.get('/api/list-remote?path=/srv').get_json()['cached'] is False
+            assert client.get('/api/list-remote?path=/srv').get_json()['cached'] is True
+            assert client.get('/api/list-remote?path=/srv&refresh=1').get_json()['cached'] is False
+        assert sftp.listings == 2
+        print("✅ /api/list-remote honours refresh=1")
+    finally:
+        scp_manager.connections.pop('cache-endpoint', None)
+
+class InlineExecutor:
+    """Runs prefetch work straight away so tests need no waiting"""
+    def submit(self, function, *args):
+        function(*args)
+
+class QuietPool:
+    """Channel pool stand-in handing out one SFTP for background work"""
+    def __init__(self, sftp):
+        self.sftp = sftp
+        self.closed = False
+
+    @contextmanager
+    def interactive_channel(self):
+        yield self.sftp
+
+    def checkout_if_quiet(self):
+        return self.sftp
+
+    def checkin(self, sftp):
+        pass
+
+PREFETCH_TREE = {
+    '/p': 'dir', '/p/small': 'dir', '/p/smaller': 'dir', '/p/huge': 'dir', '/p/.git': 'dir',
+    '/p/visited': 'dir', '/p/file.txt': 'file', '/p/small/inner': 'dir'
+}
+DIR_SIZES = {'/p/small': 4096, '/p/smaller': 512, '/p/huge': 10 ** 7, '/p/.git': 64, '/p/visited': 10 ** 6}
+
+class SizedSFTP(ListingSFTP):
+    def _attrs(self, path):
+        attr = super()._attrs(path)
+        attr.st_size = DIR_SIZES.get(path, 1)
+        return attr
+
+def add_prefetch_session(session_id):
+    sftp = SizedSFTP(PREFETCH_TREE)
+    pool = QuietPool(sftp)
+    scp_manager.connections[session_id] = {'sftp': sftp, 'sftp_pool': pool, 'remote_os': 'linux'}
+    return scp_manager.connections[session_id], pool
+
+def with_inline_prefetch(test):
+    """Turn prefetching on, which is opt-in, and run its work inline"""
+    def run():
+        executor, enabled = scp_manager.prefetch_executor, app_enhanced.LISTING_PREFETCH_ENABLED
+        scp_manager.prefetch_executor = InlineExecutor()
+        app_enhanced.LISTING_PREFETCH_ENABLED = True
+        try:
+            test()
+        finally:
+            scp_manager.prefetch_executor = executor
+            app_enhanced.LISTING_PREFETCH_ENABLED = enabled
+    run.__name__ = test.__name__
+    run.__doc__ = test.__doc__
+    return run
+
+def test_prefetch_is_off_unless_enabled():
+    """Without SCP_LISTING_PREFETCH only the requested folder is listed"""
+    if os.environ.get('SCP_LISTING_PREFETCH'):
+        return
+    assert app_enhanced.LISTING_PREFETCH_ENABLED is False
+    conn, pool = add_prefetch_session('prefetch-off')
+    try:
+        scp_manager.list_remote_directory('prefetch-off', '/p')
+        assert list(conn['listing_cache'].entries) == ['/p'] and not conn.get('prefetch_stats')
+        print("✅ Prefetch stays off unless enabled")
+    finally:
+        scp_manager.connections.pop('prefetch-off', None)
+
+@with_inline_prefetch
+def test_prefetch_prefers_visited_then_small_folders():
+    """Recently visited folders go first, then the smallest visible ones"""
+    conn, pool = add_prefetch_session('prefetch')
+    try:
+        conn['listing_visits'] = OrderedDict([('/p/visited', time.time())])
+        scp_manager.list_remote_directory('prefetch', '/p')
+        cache = conn['listing_cache']
+        assert set(cache.entries) == {'/p', '/p/visited', '/p/smaller', '/p/small'}
+        assert conn['prefetch_stats']['fetched'] == 3
+
+        # Opening a prefetched folder is a hit, and prefetches its own children
+        assert scp_manager.list_remote_directory('prefetch', '/p/small')['cached'] is True
+        assert cache.stats()['prefetch_hits'] == 1 and cache.fresh('/p/small/inner')
+        print("✅ Prefetch picks visited, then small, folders")
+    finally:
+        scp_manager.connections.pop('prefetch', None)
+
+@with_inline_prefetch
+def test_prefetch_yields_to_transfers_and_budget():
+    """Nothing is prefetched while transfers run or once the budget is spent"""
+    conn, pool = add_prefetch_session('prefetch-busy')
+    try:
+        conn['transfer_active'] = True
+        scp_manager.list_remote_directory('prefetch-busy', '/p')
+        assert list(conn['listing_cache'].entries) == ['/p'] and conn['prefetch_stats']['skipped_busy'] == 3
+
+        conn['transfer_active'] = False
+        conn['prefetch_budget'] = {'window_start': time.time(), 'used': app_enhanced.LISTING_PREFETCH_BUDGET - 1}
+        scp_manager.list_remote_directory('prefetch-busy', '/p', refresh=True)
+        assert conn['prefetch_stats']['fetched'] == 1 and conn['prefetch_stats']['skipped_budget'] == 2
+        print("✅ Prefetch yields to transfers and respects its budget")
+    finally:
+        scp_manager.connections.pop('prefetch-busy', None)
+
+@with_inline_prefetch
+def test_concurrent_listings_share_visit_history():
+    """Listings served by several request threads at once keep consistent visit bookkeeping"""
+    conn, pool = add_prefetch_session('prefetch-threads')
+    conn['listing_cache'] = ListingCache()
+    paths = [f'/p/{i}' for i in range(app_enhanced.LISTING_CACHE_MAX_ENTRIES)]
+    for path in paths:
+        conn['listing_cache'].put(path, {'items': []})
+    conn['listing_visits'] = OrderedDict((path, time.time()) for path in paths)
+    errors = []
+
+    def browse(offset):
+        try:
+            for i in range(300):
+                scp_manager.prefetch_after_listing(conn, paths[(offset * 37 + i) % len(paths)])
+        except Exception as e:
+            errors.append(e)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=browse, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+        scp_manager.connections.pop('prefetch-threads', None)
+    assert errors == [] and len(conn['listing_visits']) == len(paths)
+    print("✅ Concurrent listings share the visit history safely")
+
+def test_stale_read_is_not_cached():
+    """A listing read before an invalidation is not stored after it"""
+    cache = ListingCache()
+    generation = cache.generation
+    cache.invalidate('/srv/a')
+    assert cache.put('/srv', {'items': []}, generation=generation) is False
+    assert not cache.fresh('/srv')
+    print("✅ Reads that raced a change are not cached")
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Remote Listing Cache")
+    print("=" * 50)
+    test_ttl_and_lru_eviction()
+    test_invalidation_is_scoped()
+    test_repeat_listings_are_served_from_cache()
+    test_delete_invalidates_affected_listings()
+    test_list_remote_endpoint_refresh_flag()
+    test_prefetch_is_off_unless_enabled()
+    test_prefetch_prefers_visited_then_small_folders()
+    test_prefetch_yields_to_transfers_and_budget()
+    test_concurrent_listings_share_visit_history()
+    test_stale_read_is_not_cached()
+    print("=" * 50)
+    print("🎉 All listing cache tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
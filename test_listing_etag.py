@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test for conditional GET on the listing endpoints
+Checks ETags and 304 responses for local folders, paged views and cached remote listings
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append('.')
+
+from app_enhanced import app, scp_manager
+from test_listing_cache import ListingSFTP, TREE
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={'If-None-Match': etag})
+
+def test_unchanged_local_folder_gets_304():
+    """A repeat request with the ETag gets an empty 304 until the folder changes"""
+    workdir = tempfile.mkdtemp()
+    try:
+        for name in ('a.txt', 'b.txt'):
+            with open(os.path.join(workdir, name), 'w') as handle:
+                handle.write(name)
+        url = f'/api/list-local?path={workdir}'
+        with app.test_client() as client:
+            first = client.get(url)
+            etag = first.headers['ETag']
+            assert first.status_code == 200 and etag.startswith('W/"')
+            assert first.headers['Cache-Control'] == 'no-cache' and first.get_json()['version']
+
+            # The 304 is answered from stat calls alone, without building the listing
+            listed = []
+            scp_manager.list_local_directory = lambda path=None: listed.append(path)
+            try:
+                unchanged = revalidate(client, url, etag)
+            finally:
+                del scp_manager.list_local_directory
+            assert unchanged.status_code == 304 and unchanged.data == b'' and unchanged.headers['ETag'] == etag
+            assert listed == []
+
+            # Rewriting a file in place changes its size, and so the ETag
+            with open(os.path.join(workdir, 'a.txt'), 'w') as handle:
+                handle.write('longer contents')
+            changed = revalidate(client, url, etag)
+            assert changed.status_code == 200 and changed.headers['ETag'] != etag
+
+            assert 'ETag' not in client.get('/api/list-local?cursor=unknown:0').headers
+        print("✅ Unchanged local folders get 304")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_pages_have_their_own_etags():
+    """Sort, filter and cursor arguments are part of the ETag"""
+    workdir = tempfile.mkdtemp()
+    try:
+        for i in range(5):
+            open(os.path.join(workdir, f'file{i}.log'), 'w').close()
+        with app.test_client() as client:
+            by_name = client.get(f'/api/list-local?path={workdir}&limit=2')
+            by_size = client.get(f'/api/list-local?path={workdir}&limit=2&sort=size')
+            assert by_name.headers['ETag'] != by_size.headers['ETag']
+
+            cursor_url = f"/api/list-local?cursor={by_name.get_json()['next_cursor']}&limit=2"
+            page = client.get(cursor_url)
+            assert revalidate(client, cursor_url, page.headers['ETag']).status_code == 304
+            assert revalidate(client, cursor_url + '&refresh=1', page.headers['ETag']).status_code == 304
+        print("✅ Paged views have their own ETags")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_paged_304_only_while_its_cursor_lives():
+    """A first page is revalidated only while the view its next_cursor names is still kept"""
+    workdir = tempfile.mkdtemp()
+    try:
+        for i in range(5):
+            open(os.path.join(workdir, f'file{i}.log'), 'w').close()
+        url = f'/api/list-local?path={workdir}&limit=2'
+        with app.test_client() as client:
+            first = client.get(url)
+            cursor = first.get_json()['next_cursor']
+            # The unchanged folder reuses its view, so the cached cursor stays valid
+            assert revalidate(client, url, first.headers['ETag']).status_code == 304
+
+            scp_manager.listing_pager.views.clear()
+            again = revalidate(client, url, first.headers['ETag'])
+            assert again.status_code == 200 and again.get_json()['next_cursor'] != cursor
+            rest = client.get(f"/api/list-local?cursor={again.get_json()['next_cursor']}&limit=2").get_json()
+            assert [item['name'] for item in rest['items']] == ['file2.log', 'file3.log']
+        print("✅ Paged 304s never leave an expired cursor behind")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_remote_listing_version_survives_refresh():
+    """Cached remote listings revalidate for free; an identical re-read still gets 304"""
+    sftp = ListingSFTP(TREE)
+    scp_manager.connections['etag'] = {'sftp': sftp, 'remote_os': 'linux'}
+    try:
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['session_id'] = 'etag'
+            url = '/api/list-remote?path=/srv&prefetch=0'
+            etag = client.get(url).headers['ETag']
+            assert revalidate(client, url, etag).status_code == 304 and sftp.listings == 1
+
+            assert revalidate(client, url + '&refresh=1', etag).status_code == 304 and sftp.listings == 2
+
+            sftp.paths['/srv/new.txt'] = 'file'
+            changed = revalidate(client, url + '&refresh=1', etag)
+            assert changed.status_code == 200 and 'new.txt' in [item['name'] for item in changed.get_json()['items']]
+        print("✅ Remote listings revalidate by content version")
+    finally:
+        scp_manager.connections.pop('etag', None)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Listing ETags")
+    print("=" * 50)
+    test_unchanged_local_folder_gets_304()
+    test_pages_have_their_own_etags()
+    test_paged_304_only_while_its_cursor_lives()
+    test_remote_listing_version_survives_refresh()
+    print("=" * 50)
+    print("🎉 All listing ETag tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
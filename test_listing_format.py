@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test for the columnar listing format
+Checks that format=columns carries exactly the entries of the row format,
+for local folders, paged views and cached remote listings
+"""
+
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from datetime import datetime
+sys.path.append('.')
+
+from app_enhanced import app, scp_manager
+from test_listing_cache import ListingSFTP, TREE
+from test_listing_stream import BatchedSFTP, TREE as STREAM_TREE
+
+def decode(result, separator='/'):
+    """Entries rebuilt from a columnar listing the way the browser does it"""
+    columns = result['columns']
+    prefix = result['current_path'].rstrip(separator) + separator
+    return [{
+        'name': name,
+        'path': prefix + name,
+        'is_directory': stat.S_ISDIR(mode),
+        'size': size,
+        'modified': datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S'),
+        'permissions': oct(mode & 0o777)[2:].zfill(3),
+        'owner': owner,
+        'group': group
+    } for name, size, mtime, mode, owner, group in zip(
+        columns['name'], columns['size'], columns['mtime'], columns['mode'], columns['owner'], columns['group'])]
+
+def make_folder(root):
+    os.makedirs(os.path.join(root, 'Zeta'))
+    os.makedirs(os.path.join(root, 'alpha'))
+    for i, size in enumerate((300, 10, 2000, 0)):
+        with open(os.path.join(root, f'file{i}.log' if i % 2 else f'File{i}.txt'), 'wb') as handle:
+            handle.write(b'x' * size)
+    os.chmod(os.path.join(root, 'file1.log'), 0o600)
+
+def session_client(session_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['session_id'] = session_id
+    return client
+
+def test_local_columns_match_rows():
+    """Whole folders and pages decode to the same entries as the row format"""
+    root = tempfile.mkdtemp()
+    try:
+        make_folder(root)
+        with app.test_client() as client:
+            rows = client.get(f'/api/list-local?path={root}').get_json()
+            columns = client.get(f'/api/list-local?path={root}&format=columns').get_json()
+            assert columns['format'] == 'columns' and columns['count'] == 6 and 'items' not in columns
+            assert decode(columns, os.sep) == rows['items'] and columns['version'] == rows['version']
+            assert '_mtimes' not in rows and '_modes' not in rows
+
+            for query in ('limit=2', 'limit=3&sort=size&order=desc', 'filter=*.log'):
+                page = client.get(f'/api/list-local?path={root}&{query}').get_json()
+                paged = client.get(f'/api/list-local?path={root}&{query}&format=columns').get_json()
+                assert decode(paged, os.sep) == page['items'], query
+                assert paged['total'] == page['total'] and paged['count'] == len(page['items'])
+
+            first = client.get(f'/api/list-local?path={root}&limit=4&format=columns').get_json()
+            rest = client.get(f"/api/list-local?cursor={first['next_cursor']}&limit=4&format=columns").get_json()
+            assert decode(first, os.sep) + decode(rest, os.sep) == rows['items'] and rest['next_cursor'] is None
+
+            assert 'error' in client.get(f'/api/list-local?path={root}&format=xml').get_json()
+        print("✅ Local columnar listings match the row format")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def test_columns_have_their_own_etag():
+    """Each format revalidates separately, and an unchanged columnar listing gets 304"""
+    root = tempfile.mkdtemp()
+    try:
+        make_folder(root)
+        url = f'/api/list-local?path={root}&format=columns'
+        with app.test_client() as client:
+            etag = client.get(url).headers['ETag']
+            assert etag != client.get(f'/api/list-local?path={root}').headers['ETag']
+            assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+        print("✅ Columnar listings have their own ETags")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def test_remote_columns_from_cache():
+    """Cached remote listings, read or streamed, are served as columns without another read"""
+    scp_manager.connections['columns'] = {'sftp': ListingSFTP(TREE), 'remote_os': 'linux'}
+    scp_manager.connections['columns-stream'] = {'sftp': BatchedSFTP(STREAM_TREE)}
+    try:
+        with session_client('columns') as client:
+            rows = client.get('/api/list-remote?path=/srv&prefetch=0').get_json()
+            columns = client.get('/api/list-remote?path=/srv&prefetch=0&format=columns').get_json()
+            assert columns['cached'] is True and scp_manager.connections['columns']['sftp'].listings == 1
+            assert decode(columns) == rows['items'] and columns['columns']['name'] == ['a', 'c']
+            assert columns['columns']['mode'][0] & stat.S_IFDIR
+
+            paged = client.get('/api/list-remote?path=/srv&prefetch=0&limit=1&format=columns').get_json()
+            assert decode(paged) == rows['items'][:1] and paged['next_cursor']
+
+        with session_client('columns-stream') as client:
+            client.get('/api/list-remote-stream?path=/big').get_data()
+            rows = client.get('/api/list-remote?path=/big').get_json()
+            columns = client.get('/api/list-remote?path=/big&format=columns').get_json()
+            assert columns['cached'] is True and columns['count'] == 11
+            assert decode(columns) == rows['items']
+        print("✅ Remote listings are served as columns from the cache")
+    finally:
+        scp_manager.connections.pop('columns', None)
+        scp_manager.connections.pop('columns-stream', None)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Listing Formats")
+    print("=" * 50)
+    test_local_columns_match_rows()
+    test_columns_have_their_own_etag()
+    test_remote_columns_from_cache()
+    print("=" * 50)
+    print("🎉 All listing format tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
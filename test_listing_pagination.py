@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test for cursor-paginated, sorted and filtered directory listings
+Pages through a local folder via /api/list-local and checks the sorted views directly
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append('.')
+
+from app_enhanced import app, ListingPager
+
+def item(name, size=0, modified='2025-01-01 00:00:00', is_directory=False):
+    return {'name': name, 'size': size, 'modified': modified, 'is_directory': is_directory}
+
+ITEMS = [
+    item('zeta.log', 5 * 1024 * 1024, '2025-03-01 10:00:00'),
+    item('alpha.txt', 10, '2024-12-31 23:59:59'),
+    item('Logs', is_directory=True),
+    item('beta.log', 2048, '2025-02-01 08:00:00'),
+    item('archive', is_directory=True)
+]
+
+def names(page):
+    return [entry['name'] for entry in page['items']]
+
+def test_filter_expressions():
+    """Name globs, substrings, type, size and date terms all have to match"""
+    def matching(expression):
+        matches = ListingPager.compile_filter(expression)
+        return sorted(entry['name'] for entry in ITEMS if matches(entry))
+
+    assert matching('*.LOG') == ['beta.log', 'zeta.log']
+    assert matching('log') == ['Logs', 'beta.log', 'zeta.log']
+    assert matching('type:dir') == ['Logs', 'archive']
+    assert matching('size>1k *.log') == ['beta.log', 'zeta.log']
+    assert matching('size>=5M') == ['zeta.log']
+    assert matching('modified>=2025-02') == ['beta.log', 'zeta.log']
+    assert matching('modified<2025') == ['alpha.txt']
+    for bad in ('size>lots', 'modified>yesterday'):
+        try:
+            ListingPager.compile_filter(bad)
+            assert False, f"{bad} should be rejected"
+        except ValueError:
+            pass
+    print("✅ Filter expressions")
+
+def test_sorting_keeps_folders_first():
+    """Every sort keeps folders ahead of files"""
+    pager = ListingPager()
+    view = pager.create('owner', '/logs', ITEMS, sort='size', order='desc')
+    assert names(pager.page('owner', f"{view}:0", 10)) == ['archive', 'Logs', 'zeta.log', 'beta.log', 'alpha.txt']
+    view = pager.create('owner', '/logs', ITEMS, sort='modified')
+    assert names(pager.page('owner', f"{view}:0", 10))[2:] == ['alpha.txt', 'beta.log', 'zeta.log']
+    print("✅ Sorting keeps folders first")
+
+def test_views_are_reused_and_scoped():
+    """The same items list reuses its view; other owners and stale cursors are refused"""
+    pager = ListingPager(ttl=60)
+    view = pager.create('owner', '/logs', ITEMS, expression='*.log')
+    assert pager.create('owner', '/logs', ITEMS, expression=' *.log ') == view
+    assert pager.page('someone-else', f"{view}:0", 10) is None
+
+    # A fresh listing of the folder replaces the old view
+    newer = pager.create('owner', '/logs', list(ITEMS), expression='*.log')
+    assert newer != view and pager.page('owner', f"{view}:0", 10) is None
+
+    pager.ttl = -1
+    assert pager.page('owner', f"{newer}:0", 10) is None
+    print("✅ Views reused, scoped to their owner and expired")
+
+def test_cursor_pages_through_local_folder():
+    """/api/list-local hands out pages until the cursor runs out"""
+    workdir = tempfile.mkdtemp()
+    try:
+        for i in range(25):
+            with open(os.path.join(workdir, f'file{i:02d}.log'), 'w') as handle:
+                handle.write('x' * i)
+        os.makedirs(os.path.join(workdir, 'sub'))
+        with app.test_client() as client:
+            query = f'/api/list-local?path={workdir}&limit=10&sort=size&order=desc&filter=*.log'
+            page = client.get(query).get_json()
+            seen = names(page)
+            assert page['total'] == 25 and page['current_path'] == workdir
+            while page['next_cursor']:
+                page = client.get(f"/api/list-local?cursor={page['next_cursor']}&limit=10").get_json()
+                seen += names(page)
+            assert seen == [f'file{i:02d}.log' for i in reversed(range(25))]
+
+            assert 'error' in client.get(f'/api/list-local?path={workdir}&sort=colour').get_json()
+            assert client.get('/api/list-local?cursor=unknown:0').get_json()['cursor_expired'] is True
+            # Without paging arguments the whole listing comes back as before
+            assert len(client.get(f'/api/list-local?path={workdir}').get_json()['items']) == 26
+        print("✅ Cursor pages through a local folder")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Listing Pagination")
+    print("=" * 50)
+    test_filter_expressions()
+    test_sorting_keeps_folders_first()
+    test_views_are_reused_and_scoped()
+    test_cursor_pages_through_local_folder()
+    print("=" * 50)
+    print("🎉 All listing pagination tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
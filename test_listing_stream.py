@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test for streaming NDJSON remote directory listings
+Reads directories from an in-memory SFTP server that answers READDIR in small batches,
+so no SSH server is required
+"""
+
+import json
+import sys
+sys.path.append('.')
+
+import paramiko
+from paramiko.message import Message
+from app_enhanced import app, scp_manager, SFTPPipeline, SFTPChannelPool
+from test_remote_commands import InMemorySFTP
+
+class BatchedSFTP(InMemorySFTP):
+    """In-memory SFTP whose READDIR replies carry at most ``batch`` entries"""
+    def __init__(self, paths, batch=3):
+        super().__init__(paths)
+        self.batch = batch
+        self.readdirs = 0
+
+    def _attrs(self, path):
+        attr = super()._attrs(path)
+        attr.st_size = 1
+        attr.st_atime = attr.st_mtime = 0
+        return attr
+
+    def _reply(self, t, arg):
+        path = arg.decode() if isinstance(arg, bytes) else arg
+        if t == paramiko.sftp.CMD_OPENDIR and self.paths.get(path) != 'dir':
+            return self._status(paramiko.sftp.SFTP_NO_SUCH_FILE, 'No such file')
+        if t != paramiko.sftp.CMD_READDIR:
+            return super()._reply(t, arg)
+        self.readdirs += 1
+        state = self.handles[path]
+        children = self._children(state[0])
+        offset = state[1] or 0
+        if offset >= len(children):
+            return self._status(paramiko.sftp.SFTP_EOF, 'EOF')
+        state[1] = offset + self.batch
+        msg = Message()
+        chunk = children[offset:offset + self.batch]
+        msg.add_int(len(chunk))
+        for child in chunk:
+            name = child.rsplit('/', 1)[1]
+            msg.add_string(name)
+            msg.add_string(name)
+            self._attrs(child)._pack(msg)
+        return paramiko.sftp.CMD_NAME, msg
+
+TREE = dict({'/big': 'dir', '/big/sub': 'dir'}, **{f'/big/f{i:02d}': 'file' for i in range(10)})
+
+def test_iter_dir_yields_each_readdir_batch():
+    """Entries arrive one READDIR reply at a time with a bounded read-ahead"""
+    sftp = BatchedSFTP(TREE)
+    batches = list(SFTPPipeline(sftp).iter_dir('/big', read_ahead=2))
+    assert [len(batch) for batch in batches] == [3, 3, 3, 2]
+    assert sorted(attr.filename for batch in batches for attr in batch) == sorted(p[5:] for p in TREE if p != '/big')
+    assert sftp.max_in_flight <= 2 and not sftp.handles and not sftp.pending
+    print("✅ iter_dir yields one batch per READDIR reply")
+
+def test_stopping_early_closes_the_handle():
+    """Abandoning the stream reads the outstanding replies and closes the handle"""
+    sftp = BatchedSFTP(TREE)
+    batches = SFTPPipeline(sftp).iter_dir('/big', read_ahead=3)
+    assert len(next(batches)) == 3
+    batches.close()
+    assert not sftp.handles and not sftp.pending and sftp.readdirs == 3
+    print("✅ Stopping early closes the directory handle")
+
+def read_stream(client, path):
+    response = client.get(f'/api/list-remote-stream?path={path}')
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_stream_endpoint_emits_ndjson_and_fills_cache():
+    """The endpoint streams start, entry and end lines and leaves the listing cached"""
+    sftp = BatchedSFTP(TREE)
+    scp_manager.connections['stream'] = {'sftp': sftp}
+    try:
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['session_id'] = 'stream'
+            lines = read_stream(client, '/big')
+            assert lines[0] == {'event': 'start', 'current_path': '/big', 'cached': False}
+            assert lines[-1] == {'event': 'end', 'total': 11}
+            assert {entry['name'] for entry in lines[1:-1]} == {'sub'} | {f'f{i:02d}' for i in range(10)}
+
+            # The completed stream filled the cache, sorted, for the listing endpoints
+            listing = client.get('/api/list-remote?path=/big').get_json()
+            assert listing['cached'] is True and listing['items'][0]['name'] == 'sub'
+            assert read_stream(client, '/big')[0]['cached'] is True
+
+            lines = read_stream(client, '/missing')
+            assert lines[-1]['event'] == 'error' and 'No such file' in lines[-1]['error']
+        print("✅ NDJSON stream endpoint")
+    finally:
+        scp_manager.connections.pop('stream', None)
+
+class LaneSFTP(BatchedSFTP):
+    """Batched SFTP that can serve as a channel pool's interactive lane"""
+    class Channel:
+        closed = False
+
+    def get_channel(self):
+        return self.Channel()
+
+def test_stream_releases_the_interactive_lane_between_batches():
+    """A client that stops reading does not keep other listings off the interactive lane"""
+    sftp = LaneSFTP(TREE)
+    pool = SFTPChannelPool(None, interactive=sftp)
+    conn = {'sftp': sftp, 'sftp_pool': pool}
+    lines = scp_manager.stream_remote_directory(conn, '/big')
+    assert json.loads(next(lines))['event'] == 'start'
+    first = next(lines).splitlines()
+    assert len(first) == 3 and sftp.handles
+
+    # While the stream waits on its reader, the lane is free and its other requests still work
+    assert pool.interactive_lock.acquire(blocking=False)
+    try:
+        assert [attr.st_mode for attr in SFTPPipeline(sftp).lstat_many(['/big/sub'])] == [0o40755]
+    finally:
+        pool.interactive_lock.release()
+
+    rest = [line for chunk in lines for line in chunk.splitlines()]
+    assert len(first) + len(rest) - 1 == 11 and json.loads(rest[-1]) == {'event': 'end', 'total': 11}
+    assert not sftp.handles and not sftp.pending
+
+    # Abandoning a stream still closes its handle, on the lane
+    lines = scp_manager.stream_remote_directory(conn, '/big', refresh=True)
+    next(lines)
+    next(lines)
+    lines.close()
+    assert not sftp.handles and not sftp.pending and not pool.interactive_lock.locked()
+    print("✅ Streaming releases the interactive lane between batches")
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Listing Stream")
+    print("=" * 50)
+    test_iter_dir_yields_each_readdir_batch()
+    test_stopping_early_closes_the_handle()
+    test_stream_endpoint_emits_ndjson_and_fills_cache()
+    test_stream_releases_the_interactive_lane_between_batches()
+    print("=" * 50)
+    print("🎉 All listing stream tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
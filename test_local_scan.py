@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test for the os.scandir-based local filesystem layer
+Checks listing entries, folder totals and item counts, including symlinks
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append('.')
+
+from app_enhanced import app, scp_manager
+
+def make_tree(root):
+    os.makedirs(os.path.join(root, 'a', 'b'))
+    os.makedirs(os.path.join(root, 'outside'))
+    for path, size in (('top.txt', 5), ('a/one.txt', 10), ('a/b/two.txt', 20), ('outside/big.bin', 1000)):
+        with open(os.path.join(root, path), 'wb') as handle:
+            handle.write(b'x' * size)
+    os.symlink(os.path.join(root, 'outside'), os.path.join(root, 'a', 'linked-dir'))
+    os.symlink(os.path.join(root, 'top.txt'), os.path.join(root, 'a', 'linked-file'))
+    os.symlink(os.path.join(root, 'gone'), os.path.join(root, 'a', 'broken'))
+
+def test_listing_entries():
+    """Entries carry the same fields as before; symlinks show as their targets"""
+    root = tempfile.mkdtemp()
+    try:
+        make_tree(root)
+        listing = scp_manager.list_local_directory(os.path.join(root, 'a'))
+        entries = {item['name']: item for item in listing['items']}
+        # The broken link cannot be stat'ed and is skipped, as it was before
+        assert list(entries) == ['b', 'linked-dir', 'linked-file', 'one.txt']
+        assert entries['linked-dir']['is_directory'] and entries['linked-dir']['size'] == 0
+        assert entries['linked-file']['size'] == 5 and entries['one.txt']['size'] == 10
+        assert entries['one.txt']['path'] == os.path.join(root, 'a', 'one.txt')
+        print("✅ scandir listing entries")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def test_folder_totals_do_not_follow_linked_folders():
+    """Folder totals count linked folders without walking into them, like os.walk"""
+    root = tempfile.mkdtemp()
+    try:
+        make_tree(root)
+        size, files, dirs = scp_manager._get_local_folder_details(os.path.join(root, 'a'))
+        assert (size, files, dirs) == (10 + 20 + 5, 3, 2)
+        assert scp_manager._scan_local_tree(os.path.join(root, 'a'), sizes=False) == (0, 4, 2)
+
+        with app.test_client() as client:
+            counts = client.get(f"/api/count-local-items?path={os.path.join(root, 'a')}&refresh=1").get_json()
+        # Counts come from the size index, which skips the broken link like the transfer pre-scan does
+        assert (counts['files'], counts['directories'], counts['total_size']) == (3, 2, 35)
+        print("✅ Folder totals and counts")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Local scandir Layer")
+    print("=" * 50)
+    test_listing_entries()
+    test_folder_totals_do_not_follow_linked_folders()
+    print("=" * 50)
+    print("🎉 All local scan tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
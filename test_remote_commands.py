@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Test for remote file commands: the persistent framed shell channel and pipelined SFTP mutations
+Runs the framing against a local ``sh`` and the SFTP requests against an in-memory server,
+so no SSH server is required
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+sys.path.append('.')
+
+import paramiko
+from paramiko.message import Message
+from app_enhanced import scp_manager, RemoteCommandRunner, SFTPPipeline, DeletionJob, TransferFileTable
+
+class LocalShellChannel:
+    """Channel stand-in that pipes to a local shell process"""
+    def __init__(self):
+        self.closed = False
+        self.process = None
+        self.buffers = {'out': bytearray(), 'err': bytearray()}
+        self.lock = threading.Lock()
+        self.signal_r, self.signal_w = os.pipe()
+        os.set_blocking(self.signal_r, False)
+
+    def settimeout(self, timeout):
+        pass
+
+    def exec_command(self, command):
+        self.process = subprocess.Popen(['/bin/sh', '-c', command], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        for name, stream in (('out', self.process.stdout), ('err', self.process.stderr)):
+            threading.Thread(target=self._pump, args=(name, stream), daemon=True).start()
+
+    def _pump(self, name, stream):
+        for chunk in iter(lambda: os.read(stream.fileno(), 4096), b''):
+            with self.lock:
+                self.buffers[name] += chunk
+            os.write(self.signal_w, b'.')
+
+    def fileno(self):
+        return self.signal_r
+
+    def _take(self, name):
+        try:
+            os.read(self.signal_r, 4096)
+        except BlockingIOError:
+            pass
+        with self.lock:
+            data = bytes(self.buffers[name])
+            self.buffers[name].clear()
+        return data
+
+    def recv_ready(self):
+        return bool(self.buffers['out'])
+
+    def recv(self, size):
+        return self._take('out')
+
+    def recv_stderr_ready(self):
+        return bool(self.buffers['err'])
+
+    def recv_stderr(self, size):
+        return self._take('err')
+
+    def sendall(self, data):
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def exit_status_ready(self):
+        return self.process.poll() is not None
+
+    def close(self):
+        self.closed = True
+        if self.process.poll() is None:
+            self.process.kill()
+
+class FakeTransport:
+    def __init__(self):
+        self.sessions = []
+
+    def open_session(self):
+        self.sessions.append(LocalShellChannel())
+        return self.sessions[-1]
+
+class FakeSSH:
+    def __init__(self):
+        self.transport = FakeTransport()
+
+    def get_transport(self):
+        return self.transport
+
+def test_exit_codes_and_streams_are_framed():
+    """Each command gets its own exit code, stdout and stderr"""
+    runner = RemoteCommandRunner(FakeSSH(), timeout=10)
+    try:
+        result = runner.run('echo hi; echo oops >&2; exit 3')
+        assert result == {'exit_code': 3, 'stdout': 'hi\n', 'stderr': 'oops\n'}
+
+        # Output without a trailing newline and a trailing comment stay inside the frame
+        assert runner.run('printf partial # comment')['stdout'] == 'partial'
+        # Commands cannot read the framing off stdin
+        assert runner.run('cat')['exit_code'] == 0
+        print("✅ Exit codes and output are framed per command")
+    finally:
+        runner.close()
+
+def test_batch_shares_one_channel():
+    """A batch of commands runs in order over a single shell channel"""
+    ssh = FakeSSH()
+    runner = RemoteCommandRunner(ssh, timeout=10)
+    try:
+        results = runner.run_many([f'echo {i}; test {i} -lt 5' for i in range(10)])
+        assert [r['stdout'] for r in results] == [f'{i}\n' for i in range(10)]
+        assert [r['exit_code'] for r in results] == [0] * 5 + [1] * 5
+
+        runner.run('true')
+        assert len(ssh.transport.sessions) == 1
+        assert runner.stats()['commands'] == 11
+        print("✅ Batched commands share one channel")
+    finally:
+        runner.close()
+
+def test_exited_shell_is_replaced():
+    """A shell that died is replaced with a fresh channel on the next command"""
+    ssh = FakeSSH()
+    runner = RemoteCommandRunner(ssh, timeout=10)
+    try:
+        try:
+            # $$ is the long-lived shell itself, not the command's subshell
+            runner.run('kill -9 $$')
+        except Exception:
+            pass
+        assert runner.run('echo back')['stdout'] == 'back\n'
+        assert len(ssh.transport.sessions) == 2
+        print("✅ Exited shell replaced")
+    finally:
+        runner.close()
+
+class InMemorySFTP:
+    """SFTP client stand-in that answers pipelined requests from a dict of paths.
+
+    Replies are delivered newest first to check that they are matched by number.
+    """
+    _convert_status = paramiko.SFTPClient._convert_status
+
+    def __init__(self, paths):
+        self.paths = dict(paths)
+        self.pending = []
+        self.max_in_flight = 0
+        self.handles = {}
+        self.number = 0
+
+    def _status(self, code, text=''):
+        msg = Message()
+        msg.add_int(code)
+        msg.add_string(text)
+        msg.add_string('')
+        return paramiko.sftp.CMD_STATUS, msg
+
+    def _attrs(self, path):
+        attr = paramiko.SFTPAttributes()
+        attr.st_mode = (0o40755 if self.paths[path] == 'dir' else 0o100644)
+        return attr
+
+    def _children(self, path):
+        return [p for p in self.paths if os.path.dirname(p) == path and p != path]
+
+    def _reply(self, t, arg):
+        path = arg.decode() if isinstance(arg, bytes) else arg
+        if t == paramiko.sftp.CMD_LSTAT:
+            if path not in self.paths:
+                return self._status(paramiko.sftp.SFTP_NO_SUCH_FILE, 'No such file')
+            msg = Message()
+            self._attrs(path)._pack(msg)
+            return paramiko.sftp.CMD_ATTRS, msg
+        if t == paramiko.sftp.CMD_OPENDIR:
+            handle = f'h{len(self.handles)}'
+            self.handles[handle] = [path, False]
+            msg = Message()
+            msg.add_string(handle)
+            return paramiko.sftp.CMD_HANDLE, msg
+        if t == paramiko.sftp.CMD_READDIR:
+            state = self.handles[path]
+            if state[1]:
+                return self._status(paramiko.sftp.SFTP_EOF, 'EOF')
+            state[1] = True
+            children = self._children(state[0])
+            msg = Message()
+            msg.add_int(len(children))
+            for child in children:
+                msg.add_string(os.path.basename(child))
+                msg.add_string(os.path.basename(child))
+                self._attrs(child)._pack(msg)
+            return paramiko.sftp.CMD_NAME, msg
+        if t == paramiko.sftp.CMD_CLOSE:
+            del self.handles[path]
+            return self._status(paramiko.sftp.SFTP_OK)
+        if t == paramiko.sftp.CMD_REMOVE and self.paths.get(path) == 'file':
+            del self.paths[path]
+            return self._status(paramiko.sftp.SFTP_OK)
+        if t == paramiko.sftp.CMD_RMDIR and self.paths.get(path) == 'dir' and not self._children(path):
+            del self.paths[path]
+            return self._status(paramiko.sftp.SFTP_OK)
+        return self._status(paramiko.sftp.SFTP_FAILURE, 'Failure')
+
+    def _async_request(self, fileobj, t, *args):
+        self.number += 1
+        t, msg = self._reply(t, args[0])
+        self.pending.append((fileobj, self.number, t, Message(msg.asbytes())))
+        self.max_in_flight = max(self.max_in_flight, len(self.pending))
+        return self.number
+
+    def _read_response(self, waitfor=None):
+        fileobj, number, t, msg = self.pending.pop()
+        fileobj._async_response(t, msg, number)
+        return None, None
+
+TREE = {
+    '/data': 'dir', '/data/a': 'dir', '/data/a/b': 'dir', '/data/a/b/deep.txt': 'file',
+    '/data/a/one.txt': 'file', '/data/a/c': 'dir', '/data/two.txt': 'file',
+    '/keep': 'dir', '/keep/file.txt': 'file', '/loose.txt': 'file'
+}
+
+def test_pipeline_window_bounds_requests_in_flight():
+    """No more than the window's worth of requests are outstanding at once"""
+    sftp = InMemorySFTP({f'/f{i}': 'file' for i in range(10)})
+    pipeline = SFTPPipeline(sftp, window=4)
+    replies = pipeline.run([(paramiko.sftp.CMD_REMOVE, f'/f{i}') for i in range(10)] + [(paramiko.sftp.CMD_REMOVE, '/nope')])
+    assert [pipeline.error(reply) is None for reply in replies] == [True] * 10 + [False]
+    assert sftp.max_in_flight == 4 and not sftp.paths
+    print("✅ Pipelined requests bounded by the window and matched by number")
+
+def test_sftp_delete_walks_trees_and_removes_deepest_first():
+    """Files go in one batch and folders are removed deepest level first"""
+    sftp = InMemorySFTP(TREE)
+    failures = scp_manager._sftp_delete_paths(sftp, ['/data', '/loose.txt', '/missing'])
+    assert set(sftp.paths) == {'/keep', '/keep/file.txt'}
+    assert list(failures) == ['/missing'] and 'No such file' in failures['/missing']
+    assert not sftp.handles
+    print("✅ SFTP delete walks trees and removes deepest folders first")
+
+def test_deletion_job_progress_and_cancel():
+    """A deletion job counts removed entries and stops walking once cancelled"""
+    sftp = InMemorySFTP(TREE)
+    job = DeletionJob('job-session', 'remote', ['/data'], TransferFileTable('job-session'))
+    job.begin(0)
+    scp_manager._sftp_delete_paths(sftp, ['/data'], job=job)
+    assert job.progress['files_completed'] == 3 and job.progress['dirs_completed'] == 4
+    assert job.progress['entries_removed'] == 7
+
+    sftp = InMemorySFTP(TREE)
+    job = DeletionJob('job-session', 'remote', ['/data'], TransferFileTable('job-session'))
+    job.begin(0)
+    job.cancel()
+    scp_manager._sftp_delete_paths(sftp, ['/data'], job=job)
+    assert '/data/a/b/deep.txt' in sftp.paths and '/data' in sftp.paths
+    print("✅ Deletion jobs report progress and honour cancellation")
+
+class NoSFTP:
+    """SFTP stand-in for a server without the SFTP subsystem"""
+    def _async_request(self, *args):
+        raise paramiko.SSHException("subsystem request failed")
+
+def test_delete_falls_back_to_shell_without_sftp():
+    """When SFTP is unavailable deletes run on the shell channel instead"""
+    workdir = tempfile.mkdtemp()
+    conn = {'ssh': FakeSSH(), 'sftp': NoSFTP(), 'remote_os': 'linux'}
+    try:
+        os.makedirs(os.path.join(workdir, 'tree', 'sub'))
+        open(os.path.join(workdir, 'tree', 'sub', 'file.txt'), 'w').close()
+        failed = scp_manager.delete_remote_paths(conn, [os.path.join(workdir, 'tree')])
+        assert failed == {} and os.listdir(workdir) == []
+        assert conn['command_runner'].stats()['commands'] == 1
+        print("✅ Shell fallback used when SFTP is unavailable")
+    finally:
+        if conn.get('command_runner'):
+            conn['command_runner'].close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_shell_commands_never_expand_file_names():
+    """Names with $(...), backticks, quotes or $ reach the shell as literal text"""
+    workdir = tempfile.mkdtemp()
+    conn = {'ssh': FakeSSH(), 'sftp': NoSFTP(), 'remote_os': 'linux'}
+    try:
+        source = os.path.join(workdir, 'x$(echo pwned)`id`"$HOME')
+        copy = os.path.join(workdir, 'copy $(touch marker)')
+        with open(source, 'w') as handle:
+            handle.write('data')
+        assert scp_manager.copy_remote_many(conn, [(source, copy)]) == [None]
+        assert scp_manager.chmod_remote_many(conn, [(copy, 0o600)]) == [None]
+        assert os.stat(copy).st_mode & 0o777 == 0o600
+        assert scp_manager.delete_remote_paths(conn, [source]) == {}
+        assert os.listdir(workdir) == ['copy $(touch marker)']
+        assert not os.path.exists('marker')
+        print("✅ Shell commands quote file names")
+    finally:
+        if conn.get('command_runner'):
+            conn['command_runner'].close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Remote Command Channel")
+    print("=" * 50)
+    test_exit_codes_and_streams_are_framed()
+    test_batch_shares_one_channel()
+    test_exited_shell_is_replaced()
+    test_pipeline_window_bounds_requests_in_flight()
+    test_sftp_delete_walks_trees_and_removes_deepest_first()
+    test_deletion_job_progress_and_cancel()
+    test_delete_falls_back_to_shell_without_sftp()
+    test_shell_commands_never_expand_file_names()
+    print("=" * 50)
+    print("🎉 All remote command tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test for single-exec remote OS detection and the capability cache
+Uses a fake SSH client that answers the probe script with canned output
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append('.')
+
+from app_enhanced import scp_manager, RemoteCapabilityCache
+
+PROBE_OUTPUT = """@@linux_pretty
+Ubuntu 22.04.4 LTS
+@@linux_name
+Ubuntu
+@@linux_lsb
+@@redhat
+@@debian
+bookworm/sid
+@@uname
+Linux
+@@kernel
+5.15.0-105-generic
+@@hostname
+build-01
+@@macos
+@@cap_tar
+/usr/bin/tar
+@@cap_sha256sum
+/usr/bin/sha256sum
+@@cap_rsync
+@@cap_zstd
+/usr/bin/zstd
+@@cap_inotifywait
+@@cap_find_printf
+yes
+@@end
+"""
+
+class FakeStream:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data.encode()
+
+class FakeProbeSSH:
+    def __init__(self, output):
+        self.output = output
+        self.commands = []
+
+    def exec_command(self, command, timeout=None):
+        self.commands.append(command)
+        return None, FakeStream(self.output), FakeStream('')
+
+def test_probe_is_a_single_exec():
+    """OS and capabilities come back from one exec_command call"""
+    ssh = FakeProbeSSH(PROBE_OUTPUT)
+    remote_os, capabilities = scp_manager._probe_remote(ssh)
+
+    assert len(ssh.commands) == 1
+    assert remote_os == 'ubuntu'
+    assert capabilities == {
+        'tar': True, 'sha256sum': True, 'rsync': False,
+        'zstd': True, 'inotifywait': False, 'find_printf': True
+    }
+    print("✅ Single-exec probe parsed")
+
+def test_probe_windows_fallback():
+    """A shell that ignores the probe script falls back to 'ver'"""
+    ssh = FakeProbeSSH('Microsoft Windows [Version 10.0.20348]\r\n')
+    remote_os, capabilities = scp_manager._probe_remote(ssh)
+
+    assert ssh.commands[-1] == 'ver'
+    assert remote_os == 'windows'
+    assert not any(capabilities.values())
+    print("✅ Windows fallback detection")
+
+def test_capability_cache_round_trip():
+    """Profiles persist to disk and expire after the TTL"""
+    handle, path = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    os.unlink(path)
+    try:
+        cache = RemoteCapabilityCache(path=path)
+        cache.put('ssh-ed25519 SHA256:abc', {'remote_os': 'debian', 'capabilities': {'tar': True}})
+
+        reloaded = RemoteCapabilityCache(path=path)
+        assert reloaded.get('ssh-ed25519 SHA256:abc')['remote_os'] == 'debian'
+        assert reloaded.get('ssh-ed25519 SHA256:other') is None
+
+        expired = RemoteCapabilityCache(path=path, ttl=-1)
+        assert expired.get('ssh-ed25519 SHA256:abc') is None
+        print("✅ Capability cache persists and expires")
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Remote Profile Detection")
+    print("=" * 50)
+    test_probe_is_a_single_exec()
+    test_probe_windows_fallback()
+    test_capability_cache_round_trip()
+    print("=" * 50)
+    print("🎉 All remote profile tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
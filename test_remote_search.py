@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test for the remote search endpoint
+Runs the generated find command through a local shell standing in for the
+exec channel, and the SFTP fallback against an in-memory SFTP server, so no
+SSH server is required
+"""
+
+import json
+import os
+import shutil
+import sys
+import subprocess
+import tempfile
+import threading
+import time
+sys.path.append('.')
+
+from app_enhanced import app, scp_manager, ListingPager, RemoteSearch
+from test_remote_commands import InMemorySFTP, LocalShellChannel, FakeTransport, FakeSSH
+
+class FindChannel(LocalShellChannel):
+    """Local shell channel that only reports an exit once all output has been read in"""
+    def exec_command(self, command):
+        self.process = subprocess.Popen(['/bin/sh', '-c', command], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.pumps = [threading.Thread(target=self._pump, args=(name, stream), daemon=True)
+                      for name, stream in (('out', self.process.stdout), ('err', self.process.stderr))]
+        for thread in self.pumps:
+            thread.start()
+
+    def exit_status_ready(self):
+        return super().exit_status_ready() and not any(thread.is_alive() for thread in self.pumps) and not self.buffers['out']
+
+    def recv_exit_status(self):
+        return self.process.wait()
+
+class FindTransport(FakeTransport):
+    def open_session(self):
+        self.sessions.append(FindChannel())
+        return self.sessions[-1]
+
+class FindSSH(FakeSSH):
+    def __init__(self):
+        self.transport = FindTransport()
+
+class LocalStat:
+    """The one SFTP call a search makes on the interactive lane"""
+    def stat(self, path):
+        return os.stat(path)
+
+class SizedSFTP(InMemorySFTP):
+    def _attrs(self, path):
+        attr = super()._attrs(path)
+        attr.st_size = 100
+        attr.st_atime = attr.st_mtime = 0
+        return attr
+
+    def stat(self, path):
+        if self.paths.get(path) != 'dir':
+            raise IOError(f"No such file: {path}")
+        return self._attrs(path)
+
+def make_tree(root):
+    days = 24 * 3600
+    for path, size, age in (('notes.txt', 10, 1), ('a/app.log', 3000, 2), ('a/old.log', 5000, 400),
+                            ('a/b/deep.LOG', 2048, 3), ('a/b/data.bin', 10 ** 6, 3), ('logs/x.txt', 1, 1)):
+        full = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'wb') as handle:
+            handle.write(b'x' * size)
+        when = os.stat(full).st_mtime - age * days
+        os.utime(full, (when, when))
+
+def python_matches(root, expression):
+    """Paths a plain walk plus the listing filter finds"""
+    matches = ListingPager.compile_filter(expression)
+    found = []
+    for dirpath, _, _ in os.walk(root):
+        found += [entry['path'] for entry in scp_manager.list_local_directory(dirpath)['items'] if matches(entry)]
+    return sorted(found)
+
+def read_search(client, query):
+    response = client.get(f'/api/search-remote?{query}')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return lines[0], lines[1:-1], lines[-1]
+
+def session_client(session_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['session_id'] = session_id
+    return client
+
+def test_find_predicates_match_the_listing_filter():
+    """find's pre-filtering never drops an entry the exact filter would keep"""
+    if not shutil.which('find') or os.system("find / -maxdepth 0 -printf '' >/dev/null 2>&1") != 0:
+        print("⚠️ GNU find not installed, skipping")
+        return
+    root = tempfile.mkdtemp()
+    scp_manager.connections['search-find'] = {'ssh': FindSSH(), 'sftp': LocalStat(), 'remote_os': 'linux'}
+    try:
+        make_tree(root)
+        days_ago = lambda days, length: time.strftime('%Y-%m-%d', time.localtime(time.time() - days * 24 * 3600))[:length]
+        with session_client('search-find') as client:
+            for expression in ('*.log', 'log', 'type:dir', 'type:file size>2k', 'size>=2048 size<=3000', 'size=10',
+                               f"modified<{days_ago(200, 7)}", f"modified>={days_ago(2, 10)}",
+                               f"modified={days_ago(3, 10)}", f"modified>{days_ago(3, 10)}", 'size>1.5k *.log'):
+                start, items, end = read_search(client, f'path={root}/&query={expression}')
+                assert start['method'] == 'find' and end['event'] == 'end', (start, end)
+                assert sorted(item['path'] for item in items) == python_matches(root, expression), expression
+                assert end['matches'] == len(items) and not end['limit_reached']
+        print("✅ find predicates agree with the listing filter")
+    finally:
+        scp_manager.connections.pop('search-find', None)
+        shutil.rmtree(root, ignore_errors=True)
+
+TREE = {
+    '/srv': 'dir', '/srv/a': 'dir', '/srv/a/one.log': 'file', '/srv/a/b': 'dir', '/srv/a/b/two.log': 'file',
+    '/srv/a/b/c': 'dir', '/srv/a/b/c/three.log': 'file', '/srv/notes.txt': 'file'
+}
+
+def test_sftp_fallback_without_find():
+    """Without a shell the search walks the tree over SFTP, honouring max_depth"""
+    scp_manager.connections['search-sftp'] = {'sftp': SizedSFTP(TREE), 'remote_os': 'linux'}
+    try:
+        with session_client('search-sftp') as client:
+            start, items, end = read_search(client, 'path=/srv&query=*.log')
+            assert start['method'] == 'sftp'
+            assert sorted(item['path'] for item in items) == ['/srv/a/b/c/three.log', '/srv/a/b/two.log', '/srv/a/one.log']
+            assert end['scanned'] == 7 and end['warning'] is None
+
+            start, items, end = read_search(client, 'path=/srv&query=*.log&max_depth=2')
+            assert [item['path'] for item in items] == ['/srv/a/one.log']
+
+            start, items, end = read_search(client, 'path=/srv&query=log&limit=2')
+            assert len(items) == 2 and end['limit_reached'] is True
+
+            assert read_search(client, 'path=/missing&query=x')[0]['event'] == 'error'
+            assert 'error' in client.get('/api/search-remote?path=/srv').get_json()
+            assert 'error' in client.get('/api/search-remote?path=/srv&query=size>lots').get_json()
+            for depth in ('0', '-1'):
+                assert client.get(f'/api/search-remote?path=/srv&query=*.log&max_depth={depth}').get_json()['error'] == 'max_depth must be at least 1'
+        print("✅ SFTP fallback, depth and result limits")
+    finally:
+        scp_manager.connections.pop('search-sftp', None)
+
+def test_cancel_stops_the_search():
+    """Cancelling by id ends the stream early, and a newer search replaces the old one"""
+    conn = {'sftp': SizedSFTP(TREE), 'remote_os': 'linux'}
+    scp_manager.connections['search-cancel'] = conn
+    try:
+        search = RemoteSearch('search-cancel', '/srv', '*.log')
+        lines = scp_manager.search_remote(conn, search)
+        start = json.loads(next(lines))
+        assert scp_manager.cancel_remote_search('search-cancel', 'someone-else') is False
+        with session_client('search-cancel') as client:
+            assert client.post('/api/search-remote/cancel', json={'search_id': start['search_id']}).get_json()['success']
+        end = json.loads(''.join(lines).splitlines()[-1])
+        assert end['cancelled'] is True and end['matches'] == 0
+        assert 'search-cancel' not in scp_manager.remote_searches
+
+        first = RemoteSearch('search-cancel', '/srv', '*.log')
+        running = scp_manager.search_remote(conn, first)
+        next(running)
+        second = scp_manager.search_remote(conn, RemoteSearch('search-cancel', '/srv', '*.log'))
+        next(second)
+        assert first.cancelled and json.loads(''.join(second).splitlines()[-1])['matches'] == 3
+        print("✅ Searches can be cancelled")
+    finally:
+        scp_manager.connections.pop('search-cancel', None)
+        scp_manager.remote_searches.pop('search-cancel', None)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Remote Search")
+    print("=" * 50)
+    test_find_predicates_match_the_listing_filter()
+    test_sftp_fallback_without_find()
+    test_cancel_stops_the_search()
+    print("=" * 50)
+    print("🎉 All remote search tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Test for the remote change feed
+Runs the inotifywait command line through a local shell standing in for the
+exec channel, with a scripted inotifywait on PATH that prints the events the
+test feeds it, and polls an in-memory SFTP tree for the fallback, so neither
+an SSH server nor inotify-tools is required
+"""
+
+import errno
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+sys.path.append('.')
+
+import paramiko
+import app_enhanced
+from app_enhanced import app, scp_manager, RemoteWatch
+from test_listing_cache import ListingSFTP
+from test_remote_commands import FakeSSH
+
+OLD = int(time.time()) - 3600
+
+class WatchedSFTP(ListingSFTP):
+    """In-memory SFTP with sizes and mtimes that answers STAT and fails to list missing folders"""
+    def __init__(self, paths):
+        super().__init__(paths)
+        self.sizes = {}
+        self.mtimes = {}
+        self.lstats = 0
+
+    def _attrs(self, path):
+        attr = super()._attrs(path)
+        attr.st_size = self.sizes.get(path, 1)
+        attr.st_atime = attr.st_mtime = self.mtimes.get(path, OLD)
+        return attr
+
+    def _reply(self, t, arg):
+        if t == paramiko.sftp.CMD_LSTAT:
+            self.lstats += 1
+        return super()._reply(paramiko.sftp.CMD_LSTAT if t == paramiko.sftp.CMD_STAT else t, arg)
+
+    def listdir_attr(self, path):
+        if self.paths.get(path) != 'dir':
+            raise IOError(errno.ENOENT, 'No such file')
+        attrs = super().listdir_attr(path)
+        for attr in attrs:
+            child = os.path.join(path, attr.filename)
+            attr.st_size = self.sizes.get(child, 1)
+            attr.st_mtime = self.mtimes.get(child, OLD)
+        return attrs
+
+TREE = {'/srv': 'dir', '/srv/a.txt': 'file', '/srv/b.txt': 'file', '/srv/sub': 'dir', '/other': 'dir'}
+
+def read_line(lines):
+    return json.loads(next(lines))
+
+class ScriptedInotify:
+    """Puts an inotifywait on PATH that announces its watches and prints what the test writes to a FIFO"""
+    def __enter__(self):
+        self.folder = tempfile.mkdtemp()
+        fifo = os.path.join(self.folder, 'events')
+        os.mkfifo(fifo)
+        script = os.path.join(self.folder, 'inotifywait')
+        with open(script, 'w') as handle:
+            handle.write(f"#!/bin/sh\necho \"$*\" > {self.folder}/args\n"
+                         f"echo 'Setting up watches.' >&2\necho 'Watches established.' >&2\nexec cat {fifo}\n")
+        os.chmod(script, 0o755)
+        self.events = os.open(fifo, os.O_RDWR)
+        self.path = os.environ['PATH']
+        os.environ['PATH'] = f"{self.folder}:{self.path}"
+        return self
+
+    def send(self, *records):
+        os.write(self.events, ''.join(record + '\n' for record in records).encode())
+
+    def __exit__(self, *exc):
+        os.environ['PATH'] = self.path
+        os.close(self.events)
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+def test_command_and_event_parsing():
+    """Paths are quoted, and CSV records map to names to re-read or folders to list again"""
+    watch = RemoteWatch('parse', ['/srv/', "/it's here", '-dash'])
+    command = watch.inotify_command()
+    assert "inotifywait -m --csv" in command and "'/it'\"'\"'s here'" in command and './-dash' in command
+    assert watch.paths == ['/srv', "/it's here", '-dash']
+
+    watch.listings = {path: {'items': []} for path in watch.paths}
+    touched = {}
+    for record in (['/srv/', 'CREATE', 'new'], ['/srv/', 'CLOSE_WRITE,CLOSE', 'a, "b"'], ['./-dash/', 'DELETE_SELF', ''],
+                   ['/elsewhere/', 'CREATE', 'x'], ['/srv/', 'IGNORED', '']):
+        watch.note_event(touched, record)
+    assert touched == {'/srv': {'new', 'a, "b"'}, '-dash': None}
+    watch.note_event(touched, ['Q_OVERFLOW', ''])
+    assert touched == {path: None for path in watch.paths}
+    print("✅ inotifywait command and event parsing")
+
+def test_inotify_events_patch_the_cached_listing():
+    """Events are applied by re-reading only the named entries, and the cache follows along"""
+    sftp = WatchedSFTP(TREE)
+    conn = {'ssh': FakeSSH(), 'sftp': sftp, 'remote_os': 'linux', 'inotifywait': True,
+            'host': 'example', 'username': 'me', 'port': 22}
+    with ScriptedInotify() as inotify:
+        lines = scp_manager.watch_remote(conn, RemoteWatch('watch-inotify', ['/srv']))
+        try:
+            start = read_line(lines)
+            assert start['event'] == 'start' and start['method'] == 'inotify' and start['paths'] == ['/srv']
+            assert sftp.listings == 1
+
+            sftp.paths['/srv/new dir'] = 'dir'
+            sftp.paths['/srv/c.txt'] = 'file'
+            inotify.send('/srv/,"CREATE,ISDIR",new dir', '/srv/,CREATE,c.txt', '/srv/,CLOSE_WRITE,c.txt')
+            change = read_line(lines)
+            assert change['event'] == 'change' and change['path'] == '/srv'
+            assert [item['name'] for item in change['added']] == ['new dir', 'c.txt'] and change['added'][0]['is_directory']
+            assert change['modified'] == [] and change['removed'] == [] and change['total'] == 5
+            cached = conn['listing_cache'].get('/srv')[1]
+            assert [item['name'] for item in cached['items']] == ['new dir', 'sub', 'a.txt', 'b.txt', 'c.txt']
+            assert cached['version'] == change['version'] and sftp.listings == 1
+
+            sftp.sizes['/srv/a.txt'] = 4096
+            del sftp.paths['/srv/b.txt']
+            inotify.send('/srv/,MODIFY,a.txt', '/srv/,DELETE,b.txt')
+            change = read_line(lines)
+            assert [item['size'] for item in change['modified']] == [4096] and change['removed'] == ['b.txt']
+            # Each named entry was read again with one lstat; the folder was never listed again
+            assert sftp.listings == 1 and sftp.lstats == 4
+
+            # Removing the watched folder ends the feed
+            for path in [path for path in sftp.paths if path.startswith('/srv')]:
+                del sftp.paths[path]
+            inotify.send('/srv/,DELETE_SELF,')
+            assert read_line(lines) == {'event': 'gone', 'path': '/srv'}
+            end = read_line(lines)
+            assert end['event'] == 'end' and end['changes'] == 3 and not end['cancelled']
+            assert conn['listing_cache'].get('/srv') is None
+            with open(os.path.join(inotify.folder, 'args')) as handle:
+                assert handle.read().split()[-1] == '/srv'
+        finally:
+            lines.close()
+        assert conn['ssh'].transport.sessions[0].closed
+    print("✅ inotify events patch the cached listing")
+
+def test_polling_fallback_lists_only_changed_folders():
+    """Without inotifywait, folders are listed again only when their mtime moves"""
+    sftp = WatchedSFTP(TREE)
+    conn = {'ssh': FakeSSH(), 'sftp': sftp, 'remote_os': 'linux', 'inotifywait': False}
+    interval = app_enhanced.WATCH_POLL_INTERVAL
+    app_enhanced.WATCH_POLL_INTERVAL = 0.05
+    lines = scp_manager.watch_remote(conn, RemoteWatch('watch-poll', ['/srv', '/other']))
+    try:
+        assert read_line(lines)['method'] == 'poll' and sftp.listings == 2
+
+        sftp.paths['/other/late.txt'] = 'file'
+        sftp.mtimes['/other'] = OLD + 60
+        change = read_line(lines)
+        assert change['path'] == '/other' and [item['name'] for item in change['added']] == ['late.txt']
+        assert sftp.listings == 3
+
+        sftp.mtimes['/srv'] = OLD + 60
+        sftp.mtimes['/srv/a.txt'] = OLD + 60
+        assert [item['name'] for item in read_line(lines)['modified']] == ['a.txt']
+        assert sftp.listings == 4
+        # The server's clock was read once, through its shell
+        assert -2 < conn['clock_offset'] <= 0
+    finally:
+        lines.close()
+        app_enhanced.WATCH_POLL_INTERVAL = interval
+    print("✅ Polling lists only folders whose mtime moved")
+
+def poll_until(sftp, lines, listings):
+    """Read lines until the folder has been listed ``listings`` times, or give up after a second"""
+    deadline = time.time() + 1
+    while sftp.listings < listings and time.time() < deadline:
+        line = read_line(lines)
+        if line['event'] != 'heartbeat':
+            return line
+
+def test_polling_judges_mtimes_on_the_server_clock():
+    """A skewed server clock neither hides same-second changes nor causes a listing on every poll"""
+    interval, heartbeat = app_enhanced.WATCH_POLL_INTERVAL, app_enhanced.WATCH_HEARTBEAT_INTERVAL
+    slack = app_enhanced.WATCH_MTIME_SLACK
+    app_enhanced.WATCH_POLL_INTERVAL = app_enhanced.WATCH_HEARTBEAT_INTERVAL = 0.02
+    try:
+        # Server clock 100s behind ours: a folder changed just now by its clock is listed again,
+        # so a file added in the same second is still found
+        sftp = WatchedSFTP(TREE)
+        sftp.mtimes['/srv'] = int(time.time()) - 100
+        conn = {'sftp': sftp, 'remote_os': 'linux', 'clock_offset': -101}
+        lines = scp_manager.watch_remote(conn, RemoteWatch('watch-behind', ['/srv']))
+        try:
+            read_line(lines)
+            sftp.paths['/srv/same-second.txt'] = 'file'
+            change = poll_until(sftp, lines, 10)
+            assert change and [item['name'] for item in change['added']] == ['same-second.txt']
+        finally:
+            lines.close()
+
+        # Server clock 100s ahead: a folder last changed a minute ago by its clock is settled
+        sftp = WatchedSFTP(TREE)
+        sftp.mtimes['/srv'] = int(time.time()) + 40
+        conn = {'sftp': sftp, 'remote_os': 'linux', 'clock_offset': 99}
+        lines = scp_manager.watch_remote(conn, RemoteWatch('watch-ahead', ['/srv']))
+        try:
+            read_line(lines)
+            for _ in range(10):
+                assert read_line(lines)['event'] == 'heartbeat'
+            assert sftp.listings == 1
+        finally:
+            lines.close()
+
+        # Without the server's clock, a folder is listed again only until a listing starts
+        # a slack after its mtime was first seen
+        app_enhanced.WATCH_MTIME_SLACK = 0.2
+        sftp = WatchedSFTP(TREE)
+        conn = {'sftp': sftp, 'remote_os': 'linux'}
+        lines = scp_manager.watch_remote(conn, RemoteWatch('watch-unknown', ['/srv']))
+        try:
+            read_line(lines)
+            settle = time.time() + 0.4
+            while time.time() < settle:
+                assert read_line(lines)['event'] == 'heartbeat'
+            settled = sftp.listings
+            for _ in range(10):
+                assert read_line(lines)['event'] == 'heartbeat'
+            assert settled > 1 and sftp.listings == settled
+        finally:
+            lines.close()
+    finally:
+        app_enhanced.WATCH_POLL_INTERVAL, app_enhanced.WATCH_HEARTBEAT_INTERVAL = interval, heartbeat
+        app_enhanced.WATCH_MTIME_SLACK = slack
+    print("✅ Polling judges mtimes on the server's clock")
+
+def test_missing_inotifywait_falls_back_to_polling():
+    """A server without inotifywait is polled instead"""
+    sftp = WatchedSFTP(TREE)
+    conn = {'ssh': FakeSSH(), 'sftp': sftp, 'remote_os': 'linux'}
+    interval = app_enhanced.WATCH_POLL_INTERVAL
+    app_enhanced.WATCH_POLL_INTERVAL = 0.05
+    path = os.environ['PATH']
+    os.environ['PATH'] = '/nonexistent'
+    lines = scp_manager.watch_remote(conn, RemoteWatch('watch-missing', ['/srv']), method='inotify')
+    try:
+        assert read_line(lines)['method'] == 'inotify'
+        fallback = read_line(lines)
+        assert fallback['event'] == 'method' and fallback['method'] == 'poll'
+    finally:
+        os.environ['PATH'] = path
+        lines.close()
+        app_enhanced.WATCH_POLL_INTERVAL = interval
+    print("✅ Missing inotifywait falls back to polling")
+
+def test_watch_endpoint_and_cancel():
+    """The endpoint streams NDJSON, a new watch replaces the old one, and cancel ends it"""
+    conn = {'sftp': WatchedSFTP(TREE), 'remote_os': 'linux'}
+    scp_manager.connections['watch-endpoint'] = conn
+    try:
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['session_id'] = 'watch-endpoint'
+            assert 'error' in client.get('/api/watch-remote?path=/srv&method=fsevents').get_json()
+            assert 'error' in client.get('/api/watch-remote?' + '&'.join(f'path=/p{i}' for i in range(5))).get_json()
+            response = client.get('/api/watch-remote?path=/srv/a.txt')
+            assert response.mimetype == 'application/x-ndjson'
+            assert json.loads(response.get_data(as_text=True))['error'] == 'Not a folder: /srv/a.txt'
+
+            first = scp_manager.watch_remote(conn, RemoteWatch('watch-endpoint', ['/srv']))
+            next(first)
+            second = scp_manager.watch_remote(conn, RemoteWatch('watch-endpoint', ['/srv']))
+            start = read_line(second)
+            assert json.loads(next(first))['cancelled'] is True
+
+            assert client.post('/api/watch-remote/cancel', json={'watch_id': 'someone-else'}).get_json()['success'] is False
+            assert client.post('/api/watch-remote/cancel', json={'watch_id': start['watch_id']}).get_json()['success']
+            assert json.loads(''.join(second))['cancelled'] is True
+            assert 'watch-endpoint' not in scp_manager.remote_watches
+        print("✅ Watch endpoint, replacement and cancel")
+    finally:
+        scp_manager.connections.pop('watch-endpoint', None)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Remote Change Feed")
+    print("=" * 50)
+    test_command_and_event_parsing()
+    test_inotify_events_patch_the_cached_listing()
+    test_polling_fallback_lists_only_changed_folders()
+    test_polling_judges_mtimes_on_the_server_clock()
+    test_missing_inotifywait_falls_back_to_polling()
+    test_watch_endpoint_and_cancel()
+    print("=" * 50)
+    print("🎉 All remote change feed tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
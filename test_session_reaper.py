@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test for idle session eviction, the max-connections cap and eviction tombstones
+Uses placeholder connections so no SSH server is required
+"""
+
+import sys
+from datetime import datetime, timedelta
+sys.path.append('.')
+
+import app_enhanced
+from app_enhanced import app, scp_manager
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def add_session(session_id, idle_minutes=0, transfer_active=False):
+    scp_manager.connections[session_id] = {
+        'ssh': FakeClient(),
+        'sftp': FakeClient(),
+        'host': 'reaper-host',
+        'username': 'tester',
+        'port': 22,
+        'last_activity': datetime.now() - timedelta(minutes=idle_minutes),
+        'transfer_active': transfer_active
+    }
+
+def cleanup(*session_ids):
+    for session_id in session_ids:
+        scp_manager.connections.pop(session_id, None)
+        scp_manager.tombstones.pop(session_id, None)
+
+def test_idle_sessions_evicted_but_transfers_kept():
+    """Idle sessions are reaped; sessions with an active transfer never are"""
+    add_session('idle', idle_minutes=120)
+    add_session('busy', idle_minutes=120, transfer_active=True)
+    add_session('fresh')
+    try:
+        scp_manager._reap_connections()
+        assert 'idle' not in scp_manager.connections
+        assert 'busy' in scp_manager.connections and 'fresh' in scp_manager.connections
+        assert scp_manager.get_tombstone('idle')['reason'] == 'idle_timeout'
+        print("✅ Idle sessions evicted, active transfers kept")
+    finally:
+        cleanup('idle', 'busy', 'fresh')
+
+def test_cap_evicts_least_recently_used():
+    """Above the cap the least recently used sessions go first"""
+    original = app_enhanced.SESSION_MAX_CONNECTIONS
+    app_enhanced.SESSION_MAX_CONNECTIONS = len(scp_manager.connections) + 2
+    add_session('oldest', idle_minutes=30)
+    add_session('older', idle_minutes=20)
+    add_session('newest', idle_minutes=1)
+    try:
+        scp_manager._enforce_connection_cap()
+        assert 'oldest' not in scp_manager.connections
+        assert 'older' in scp_manager.connections and 'newest' in scp_manager.connections
+        assert scp_manager.get_tombstone('oldest')['reason'] == 'capacity'
+        print("✅ Connection cap evicts least recently used")
+    finally:
+        app_enhanced.SESSION_MAX_CONNECTIONS = original
+        cleanup('oldest', 'older', 'newest')
+
+def test_evicted_session_gets_relogin_signal():
+    """Remote endpoints answer an evicted session with session_evicted"""
+    add_session('evicted', idle_minutes=120)
+    try:
+        scp_manager.evict_connection('evicted', 'idle_timeout')
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['session_id'] = 'evicted'
+            response = client.get('/api/list-remote?path=/')
+            assert response.status_code == 401
+            assert response.get_json()['error_type'] == 'session_evicted'
+
+            # Local browsing keeps working
+            assert client.get('/api/list-local?path=/tmp').status_code == 200
+        print("✅ Evicted sessions get a clean re-login signal")
+    finally:
+        cleanup('evicted')
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Session Reaper")
+    print("=" * 50)
+    test_idle_sessions_evicted_but_transfers_kept()
+    test_cap_evicts_least_recently_used()
+    test_evicted_session_gets_relogin_signal()
+    print("=" * 50)
+    print("🎉 All session reaper tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test for the persistent directory-size index
+Sizes local trees and an in-memory SFTP tree twice and checks that only
+folders whose mtime changed are listed again
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+sys.path.append('.')
+
+import paramiko
+from app_enhanced import app, scp_manager, DirectorySizeIndex, LocalTreeReader, RemoteTreeReader
+from test_remote_commands import InMemorySFTP, FakeSSH
+
+OLD = time.time() - 3600
+
+def make_tree(root):
+    for path, size in (('top.txt', 5), ('a/one.txt', 10), ('a/b/two.txt', 20), ('c/d/e/three.txt', 40)):
+        full = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'wb') as handle:
+            handle.write(b'x' * size)
+    age_folders(root)
+
+def age_folders(root):
+    """Give every folder an mtime well before any scan, so scans can be reused"""
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (OLD, OLD))
+
+def rows(index):
+    with sqlite3.connect(index.db_path) as db:
+        return db.execute('SELECT COUNT(*) FROM dir_sizes').fetchone()[0]
+
+def test_unchanged_local_tree_is_not_listed_again():
+    """A second measure reuses every folder; a change lists only the changed folder"""
+    root = tempfile.mkdtemp()
+    db = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    try:
+        make_tree(root)
+        index = DirectorySizeIndex(db)
+        first = index.measure('local', root, LocalTreeReader(), sep=os.sep)
+        assert (first['bytes'], first['files'], first['dirs']) == scp_manager._scan_local_tree(root) == (75, 4, 5)
+        assert first['rescanned'] == 6 and rows(index) == 6
+
+        second = index.measure('local', root, LocalTreeReader(), sep=os.sep)
+        assert second['rescanned'] == 0 and second['reused'] == 6 and second['bytes'] == 75
+
+        with open(os.path.join(root, 'c', 'd', 'new.bin'), 'wb') as handle:
+            handle.write(b'x' * 100)
+        third = index.measure('local', root, LocalTreeReader(), sep=os.sep)
+        assert third['rescanned'] == 1 and (third['bytes'], third['files']) == (175, 5)
+
+        # Removing a subtree rescans its parent and drops the subtree's rows
+        shutil.rmtree(os.path.join(root, 'c', 'd'))
+        os.utime(os.path.join(root, 'c'), (OLD + 60, OLD + 60))
+        fourth = index.measure('local', root, LocalTreeReader(), sep=os.sep)
+        assert fourth['rescanned'] == 1 and (fourth['bytes'], fourth['files'], fourth['dirs']) == (35, 3, 3)
+        assert rows(index) == 4
+        print("✅ Only changed local folders are listed again")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        os.unlink(db)
+
+def test_recently_modified_folders_are_not_trusted():
+    """A folder changed within the slack of its scan is listed again next time"""
+    root = tempfile.mkdtemp()
+    db = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    try:
+        make_tree(root)
+        os.utime(os.path.join(root, 'a'))  # modified just now
+        index = DirectorySizeIndex(db)
+        index.measure('local', root, LocalTreeReader(), sep=os.sep)
+        assert index.measure('local', root, LocalTreeReader(), sep=os.sep)['rescanned'] == 1
+
+        # In-place overwrites don't touch folder mtimes, so the app invalidates what it writes
+        index.invalidate('local', [os.path.join(root, 'c', 'd')], sep=os.sep)
+        assert index.measure('local', root, LocalTreeReader(), sep=os.sep)['rescanned'] == 4
+        print("✅ Recent changes and invalidated paths are rescanned")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        os.unlink(db)
+
+class TimedSFTP(InMemorySFTP):
+    """In-memory SFTP with file sizes and folder mtimes, counting OPENDIR and LSTAT requests"""
+    def __init__(self, paths):
+        super().__init__(paths)
+        self.mtimes = {path: int(OLD) for path in paths}
+        self.opened = []
+        self.lstats = 0
+
+    def _attrs(self, path):
+        attr = super()._attrs(path)
+        attr.st_size = 0 if self.paths[path] == 'dir' else 100
+        attr.st_atime = attr.st_mtime = self.mtimes[path]
+        return attr
+
+    def _reply(self, t, arg):
+        path = arg.decode() if isinstance(arg, bytes) else arg
+        if t == paramiko.sftp.CMD_OPENDIR:
+            self.opened.append(path)
+        if t == paramiko.sftp.CMD_LSTAT:
+            self.lstats += 1
+        return super()._reply(t, arg)
+
+    def stat(self, path):
+        return self._attrs(path.rstrip('/') or '/')
+
+TREE = {
+    '/srv': 'dir', '/srv/a': 'dir', '/srv/a/one.bin': 'file', '/srv/a/b': 'dir', '/srv/a/b/two.bin': 'file',
+    '/srv/c': 'dir', '/srv/c/three.bin': 'file', '/srv/top.bin': 'file'
+}
+
+def test_remote_tree_and_count_endpoint():
+    """Remote sizing reuses unchanged folders at one pipelined lstat per level"""
+    sftp = TimedSFTP(TREE)
+    db = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    index = scp_manager.size_index
+    scp_manager.size_index = DirectorySizeIndex(db)
+    scp_manager.connections['size-index'] = {'ssh': FakeSSH(), 'sftp': sftp, 'host': 'example', 'username': 'me', 'port': 22}
+    try:
+        with app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['session_id'] = 'size-index'
+            first = client.get('/api/count-remote-items?path=/srv').get_json()
+            assert (first['files'], first['directories'], first['total_size']) == (4, 3, 400)
+            assert first['index'] == {'rescanned': 4, 'reused': 0}
+            # The server's clock was read once, through its shell
+            assert -2 < scp_manager.connections['size-index']['clock_offset'] <= 0
+            # Subfolder mtimes came from the listings; only the root was stat'ed
+            assert sftp.lstats == 1
+
+            sftp.opened.clear()
+            assert client.get('/api/count-remote-items?path=/srv/').get_json()['index'] == {'rescanned': 0, 'reused': 4}
+            assert sftp.opened == [] and sftp.lstats == 5
+
+            sftp.paths['/srv/a/b/more.bin'] = 'file'
+            sftp.mtimes['/srv/a/b/more.bin'] = sftp.mtimes['/srv/a/b'] = int(OLD) + 60
+            again = client.get('/api/count-remote-items?path=/srv').get_json()
+            assert sftp.opened == ['/srv/a/b'] and again['total_size'] == 500
+            assert client.get('/api/count-remote-items?path=/srv&refresh=1').get_json()['index']['rescanned'] == 4
+
+        # The app's own writes drop the rows of the folders they touch
+        scp_manager.invalidate_listings(scp_manager.connections['size-index'], ['/srv/c/three.bin'])
+        totals = scp_manager.measure_remote_tree(scp_manager.connections['size-index'], sftp, '/srv')
+        assert totals['rescanned'] == 1 and totals['bytes'] == 500
+        print("✅ Remote sizing and count endpoint use the index")
+    finally:
+        scp_manager.connections.pop('size-index', None)
+        scp_manager.size_index = index
+        os.unlink(db)
+
+def test_remote_clock_skew():
+    """Scans are trusted on the server's clock, whichever way it is off from ours"""
+    db = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    try:
+        for skew in (-100, 100):
+            for clock_offset in (skew - 1, None):
+                index = DirectorySizeIndex(db)
+                sftp = TimedSFTP({'/srv': 'dir', '/srv/one.bin': 'file'})
+                # Just changed, by a server clock that is off by ``skew`` seconds
+                sftp.mtimes['/srv'] = int(time.time() + skew)
+                index.measure('srv', '/srv', RemoteTreeReader(sftp, clock_offset))
+
+                # A change in the same second does not move the mtime, so the scan is not trusted
+                sftp.paths['/srv/two.bin'] = 'file'
+                sftp.mtimes['/srv/two.bin'] = sftp.mtimes['/srv']
+                second = index.measure('srv', '/srv', RemoteTreeReader(sftp, clock_offset))
+                assert (second['files'], second['rescanned']) == (2, 1), (skew, clock_offset)
+
+                # Once the scan is safely later on the server's clock, it is reused
+                sftp.mtimes['/srv'] -= 10
+                index.measure('srv', '/srv', RemoteTreeReader(sftp, clock_offset))
+                if clock_offset is None:
+                    # Without the clock, the mtime must have been seen a while before a scan
+                    with sqlite3.connect(db) as update:
+                        update.execute('UPDATE dir_sizes SET seen_at = seen_at - 10')
+                third = index.measure('srv', '/srv', RemoteTreeReader(sftp, clock_offset))
+                assert third['reused'] == 1 and third['files'] == 2, (skew, clock_offset)
+                index.invalidate('srv', ['/srv'])
+        print("✅ Remote scans are judged on the server's clock")
+    finally:
+        os.unlink(db)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Directory Size Index")
+    print("=" * 50)
+    test_unchanged_local_tree_is_not_listed_again()
+    test_recently_modified_folders_are_not_trusted()
+    test_remote_tree_and_count_endpoint()
+    test_remote_clock_skew()
+    print("=" * 50)
+    print("🎉 All size index tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
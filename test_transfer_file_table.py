@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test for the per-file transfer table and the /api/transfer-files endpoint
+Runs entirely in-process, no SSH server required
+"""
+
+import sys
+sys.path.append('.')
+
+from app_enhanced import app, scp_manager, TransferFileTable, FILE_STATE_ACTIVE
+
+def test_table_rows_and_states():
+    """Rows move through queued -> active -> done/failed with per-state counts"""
+    table = TransferFileTable('test-session')
+    first = table.add('/data/a.bin', 100)
+    second = table.add('/data/b.bin', 50)
+    third = table.add('/data/c.bin', 10, FILE_STATE_ACTIVE)
+
+    table.start(first)
+    table.update(first, 40)
+    table.finish(second, False)
+    table.finish(third, True)
+
+    counts = table.state_counts()
+    assert counts == {'queued': 0, 'active': 1, 'done': 1, 'failed': 1}
+    assert table.transferred[first] == 40
+    assert table.transferred[third] == 10  # completed rows report their full size
+    print("✅ Row states and counts tracked")
+
+def test_snapshot_columnar_and_pagination():
+    """Snapshots are columnar and paginate with next_offset"""
+    table = TransferFileTable('test-session')
+    for i in range(25):
+        table.add(f'/data/file_{i}.txt', i)
+
+    page = table.snapshot(offset=0, limit=10)
+    assert page['total'] == 25
+    assert page['columns']['row'] == list(range(10))
+    assert page['columns']['path'][3] == '/data/file_3.txt'
+    assert page['next_offset'] == 10
+
+    last = table.snapshot(offset=20, limit=10)
+    assert len(last['columns']['row']) == 5
+    assert last['next_offset'] is None
+    print("✅ Columnar pages with pagination")
+
+def test_snapshot_since_version():
+    """Delta queries return only rows changed after the given version"""
+    table = TransferFileTable('test-session')
+    for i in range(5):
+        table.add(f'/data/{i}', 10)
+    version = table.version
+
+    table.start(3)
+    table.update(3, 5)
+    table.finish(1, True)
+
+    delta = table.snapshot(since=version)
+    assert delta['columns']['row'] == [1, 3]
+    assert delta['version'] > version
+    assert table.snapshot(since=delta['version'])['total'] == 0
+    print("✅ Since-version deltas")
+
+def test_change_log_compaction():
+    """Frequent byte updates do not grow the change log without bound"""
+    table = TransferFileTable('test-session')
+    row = table.add('/data/big.iso', 10 ** 9)
+    version = table.version
+    for transferred in range(0, 5000):
+        table.update(row, transferred)
+
+    assert len(table._log_rows) <= 2 * len(table) + 1024
+    assert table.snapshot(since=version)['columns']['row'] == [row]
+    print("✅ Change log compaction keeps deltas correct")
+
+def test_transfer_files_endpoint():
+    """The endpoint serves the session's table and flags stale job ids"""
+    table = scp_manager.start_transfer_table('endpoint-session')
+    table.add('/data/x', 1)
+
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['session_id'] = 'endpoint-session'
+
+        result = client.get('/api/transfer-files?limit=10').get_json()
+        assert result['success'] is True
+        assert result['job_id'] == table.job_id
+        assert result['columns']['path'] == ['/data/x']
+
+        stale = client.get('/api/transfer-files?job_id=old&since=99').get_json()
+        assert stale['job_changed'] is True
+        assert stale['total'] == 1
+
+        bad = client.get('/api/transfer-files?offset=abc').get_json()
+        assert bad['success'] is False
+
+    scp_manager.transfer_tables.pop('endpoint-session', None)
+    print("✅ /api/transfer-files endpoint")
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Per-File Transfer Table")
+    print("=" * 50)
+    test_table_rows_and_states()
+    test_snapshot_columnar_and_pagination()
+    test_snapshot_since_version()
+    test_change_log_compaction()
+    test_transfer_files_endpoint()
+    print("=" * 50)
+    print("🎉 All per-file transfer table tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test for the persistent transfer history store and its query endpoints
+Runs entirely in-process against a temporary SQLite database
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+import tempfile
+sys.path.append('.')
+
+from app_enhanced import app, scp_manager, TransferHistoryStore
+
+def make_store():
+    """Create a history store backed by a throwaway database file"""
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    return TransferHistoryStore(path), path
+
+def sample_job(host, started_at, duration, nbytes, rates=None):
+    return {
+        'job_id': f'job-{started_at}',
+        'host': host,
+        'port': 22,
+        'username': 'tester',
+        'direction': 'upload',
+        'started_at': started_at,
+        'finished_at': started_at + duration,
+        'bytes': nbytes,
+        'files': 3,
+        'rates': rates or [100.0, 200.0, 300.0],
+        'errors': []
+    }
+
+def test_record_and_recent():
+    """Recorded jobs come back newest first with throughput and percentiles"""
+    store, path = make_store()
+    try:
+        now = time.time()
+        assert store.record(sample_job('alpha', now - 100, 10, 1000))
+        assert store.record(sample_job('beta', now - 50, 5, 5000, rates=[1.0, 2.0, 3.0, 4.0]))
+
+        jobs = store.recent()
+        assert [job['host'] for job in jobs] == ['beta', 'alpha']
+        assert jobs[0]['throughput'] == 1000.0
+        assert jobs[0]['rate_p50'] == 2.0
+        assert jobs[0]['rate_p99'] == 4.0
+        assert store.recent(host='alpha')[0]['bytes'] == 1000
+        print("✅ Jobs recorded with throughput percentiles")
+    finally:
+        os.unlink(path)
+
+def test_trends_flag_degrading_hosts():
+    """A host whose latest bucket is much slower than before is flagged"""
+    store, path = make_store()
+    try:
+        now = time.time()
+        for days_ago in (3, 2):
+            store.record(sample_job('slowing', now - days_ago * 86400, 10, 10000))
+        store.record(sample_job('slowing', now - 60, 10, 1000))
+
+        trends = store.trends(days=7, bucket='day')['slowing']
+        assert len(trends['buckets']) == 3
+        assert trends['change_percent'] == -90.0
+        assert trends['degrading'] is True
+        print("✅ Degrading links flagged in throughput trends")
+    finally:
+        os.unlink(path)
+
+def test_history_endpoints():
+    """History endpoints validate input and return JSON"""
+    original = scp_manager.history
+    scp_manager.history, path = make_store()
+    try:
+        scp_manager.history.record(sample_job('gamma', time.time() - 10, 2, 2048))
+        with app.test_client() as client:
+            jobs = client.get('/api/transfer-history?host=gamma').get_json()
+            assert jobs['success'] is True and len(jobs['jobs']) == 1
+
+            trends = client.get('/api/transfer-history/trends?bucket=hour').get_json()
+            assert trends['success'] is True and 'gamma' in trends['hosts']
+
+            bad = client.get('/api/transfer-history/trends?bucket=decade').get_json()
+            assert bad['success'] is False
+        print("✅ History endpoints")
+    finally:
+        scp_manager.history = original
+        os.unlink(path)
+
+def test_database_created_on_first_use_next_to_the_app():
+    """Importing the app creates no file in the working directory; the store creates its file when first used"""
+    workdir = tempfile.mkdtemp()
+    app_dir = os.path.dirname(os.path.abspath('app_enhanced.py'))
+    try:
+        probe = subprocess.run([sys.executable, '-c', 'import app_enhanced; print(app_enhanced.TRANSFER_HISTORY_DB)'],
+                               cwd=workdir, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=app_dir))
+        assert probe.returncode == 0, probe.stderr
+        assert probe.stdout.split()[-1] == os.path.join(app_dir, 'transfer_history.db')
+        assert 'transfer_history.db' not in os.listdir(workdir)
+
+        path = os.path.join(workdir, 'history.db')
+        store = TransferHistoryStore(path)
+        assert not os.path.exists(path)
+        assert store.recent() == [] and os.path.exists(path)
+        print("✅ History database created on first use, next to the app")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    """Main test function"""
+    print("🧪 Testing Transfer History Store")
+    print("=" * 50)
+    test_record_and_recent()
+    test_trends_flag_degrading_hosts()
+    test_history_endpoints()
+    test_database_created_on_first_use_next_to_the_app()
+    print("=" * 50)
+    print("🎉 All transfer history tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())